@@ -15,6 +15,10 @@ from shared.database.database import Base
 from shared.models.vacancy import Vacancy, Application
 from shared.models.user import TelegramUser
 from shared.models.gmail_account import GmailAccount
+from shared.models.resume_blob import ResumeBlob
+from shared.models.job import Job
+from shared.models.llm_cache import LlmCacheEntry
+from shared.models.resume_text import ResumeText
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,84 @@
+"""add trigger-maintained application counters to vacancies
+
+Revision ID: 2a8d5c1e7f30
+Revises: 6e1f3a8c2d47
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a8d5c1e7f30'
+down_revision: Union[str, None] = '6e1f3a8c2d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COUNTER_DELTA = """
+    applications_count = applications_count {sign} ({row}.deleted_at IS NULL),
+    unprocessed_count = unprocessed_count {sign} ({row}.deleted_at IS NULL AND NOT coalesce({row}.is_processed, 0)),
+    deleted_count = deleted_count {sign} ({row}.deleted_at IS NOT NULL)
+"""
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('vacancies', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('applications_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('unprocessed_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('deleted_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Заполняем счетчики по существующим откликам
+    op.execute("""
+        UPDATE vacancies SET
+            applications_count = (
+                SELECT count(*) FROM applications
+                WHERE applications.vacancy_id = vacancies.id AND applications.deleted_at IS NULL
+            ),
+            unprocessed_count = (
+                SELECT count(*) FROM applications
+                WHERE applications.vacancy_id = vacancies.id AND applications.deleted_at IS NULL
+                    AND NOT coalesce(applications.is_processed, 0)
+            ),
+            deleted_count = (
+                SELECT count(*) FROM applications
+                WHERE applications.vacancy_id = vacancies.id AND applications.deleted_at IS NOT NULL
+            )
+    """)
+
+    op.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_applications_counters_insert
+        AFTER INSERT ON applications
+        BEGIN
+            UPDATE vacancies SET {COUNTER_DELTA.format(sign="+", row="NEW")} WHERE id = NEW.vacancy_id;
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_applications_counters_delete
+        AFTER DELETE ON applications
+        BEGIN
+            UPDATE vacancies SET {COUNTER_DELTA.format(sign="-", row="OLD")} WHERE id = OLD.vacancy_id;
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_applications_counters_update
+        AFTER UPDATE OF vacancy_id, is_processed, deleted_at ON applications
+        BEGIN
+            UPDATE vacancies SET {COUNTER_DELTA.format(sign="-", row="OLD")} WHERE id = OLD.vacancy_id;
+            UPDATE vacancies SET {COUNTER_DELTA.format(sign="+", row="NEW")} WHERE id = NEW.vacancy_id;
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_applications_counters_update")
+    op.execute("DROP TRIGGER IF EXISTS trg_applications_counters_delete")
+    op.execute("DROP TRIGGER IF EXISTS trg_applications_counters_insert")
+
+    with op.batch_alter_table('vacancies', schema=None) as batch_op:
+        batch_op.drop_column('deleted_count')
+        batch_op.drop_column('unprocessed_count')
+        batch_op.drop_column('applications_count')
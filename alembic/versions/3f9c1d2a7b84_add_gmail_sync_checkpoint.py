@@ -0,0 +1,30 @@
+"""add history sync checkpoint to gmail_accounts
+
+Revision ID: 3f9c1d2a7b84
+Revises: e7f1a2b3c4d5
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1d2a7b84'
+down_revision: Union[str, None] = 'e7f1a2b3c4d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('gmail_accounts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_history_id', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('last_synced_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('gmail_accounts', schema=None) as batch_op:
+        batch_op.drop_column('last_synced_at')
+        batch_op.drop_column('last_history_id')
@@ -0,0 +1,43 @@
+"""add content-addressed resume blob storage
+
+Revision ID: 4c7a9e2d5b16
+Revises: 8d2e4b6f1a93
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7a9e2d5b16'
+down_revision: Union[str, None] = '8d2e4b6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'resume_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.String(length=500), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+
+    # Старые отклики остаются со своими путями без хеша
+    with op.batch_alter_table('applications', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('file_sha256', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_applications_file_sha256'), ['file_sha256'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('applications', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_applications_file_sha256'))
+        batch_op.drop_column('file_sha256')
+
+    op.drop_table('resume_blobs')
@@ -0,0 +1,51 @@
+"""add indexes for hot handler queries
+
+Revision ID: 6e1f3a8c2d47
+Revises: 9b3e5f7a1c28
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e1f3a8c2d47'
+down_revision: Union[str, None] = '9b3e5f7a1c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_vacancies_gmail_account_deleted_created', 'vacancies',
+        ['gmail_account_id', 'deleted_at', 'created_at'], unique=False,
+    )
+    op.create_index(
+        'ix_vacancies_active_created', 'vacancies', ['created_at'], unique=False,
+        sqlite_where=sa.text('deleted_at IS NULL'),
+    )
+    op.create_index(
+        'ix_applications_active_vacancy_created', 'applications', ['vacancy_id', 'created_at'], unique=False,
+        sqlite_where=sa.text('deleted_at IS NULL'),
+    )
+    op.create_index(
+        'ix_applications_active_processed_created', 'applications', ['is_processed', 'created_at'], unique=False,
+        sqlite_where=sa.text('deleted_at IS NULL'),
+    )
+    op.create_index('ix_applications_telegram_user_id', 'applications', ['telegram_user_id'], unique=False)
+    op.create_index('ix_gmail_accounts_user_enabled', 'gmail_accounts', ['user_id', 'enabled'], unique=False)
+
+    # Обновляем статистику для планировщика запросов SQLite
+    op.execute('ANALYZE')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_gmail_accounts_user_enabled', table_name='gmail_accounts')
+    op.drop_index('ix_applications_telegram_user_id', table_name='applications')
+    op.drop_index('ix_applications_active_processed_created', table_name='applications')
+    op.drop_index('ix_applications_active_vacancy_created', table_name='applications')
+    op.drop_index('ix_vacancies_active_created', table_name='vacancies')
+    op.drop_index('ix_vacancies_gmail_account_deleted_created', table_name='vacancies')
@@ -0,0 +1,30 @@
+"""add backfill cursor to gmail_accounts
+
+Revision ID: 8d2e4b6f1a93
+Revises: 3f9c1d2a7b84
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4b6f1a93'
+down_revision: Union[str, None] = '3f9c1d2a7b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('gmail_accounts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('backfill_query', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('backfill_page_token', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('gmail_accounts', schema=None) as batch_op:
+        batch_op.drop_column('backfill_page_token')
+        batch_op.drop_column('backfill_query')
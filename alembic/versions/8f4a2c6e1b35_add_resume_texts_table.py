@@ -0,0 +1,34 @@
+"""add resume_texts table with extracted resume text
+
+Revision ID: 8f4a2c6e1b35
+Revises: 5d3b8e1f9a62
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f4a2c6e1b35'
+down_revision: Union[str, None] = '5d3b8e1f9a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Заполняется фоновыми задачами extract_resume_text при старте бота
+    op.create_table(
+        'resume_texts',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('extractor_version', sa.Integer(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('extracted_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('resume_texts')
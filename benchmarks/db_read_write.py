@@ -0,0 +1,119 @@
+"""
+Бенчмарк смешанной нагрузки на SQLite: WAL + один писатель против прежнего профиля
+
+Запуск из корня репозитория:
+    python -m benchmarks.db_read_write [--writers 4] [--writes 200] [--readers 8] [--reads 400]
+
+Настройки shared/database/database.py читаются при импорте, поэтому каждый профиль
+запускается в отдельном процессе со своими SQLITE_* переменными и своим файлом БД.
+Писатели вставляют отклики (со срабатыванием триггеров счетчиков вакансий), читатели
+считают отклики вакансии — как /stats и списки в боте.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = {
+    # Профиль по умолчанию: WAL, писатель с одним соединением, пул читателей
+    "wal_single_writer": {"SQLITE_JOURNAL_MODE": "WAL", "SQLITE_SYNCHRONOUS": "NORMAL", "SQLITE_SPLIT_WRITER": "true"},
+    # Как до перехода: журнал отката и общий пул на чтение и запись
+    "rollback_shared_pool": {"SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL", "SQLITE_SPLIT_WRITER": "false"},
+}
+
+
+async def run_workload(writers, writes, readers, reads):
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import func, select
+    from sqlalchemy.exc import OperationalError
+
+    from shared.database.database import AsyncSessionLocal, async_engine, async_read_engine, Base
+    import shared.models  # noqa: F401 — регистрирует все таблицы в Base.metadata
+    from shared.models.vacancy import Application, Vacancy
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        session.add(Vacancy(id=1, title="Бенчмарк"))
+        await session.commit()
+
+    errors = 0
+
+    async def writer(worker):
+        nonlocal errors
+        for i in range(writes):
+            try:
+                async with AsyncSessionLocal() as session:
+                    session.add(Application(name=f"Кандидат {worker}-{i}", vacancy_id=1, source="benchmark"))
+                    await session.commit()
+            except OperationalError:
+                errors += 1
+
+    async def reader():
+        nonlocal errors
+        for _ in range(reads):
+            try:
+                async with AsyncSessionLocal() as session:
+                    await session.scalar(
+                        select(func.count(Application.id)).where(Application.vacancy_id == 1)
+                    )
+            except OperationalError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(n) for n in range(writers)), *(reader() for _ in range(readers)))
+    elapsed = time.perf_counter() - started
+
+    async with AsyncSessionLocal() as session:
+        written = await session.scalar(select(func.count(Application.id)))
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+    return {"elapsed": elapsed, "written": written, "errors": errors}
+
+
+def run_profile(name, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, **PROFILES[name], DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.db_read_write", "--profile-worker",
+             "--writers", str(args.writers), "--writes", str(args.writes),
+             "--readers", str(args.readers), "--reads", str(args.reads)],
+            cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=200, help="вставок на писателя")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--reads", type=int, default=400, help="запросов на читателя")
+    parser.add_argument("--profile-worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile_worker:
+        result = asyncio.run(run_workload(args.writers, args.writes, args.readers, args.reads))
+        print(json.dumps(result))
+        return
+
+    print(f"✍️ {args.writers} писателей x {args.writes} вставок, 📖 {args.readers} читателей x {args.reads} запросов")
+    for name in PROFILES:
+        result = run_profile(name, args)
+        total = args.writers * args.writes + args.readers * args.reads
+        print(
+            f"{name:22} {result['elapsed']:6.2f}с, {total / result['elapsed']:7.0f} оп/с, "
+            f"записано {result['written']}, ошибок {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Бенчмарк извлечения текста резюме: iter_chunks/_join_chunks против прежней склейки через +=
+
+Запуск из корня репозитория:
+    python -m benchmarks.document_extractor [--repeat 3] [--max-chars 20000]
+
+PDF и DOCX на 1, 10 и 100 страниц (40 строк на страницу) генерируются во временной
+папке. Время — среднее на файл, память — пик tracemalloc за отдельный прогон.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import PyPDF2  # noqa: E402
+from docx import Document  # noqa: E402
+
+from shared.services.document_extractor import DocumentTextExtractor  # noqa: E402
+from tests.pdf_fixtures import page_lines, write_text_pdf  # noqa: E402
+
+PAGES = (1, 10, 100)
+
+
+def old_extract(file_path):
+    """Прежняя реализация: весь документ склеивается через +="""
+    text = ""
+    if file_path.endswith(".pdf"):
+        with open(file_path, "rb") as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page in pdf_reader.pages:
+                text += page.extract_text() + "\n"
+    else:
+        doc = Document(file_path)
+        for paragraph in doc.paragraphs:
+            text += paragraph.text + "\n"
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    text += cell.text + " "
+                text += "\n"
+    return text.strip()
+
+
+def write_docx(path, pages):
+    document = Document()
+    for page in range(pages):
+        for line in page_lines(page):
+            document.add_paragraph(line)
+    document.save(path)
+    return str(path)
+
+
+def measure(func, path, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func(path)
+    elapsed = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    func(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed * 1000, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="прогонов на файл для замера времени")
+    parser.add_argument("--max-chars", type=int, default=20000, help="бюджет символов, как EXTRACT_MAX_CHARS")
+    args = parser.parse_args()
+
+    variants = [
+        ("старый +=", old_extract),
+        ("новый, без бюджета", DocumentTextExtractor.extract_text_from_file),
+        (f"новый, {args.max_chars} симв.",
+         lambda path: DocumentTextExtractor.extract_text_from_file(path, max_chars=args.max_chars)),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'файл':12} " + " ".join(f"{name:>26}" for name, _ in variants))
+        for kind, writer in (("pdf", write_text_pdf), ("docx", write_docx)):
+            for pages in PAGES:
+                path = writer(os.path.join(tmp, f"cv{pages}.{kind}"), pages)
+                cells = []
+                results = []
+                for _, func in variants:
+                    result, elapsed_ms, peak_mb = measure(func, path, args.repeat)
+                    results.append(result)
+                    cells.append(f"{elapsed_ms:8.1f} мс {peak_mb:7.2f} МБ")
+                if results[0] != results[1]:
+                    sys.exit(f"❌ {kind} {pages} стр.: без бюджета текст отличается от прежнего")
+                print(f"{kind + ' ' + str(pages) + ' стр.':12} " + " ".join(f"{cell:>26}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Бенчмарк разбора писем SomonTj: однопроходный сканер против прежнего BeautifulSoup
+
+Запуск из корня репозитория:
+    python -m benchmarks.somon_extractor [--repeat 200]
+
+Тела писем берутся из tests/fixtures/somon, перед замером результаты обеих
+реализаций сверяются между собой.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bot.somon_extractor import extract_somon_emails  # noqa: E402
+from tests.somon_reference import extract_reference  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures", "somon")
+
+
+def load_bodies():
+    bodies = []
+    for name in sorted(os.listdir(FIXTURES)):
+        if name.endswith(".html"):
+            with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+                bodies.append(f.read())
+    return bodies
+
+
+def measure(func, bodies, repeat):
+    """Лучшее из трех время разбора одного письма, мкс"""
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func(bodies)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / (repeat * len(bodies)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="проходов по всем письмам в одном замере")
+    args = parser.parse_args()
+
+    bodies = load_bodies()
+    reference = [extract_reference(body) for body in bodies]
+    if extract_somon_emails(bodies) != reference:
+        sys.exit("❌ Результаты расходятся с прежней реализацией")
+
+    old = measure(lambda batch: [extract_reference(body) for body in batch], bodies, args.repeat)
+    new = measure(extract_somon_emails, bodies, args.repeat)
+
+    print(f"📨 Писем: {len(bodies)}, проходов: {args.repeat}")
+    print(f"BeautifulSoup:     {old:8.1f} мкс/письмо")
+    print(f"Однопроходный:     {new:8.1f} мкс/письмо")
+    print(f"Ускорение:         {old / new:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
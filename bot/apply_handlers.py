@@ -1,7 +1,6 @@
 """FSM-флоу приёма отклика от кандидата через бота (Task 5)."""
 import os
 import re
-from datetime import datetime
 
 from aiogram import Dispatcher, F, Bot
 from aiogram.filters import Command
@@ -19,13 +18,17 @@ from sqlalchemy import select
 
 from shared.database.database import AsyncSessionLocal
 from shared.models.vacancy import Vacancy, Application
-from shared.models.user import TelegramUser, RoleEnum
+from shared.models.user import TelegramUser
+from shared.services.resume_storage import ResumeStorage, StagedUpload
+from bot.jobs import enqueue, PRIORITY_LOW
+from bot.utils.cache import invalidate_stats
 
 
-BOT_RESUME_DIR = "downloads/bot"
 ALLOWED_RESUME_EXT = {".pdf", ".docx", ".doc"}
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
+resume_storage = ResumeStorage()
+
 
 class ApplyStates(StatesGroup):
     waiting_name = State()
@@ -148,6 +151,12 @@ async def show_vacancy_and_offer_apply(message: Message, vacancy_id: int) -> Non
     await message.answer(text, reply_markup=kb, parse_mode="HTML")
 
 
+async def _discard_upload(state: FSMContext) -> None:
+    """Удаляет неподтвержденный файл резюме из состояния FSM"""
+    data = await state.get_data()
+    resume_storage.discard_upload(data.get("file_path"))
+
+
 def setup_apply_handlers(dp: Dispatcher) -> None:
     """Регистрирует FSM-хендлеры приёма отклика."""
 
@@ -171,6 +180,7 @@ def setup_apply_handlers(dp: Dispatcher) -> None:
             await callback.answer("Вакансия недоступна", show_alert=True)
             return
 
+        await _discard_upload(state)
         await state.clear()
         await state.set_state(ApplyStates.waiting_name)
         await state.update_data(vacancy_id=vacancy.id, vacancy_title=vacancy.title)
@@ -186,11 +196,13 @@ def setup_apply_handlers(dp: Dispatcher) -> None:
     async def cancel_cmd(message: Message, state: FSMContext):
         current = await state.get_state()
         if current and current.startswith("ApplyStates"):
+            await _discard_upload(state)
             await state.clear()
             await message.answer("❌ Отклик отменён.", reply_markup=ReplyKeyboardRemove())
 
     @dp.callback_query(ApplyCallback.filter(F.action == "cancel"))
     async def apply_cancel(callback: CallbackQuery, state: FSMContext):
+        await _discard_upload(state)
         await state.clear()
         await callback.message.answer("❌ Отклик отменён.")
         await callback.answer()
@@ -283,22 +295,26 @@ def setup_apply_handlers(dp: Dispatcher) -> None:
             await message.answer("Файл слишком большой (>20 МБ). Пришлите другой.")
             return
 
-        data = await state.get_data()
-        vacancy_id = data.get("vacancy_id", 0)
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_name = re.sub(r"[^\w.\-]+", "_", filename)
-        target_dir = os.path.join(BOT_RESUME_DIR, str(vacancy_id))
-        os.makedirs(target_dir, exist_ok=True)
-        target_path = os.path.join(target_dir, f"{ts}_{safe_name}")
-
+        # Файл пишется потоково, с подсчетом SHA-256 на лету, во временную папку:
+        # в хранилище он попадет только при подтверждении отклика
         try:
             file = await bot.get_file(doc.file_id)
-            await bot.download_file(file.file_path, destination=target_path)
+            with resume_storage.open_upload(filename) as writer:
+                await bot.download_file(file.file_path, destination=writer, seek=False)
+                upload = writer.stage()
         except Exception as e:
             await message.answer(f"Не удалось сохранить файл: {e}. Попробуйте ещё раз или пропустите.")
             return
 
-        await state.update_data(file_path=target_path, attachment_filename=filename)
+        # Повторная загрузка заменяет предыдущий файл
+        await _discard_upload(state)
+        await state.update_data(
+            file_path=upload.path,
+            file_sha256=upload.sha256,
+            file_size=upload.size,
+            file_extension=upload.extension,
+            attachment_filename=filename,
+        )
         await _goto_confirm_step(message, state)
 
     @dp.message(ApplyStates.waiting_resume, F.text)
@@ -310,7 +326,10 @@ def setup_apply_handlers(dp: Dispatcher) -> None:
 
     @dp.callback_query(ApplyStates.waiting_resume, ApplyCallback.filter(F.action == "skip"))
     async def apply_resume_skip(callback: CallbackQuery, state: FSMContext):
-        await state.update_data(file_path=None, attachment_filename=None)
+        await _discard_upload(state)
+        await state.update_data(
+            file_path=None, file_sha256=None, file_size=None, file_extension=None, attachment_filename=None
+        )
         await _goto_confirm_step(callback.message, state)
         await callback.answer()
 
@@ -338,17 +357,40 @@ def setup_apply_handlers(dp: Dispatcher) -> None:
         vacancy_id = data.get("vacancy_id")
         vacancy = await _get_open_vacancy(vacancy_id) if vacancy_id else None
         if not vacancy:
+            await _discard_upload(state)
             await state.clear()
             await callback.message.answer("❌ Вакансия больше недоступна, отклик не отправлен.")
             await callback.answer()
             return
 
         async with AsyncSessionLocal() as session:
+            file_path = None
+            if data.get("file_sha256"):
+                upload = StagedUpload(
+                    data["file_sha256"], data["file_path"], data.get("file_size") or 0, data.get("file_extension") or ""
+                )
+                try:
+                    file_path = await resume_storage.acquire_upload(session, upload)
+                except FileNotFoundError:
+                    # Загрузку уже убрали (повторное нажатие или перезапуск бота)
+                    await session.rollback()
+                    await state.update_data(
+                        file_path=None, file_sha256=None, file_size=None, file_extension=None, attachment_filename=None
+                    )
+                    await state.set_state(ApplyStates.waiting_resume)
+                    await callback.message.answer(
+                        "Файл резюме не найден. Прикрепите его ещё раз или нажмите «Пропустить».",
+                        reply_markup=_skip_kb("skip"),
+                    )
+                    await callback.answer()
+                    return
+
             app = Application(
                 name=data.get("name", ""),
                 email=data.get("email"),
                 phone=data.get("phone"),
-                file_path=data.get("file_path"),
+                file_path=file_path,
+                file_sha256=data.get("file_sha256"),
                 attachment_filename=data.get("attachment_filename"),
                 gmail_message_id=None,
                 applicant_message=data.get("applicant_message"),
@@ -358,10 +400,22 @@ def setup_apply_handlers(dp: Dispatcher) -> None:
                 telegram_user_id=user.telegram_id if user else None,
             )
             session.add(app)
-            await session.commit()
+            try:
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                # Файл уже перенесен в хранилище, а ссылка на него не записалась
+                await resume_storage.purge(file_path)
+                raise
             await session.refresh(app)
+            invalidate_stats()
             application_id = app.id
 
+        # Текст резюме извлекается в фоне, чтобы анализ и вопросы не разбирали файл
+        if data.get("file_sha256"):
+            from bot.job_handlers import enqueue_resume_text
+            await enqueue_resume_text(data["file_sha256"], file_path)
+
         await state.clear()
         await callback.message.answer(
             "✅ Отклик отправлен! HR-команда свяжется с вами."
@@ -374,28 +428,18 @@ def setup_apply_handlers(dp: Dispatcher) -> None:
             pass
 
     async def _notify_staff(bot: Bot, vacancy: Vacancy, data: dict, application_id: int):
-        async with AsyncSessionLocal() as session:
-            stmt = select(TelegramUser).where(
-                TelegramUser.role.in_([RoleEnum.MODERATOR, RoleEnum.ADMIN])
-            )
-            result = await session.execute(stmt)
-            staff = result.scalars().all()
-
-        text = (
-            "🆕 <b>Новый отклик через бота</b>\n\n"
-            f"📢 Вакансия: <b>{vacancy.title}</b>\n"
-            f"👤 {data.get('name', '—')}\n"
-            f"📱 {data.get('phone', '—')}\n"
-            f"📧 {data.get('email', '—')}\n"
+        # Рассылка сотрудникам идет через очередь задач и переживает перезапуск бота
+        await enqueue(
+            "notify_staff",
+            {
+                "application_id": application_id,
+                "vacancy_title": vacancy.title,
+                "name": data.get("name", "—"),
+                "phone": data.get("phone", "—"),
+                "email": data.get("email", "—"),
+                "applicant_message": data.get("applicant_message"),
+                "attachment_filename": data.get("attachment_filename"),
+            },
+            priority=PRIORITY_LOW,
+            idempotency_key=f"notify_staff:{application_id}",
         )
-        if data.get("applicant_message"):
-            text += f"📝 {data['applicant_message'][:300]}\n"
-        if data.get("attachment_filename"):
-            text += f"📎 {data['attachment_filename']}\n"
-        text += f"\nID отклика: <code>{application_id}</code>"
-
-        for member in staff:
-            try:
-                await bot.send_message(member.telegram_id, text, parse_mode="HTML")
-            except Exception:
-                continue
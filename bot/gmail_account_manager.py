@@ -3,10 +3,10 @@
 """
 import os
 import json
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
+import asyncio
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+
+from bot.gmail_client import AsyncGmailClient
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
 CREDENTIALS_PATH = 'gmail_tokens/credentials.json'
@@ -81,13 +81,13 @@ class GmailAccountManager:
                 redirect_uri='http://localhost'
             )
 
-            # Получаем токен используя код
-            flow.fetch_token(code=auth_code)
+            # Получаем токен используя код (синхронный HTTP — в отдельном потоке)
+            await asyncio.to_thread(flow.fetch_token, code=auth_code)
             creds = flow.credentials
 
             # Получаем email адрес
-            service = build('gmail', 'v1', credentials=creds)
-            profile = service.users().getProfile(userId='me').execute()
+            async with AsyncGmailClient(creds) as client:
+                profile = await client.get_profile()
             email = profile.get('emailAddress')
 
             if not email:
@@ -0,0 +1,315 @@
+"""
+Асинхронный клиент Gmail REST API поверх aiohttp
+
+Использует те же OAuth Credentials, что и GmailParser, но не блокирует event loop:
+общий пул соединений с keep-alive, параллельные запросы и batch endpoint Gmail.
+"""
+import asyncio
+import base64
+import json
+import os
+import re
+import uuid
+from email.parser import BytesParser
+from urllib.parse import quote, urlencode
+
+import aiohttp
+from google.auth.transport.requests import Request
+
+GMAIL_API_URL = "https://gmail.googleapis.com"
+GMAIL_USER_PATH = "/gmail/v1/users/me"
+GMAIL_BATCH_PATH = "/batch/gmail/v1"
+
+# Максимум одновременных соединений с Gmail API на один аккаунт
+GMAIL_MAX_CONNECTIONS = int(os.getenv("GMAIL_MAX_CONNECTIONS", "10"))
+GMAIL_REQUEST_TIMEOUT = int(os.getenv("GMAIL_REQUEST_TIMEOUT", "60"))
+# Размер куска при потоковой загрузке вложений
+GMAIL_DOWNLOAD_CHUNK_BYTES = 256 * 1024
+
+
+class GmailApiError(Exception):
+    """Ошибка ответа Gmail API с HTTP статусом"""
+
+    def __init__(self, status, message=""):
+        super().__init__(f"Gmail API {status}: {message}")
+        self.status = status
+
+
+class _Base64FieldDecoder:
+    """
+    Потоково достает и декодирует base64url поле из JSON ответа
+
+    Ответ attachments.get — {"size": ..., "data": "<base64url>"}. Значение data не
+    содержит кавычек и escape-последовательностей, поэтому его можно декодировать
+    по мере чтения, не собирая весь ответ в памяти.
+    """
+
+    _FIELD_START = re.compile(rb'"data"\s*:\s*"')
+
+    def __init__(self):
+        self._head = b""
+        self._pending = b""
+        self._state = "seek"
+
+    def feed(self, chunk):
+        """Возвращает декодированные байты, готовые к записи"""
+        if self._state == "seek":
+            self._head += chunk
+            match = self._FIELD_START.search(self._head)
+            if not match:
+                return b""
+            chunk = self._head[match.end():]
+            self._head = b""
+            self._state = "value"
+
+        if self._state != "value":
+            return b""
+
+        end = chunk.find(b'"')
+        if end != -1:
+            chunk = chunk[:end]
+            self._state = "done"
+        self._pending += chunk
+        # Декодируем только целые группы по 4 символа, хвост ждет следующего куска
+        cut = len(self._pending) - len(self._pending) % 4
+        data, self._pending = self._pending[:cut], self._pending[cut:]
+        return base64.urlsafe_b64decode(data)
+
+    def close(self):
+        """Декодирует остаток; Gmail может отдавать base64url без выравнивания"""
+        if self._state != "done":
+            raise GmailApiError(500, "В ответе нет поля data")
+        data, self._pending = self._pending, b""
+        return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+class AsyncGmailClient:
+    """Асинхронный клиент Gmail API для одного аккаунта"""
+
+    def __init__(self, credentials, max_connections=GMAIL_MAX_CONNECTIONS, refresh=None):
+        """
+        Args:
+            credentials: OAuth Credentials аккаунта
+            max_connections: Максимум одновременных соединений
+            refresh: Синхронная функция обновления токена (вызывается в потоке);
+                по умолчанию credentials.refresh без сохранения
+        """
+        self.credentials = credentials
+        self.max_connections = max_connections
+        self._refresh = refresh or (lambda: self.credentials.refresh(Request()))
+        self._session = None
+        self._refresh_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Закрывает пул соединений"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                base_url=GMAIL_API_URL,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=GMAIL_REQUEST_TIMEOUT),
+            )
+        return self._session
+
+    async def _auth_headers(self, force_refresh=False):
+        """Заголовок авторизации; истекший токен обновляется в отдельном потоке"""
+        async with self._refresh_lock:
+            if force_refresh or not self.credentials.valid:
+                await asyncio.to_thread(self._refresh)
+        return {"Authorization": f"Bearer {self.credentials.token}"}
+
+    @staticmethod
+    def _query(params):
+        """Параметры запроса без None; списки разворачиваются в повторяющиеся ключи"""
+        items = []
+        for key, value in (params or {}).items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                items.extend((key, str(v)) for v in value)
+            else:
+                items.append((key, str(value)))
+        return items
+
+    async def request(self, method, path, params=None):
+        """
+        Выполняет запрос к Gmail API
+
+        Args:
+            method: HTTP метод
+            path: Путь относительно /gmail/v1/users/me
+            params: Параметры запроса
+
+        Returns:
+            Разобранный JSON ответа
+        """
+        session = self._get_session()
+        headers = await self._auth_headers()
+
+        for attempt in range(2):
+            async with session.request(
+                method, f"{GMAIL_USER_PATH}{path}", params=self._query(params), headers=headers
+            ) as response:
+                # Токен могли отозвать/обновить между запросами — одна повторная попытка
+                if response.status == 401 and attempt == 0:
+                    headers = await self._auth_headers(force_refresh=True)
+                    continue
+
+                text = await response.text()
+                if response.status >= 400:
+                    raise GmailApiError(response.status, text[:500])
+                return json.loads(text) if text else {}
+
+    async def batch(self, requests):
+        """
+        Отправляет GET-запросы одним multipart-запросом на batch endpoint Gmail
+
+        Args:
+            requests: {request_id: (path, params)}, path относительно /gmail/v1/users/me
+
+        Returns:
+            {request_id: (response, error)}
+        """
+        boundary = f"batch_{uuid.uuid4().hex}"
+        content_ids = {}
+        parts = []
+        for request_id, (path, params) in requests.items():
+            content_id = f"item-{quote(request_id, safe='')}"
+            content_ids[content_id] = request_id
+            query = urlencode(self._query(params))
+            url = f"{GMAIL_USER_PATH}{path}" + (f"?{query}" if query else "")
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <{content_id}>\r\n\r\n"
+                f"GET {url} HTTP/1.1\r\n\r\n"
+            )
+        body = "".join(parts) + f"--{boundary}--\r\n"
+
+        session = self._get_session()
+        headers = await self._auth_headers()
+        headers["Content-Type"] = f"multipart/mixed; boundary={boundary}"
+
+        async with session.post(GMAIL_BATCH_PATH, data=body.encode("utf-8"), headers=headers) as response:
+            content = await response.read()
+            if response.status >= 400:
+                raise GmailApiError(response.status, content[:500].decode("utf-8", "replace"))
+            content_type = response.headers.get("Content-Type", "")
+
+        results = self._parse_batch_response(content_type, content, content_ids)
+        for request_id in requests:
+            results.setdefault(request_id, (None, GmailApiError(500, "Нет ответа в batch")))
+        return results
+
+    @staticmethod
+    def _parse_batch_response(content_type, content, content_ids):
+        """Разбирает multipart/mixed ответ batch endpoint"""
+        message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + content)
+        results = {}
+        if not message.is_multipart():
+            return results
+
+        for part in message.get_payload():
+            content_id = part.get("Content-ID", "").strip("<> ")
+            if content_id.startswith("response-"):
+                content_id = content_id[len("response-"):]
+            request_id = content_ids.get(content_id)
+            if request_id is None:
+                continue
+
+            payload = part.get_payload(decode=True) or b""
+            head, _, raw_body = payload.replace(b"\r\n", b"\n").partition(b"\n\n")
+            status_line = head.split(b"\n", 1)[0].decode("utf-8", "replace")
+            try:
+                status = int(status_line.split()[1])
+            except (IndexError, ValueError):
+                status = 500
+
+            text = raw_body.decode("utf-8", "replace")
+            if status >= 400:
+                results[request_id] = (None, GmailApiError(status, text[:500]))
+            else:
+                results[request_id] = (json.loads(text) if text.strip() else {}, None)
+        return results
+
+    async def get_profile(self):
+        return await self.request("GET", "/profile")
+
+    async def list_history(self, start_history_id, page_token=None, history_types=None):
+        return await self.request("GET", "/history", {
+            "startHistoryId": start_history_id,
+            "historyTypes": history_types,
+            "pageToken": page_token,
+        })
+
+    async def list_messages(self, query, page_token=None, max_results=None):
+        return await self.request("GET", "/messages", {
+            "q": query,
+            "pageToken": page_token,
+            "maxResults": max_results,
+        })
+
+    @staticmethod
+    def message_request(message_id, format="full", metadata_headers=None):
+        """(path, params) для messages.get — для request() и batch()"""
+        return f"/messages/{quote(message_id, safe='')}", {
+            "format": format,
+            "metadataHeaders": metadata_headers,
+        }
+
+    @staticmethod
+    def attachment_request(message_id, attachment_id):
+        """(path, params) для messages.attachments.get — для request() и batch()"""
+        return f"/messages/{quote(message_id, safe='')}/attachments/{quote(attachment_id, safe='')}", None
+
+    async def get_message(self, message_id, format="full", metadata_headers=None):
+        path, params = self.message_request(message_id, format, metadata_headers)
+        return await self.request("GET", path, params)
+
+    async def get_attachment(self, message_id, attachment_id):
+        path, params = self.attachment_request(message_id, attachment_id)
+        return await self.request("GET", path, params)
+
+    async def download_attachment(self, message_id, attachment_id, write):
+        """
+        Потоково скачивает вложение, не держа его целиком в памяти
+
+        Args:
+            message_id: ID письма
+            attachment_id: ID вложения
+            write: async функция, получающая декодированные куски файла по порядку
+        """
+        path, params = self.attachment_request(message_id, attachment_id)
+        session = self._get_session()
+        headers = await self._auth_headers()
+
+        for attempt in range(2):
+            async with session.get(f"{GMAIL_USER_PATH}{path}", headers=headers) as response:
+                if response.status == 401 and attempt == 0:
+                    headers = await self._auth_headers(force_refresh=True)
+                    continue
+
+                if response.status >= 400:
+                    text = await response.text()
+                    raise GmailApiError(response.status, text[:500])
+
+                decoder = _Base64FieldDecoder()
+                async for chunk in response.content.iter_chunked(GMAIL_DOWNLOAD_CHUNK_BYTES):
+                    data = decoder.feed(chunk)
+                    if data:
+                        await write(data)
+                data = decoder.close()
+                if data:
+                    await write(data)
+                return
@@ -1,63 +1,150 @@
 import os
 import re
-import aiofiles
+import asyncio
 import base64
-from datetime import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import aclosing
+from datetime import datetime, timedelta
+import aiohttp
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
-from bs4 import BeautifulSoup
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from bot.gmail_client import AsyncGmailClient, GmailApiError
+from bot.ingestion_pipeline import Pipeline, Stage
+from bot.somon_extractor import extract_somon_emails
+from bot.utils.cache import invalidate_stats
 from shared.database.database import AsyncSessionLocal
 from shared.models.vacancy import Application, Vacancy
+from shared.models.gmail_account import GmailAccount
 from shared.services.resume_summary_service import ResumeSummaryService
+from shared.services.resume_storage import ResumeStorage
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
 
+# Фильтруем письма от SomonTj с нужным заголовком (включая прочитанные)
+SOMON_QUERY = 'from:noreply@somon.tj subject:"Отклик на вакансию"'
+
+# Если historyId устарел, перечитываем письма не дальше чем за это окно
+GMAIL_FALLBACK_MAX_DAYS = int(os.getenv("GMAIL_FALLBACK_MAX_DAYS", "7"))
+# Запас по времени для окна after:, чтобы не потерять письма на границе
+GMAIL_FALLBACK_OVERLAP = timedelta(hours=1)
+
+# Размер страницы messages.list и бюджет страниц на один цикл проверки
+GMAIL_PAGE_SIZE = int(os.getenv("GMAIL_PAGE_SIZE", "100"))
+GMAIL_MAX_PAGES = int(os.getenv("GMAIL_MAX_PAGES", "10"))
+
+# Сколько запросов messages.get отправлять одним batch (Gmail допускает до 100)
+GMAIL_BATCH_SIZE = int(os.getenv("GMAIL_BATCH_SIZE", "50"))
+GMAIL_BATCH_RETRIES = 3
+GMAIL_RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Заголовки, которых достаточно для отбора писем до загрузки полного тела
+METADATA_HEADERS = ['From', 'Subject', 'Date']
+
+# Конвейер обработки: воркеров на стадию и размер очередей между стадиями
+GMAIL_FETCH_WORKERS = int(os.getenv("GMAIL_FETCH_WORKERS", "2"))
+GMAIL_PARSE_WORKERS = int(os.getenv("GMAIL_PARSE_WORKERS", "2"))
+GMAIL_DOWNLOAD_WORKERS = int(os.getenv("GMAIL_DOWNLOAD_WORKERS", "2"))
+GMAIL_PERSIST_WORKERS = int(os.getenv("GMAIL_PERSIST_WORKERS", "1"))
+GMAIL_PIPELINE_QUEUE_SIZE = int(os.getenv("GMAIL_PIPELINE_QUEUE_SIZE", "100"))
+
+# Пул процессов для разбора HTML при больших выгрузках (0 — разбор в потоке)
+GMAIL_PARSE_PROCESSES = int(os.getenv("GMAIL_PARSE_PROCESSES", "0"))
+# Пачки меньше этого размера разбираются в потоке — пересылка в процесс дороже разбора
+GMAIL_PARSE_POOL_MIN_BATCH = int(os.getenv("GMAIL_PARSE_POOL_MIN_BATCH", "20"))
+
+# Размер пачки ID для проверки дубликатов одним запросом (лимит параметров SQLite)
+DEDUPE_CHUNK_SIZE = 500
+
+_parse_pool = None
+
+
+def get_parse_pool():
+    """Общий для всех аккаунтов пул процессов разбора HTML; None если выключен"""
+    global _parse_pool
+    if GMAIL_PARSE_PROCESSES <= 0:
+        return None
+    if _parse_pool is None:
+        # spawn: fork процесса с event loop и потоками небезопасен
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=GMAIL_PARSE_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _parse_pool
+
+
+def shutdown_parse_pool():
+    """Останавливает пул процессов разбора"""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+
 class GmailParser:
     def __init__(self, account_id="main", credentials_path="gmail_tokens/credentials.json", token_path="gmail_tokens/token_main.json"):
         self.account_id = account_id
         self.credentials_path = credentials_path
         self.token_path = token_path
-        self.service = None
+        self.client = None
         self.resume_summary_service = ResumeSummaryService()
+        self.resume_storage = ResumeStorage()
         self.authenticate()
 
     def authenticate(self):
+        """
+        Загружает токен аккаунта и создает клиент Gmail API
+
+        Истекший токен здесь не обновляется: это сетевой запрос, а конструктор
+        вызывается из event loop. Клиент обновит токен сам в отдельном потоке
+        перед первым запросом (см. _refresh_token).
+        """
         creds = None
         if os.path.exists(self.token_path):
             creds = Credentials.from_authorized_user_file(self.token_path, SCOPES)
 
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                try:
-                    creds.refresh(Request())
-                except Exception as e:
-                    error_str = str(e)
-                    # Проверяем, является ли ошибка invalid_grant (токен отозван/истек)
-                    if 'invalid_grant' in error_str.lower() or 'revoked' in error_str.lower():
-                        raise Exception(
-                            f"Токен для аккаунта '{self.account_id}' истек или был отозван. "
-                            "Пожалуйста, переавторизуйте аккаунт через команду /add_gmail"
-                        )
-                    # Если другая ошибка, пробрасываем её дальше
-                    raise
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_path, SCOPES)
-                creds = flow.run_local_server(port=0)
-
-            with open(self.token_path, 'w') as token:
-                token.write(creds.to_json())
-
-        self.service = build('gmail', 'v1', credentials=creds)
+        if not creds or (not creds.valid and not creds.refresh_token):
+            flow = InstalledAppFlow.from_client_secrets_file(
+                self.credentials_path, SCOPES)
+            creds = flow.run_local_server(port=0)
+            self._save_token(creds)
+
+        self.client = AsyncGmailClient(creds, refresh=lambda: self._refresh_token(creds))
         print(f"✅ Аутентификация выполнена для аккаунта: {self.account_id}")
 
+    def _refresh_token(self, creds):
+        """Обновляет токен и сохраняет его в файл; выполняется в потоке клиента"""
+        try:
+            creds.refresh(Request())
+        except Exception as e:
+            error_str = str(e)
+            # Проверяем, является ли ошибка invalid_grant (токен отозван/истек)
+            if 'invalid_grant' in error_str.lower() or 'revoked' in error_str.lower():
+                raise Exception(
+                    f"Токен для аккаунта '{self.account_id}' истек или был отозван. "
+                    "Пожалуйста, переавторизуйте аккаунт через команду /add_gmail"
+                ) from e
+            # Если другая ошибка, пробрасываем её дальше
+            raise
+        self._save_token(creds)
+
+    def _save_token(self, creds):
+        with open(self.token_path, 'w') as token:
+            token.write(creds.to_json())
+
+    async def close(self):
+        """Закрывает соединения с Gmail API"""
+        if self.client:
+            await self.client.close()
+
     def extract_contact_info(self, text):
         email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
         phone_pattern = r'(\+?[7-8][\s\-]?\(?[0-9]{3}\)?[\s\-]?[0-9]{3}[\s\-]?[0-9]{2}[\s\-]?[0-9]{2})'
@@ -70,198 +157,700 @@ class GmailParser:
             'phone': phones[0] if phones else None
         }
 
-    async def download_attachment(self, message_id, attachment_id, filename, applicant_name="Unknown"):
-        try:
-            attachment = self.service.users().messages().attachments().get(
-                userId='me', messageId=message_id, id=attachment_id
-            ).execute()
-
-            file_data = base64.urlsafe_b64decode(attachment['data'])
+    async def download_attachment(self, message_id, attachment_id, filename):
+        """
+        Скачивает вложение потоково в хранилище резюме по SHA-256
 
-            # Очищаем имя от недопустимых символов для имени файла
-            safe_name = "".join(c for c in applicant_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            safe_name = safe_name.replace(' ', '_')
+        Временные ошибки (429/5xx/сеть) повторяются с экспоненциальной задержкой.
 
-            file_path = f"downloads/{safe_name}_{filename}"
-
-            async with aiofiles.open(file_path, 'wb') as f:
-                await f.write(file_data)
-
-            return file_path
+        Returns:
+            StoredBlob или None при ошибке
+        """
+        attempt = 0
+        while True:
+            try:
+                return await self._stream_attachment(message_id, attachment_id, filename)
+            except Exception as e:
+                if attempt < GMAIL_BATCH_RETRIES and self._is_retryable_error(e):
+                    attempt += 1
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+                print(f"Ошибка загрузки вложения: {e}")
+                return None
+
+    async def _stream_attachment(self, message_id, attachment_id, filename):
+        writer = self.resume_storage.open_writer(filename)
+        try:
+            await self.client.download_attachment(
+                message_id, attachment_id, lambda data: asyncio.to_thread(writer.write, data)
+            )
+            return await asyncio.to_thread(writer.finalize)
+        except BaseException:
+            writer.abort()
+            raise
+
+    @staticmethod
+    def _is_retryable_error(error):
+        """Ошибки, при которых имеет смысл повторить запрос: троттлинг, 5xx и сетевые сбои"""
+        if isinstance(error, GmailApiError):
+            return error.status in GMAIL_RETRYABLE_STATUSES
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    async def _execute_batch(self, requests):
+        """
+        Отправляет запросы одним multipart-запросом на batch endpoint Gmail
+
+        Returns:
+            {request_id: (response, error)}
+        """
+        try:
+            return await self.client.batch(requests)
         except Exception as e:
-            print(f"Ошибка загрузки вложения: {e}")
-            return None
+            # Упал весь batch целиком (сеть, авторизация) — ошибка у каждого запроса
+            return {request_id: (None, e) for request_id in requests}
+
+    async def _run_batch_chunk(self, chunk, results_queue):
+        """Выполняет одну пачку запросов, повторяя только упавшие с временной ошибкой"""
+        attempt = 0
+        while chunk:
+            results = await self._execute_batch(chunk)
+            retry = {}
+            for request_id, request in chunk.items():
+                response, error = results[request_id]
+                if error is not None and attempt < GMAIL_BATCH_RETRIES and self._is_retryable_error(error):
+                    retry[request_id] = request
+                else:
+                    await results_queue.put((request_id, response, error))
+
+            chunk = retry
+            if chunk:
+                attempt += 1
+                await asyncio.sleep(2 ** attempt)
+
+    async def iter_batch(self, requests, batch_size=None):
+        """
+        Выполняет запросы пачками через batch endpoint и отдает результаты по мере готовности
+
+        Пачки отправляются параллельно (в пределах пула соединений клиента). Повторно
+        отправляются только упавшие запросы с временной ошибкой (429/5xx/сеть),
+        с экспоненциальной задержкой и не более GMAIL_BATCH_RETRIES раз.
+
+        Args:
+            requests: {request_id: (path, params)} — см. AsyncGmailClient.message_request
+            batch_size: Запросов в одном batch (по умолчанию GMAIL_BATCH_SIZE, максимум 100)
+
+        Yields:
+            (request_id, response, error) — response равен None при ошибке
+        """
+        batch_size = min(batch_size or GMAIL_BATCH_SIZE, 100)
+        items = list(requests.items())
+        if not items:
+            return
+
+        results_queue = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(self._run_batch_chunk(dict(items[start:start + batch_size]), results_queue))
+            for start in range(0, len(items), batch_size)
+        ]
+        try:
+            for _ in range(len(items)):
+                yield await results_queue.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _load_sync_state(self):
+        """Возвращает состояние синхронизации аккаунта из БД"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(
+                    GmailAccount.last_history_id,
+                    GmailAccount.last_synced_at,
+                    GmailAccount.backfill_query,
+                    GmailAccount.backfill_page_token,
+                ).where(GmailAccount.account_id == self.account_id)
+            )
+            row = result.one_or_none()
+
+        if not row:
+            return {
+                "last_history_id": None,
+                "last_synced_at": None,
+                "backfill_query": None,
+                "backfill_page_token": None,
+            }
+        return dict(row._mapping)
+
+    async def _save_sync_state(self, **values):
+        """Сохраняет чекпоинт синхронизации аккаунта"""
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(GmailAccount)
+                .where(GmailAccount.account_id == self.account_id)
+                .values(**values)
+            )
+            await session.commit()
+
+    def _build_window_query(self, last_synced_at):
+        """Запрос за ограниченное окно времени (after:) для восстановления после устаревшего historyId"""
+        earliest = datetime.now() - timedelta(days=GMAIL_FALLBACK_MAX_DAYS)
+        since = earliest
+        if last_synced_at:
+            since = max(last_synced_at.replace(tzinfo=None) - GMAIL_FALLBACK_OVERLAP, earliest)
+        return f"{SOMON_QUERY} after:{int(since.timestamp())}"
+
+    async def _get_current_history_id(self):
+        """Текущий historyId почтового ящика"""
+        profile = await self.client.get_profile()
+        return profile.get('historyId')
+
+    async def _list_history_message_ids(self, start_history_id):
+        """
+        Возвращает письма, добавленные после чекпоинта, через users.history.list
+
+        Returns:
+            (message_ids, latest_history_id)
+        """
+        message_ids = []
+        seen = set()
+        latest_history_id = start_history_id
+        page_token = None
+
+        while True:
+            response = await self.client.list_history(
+                start_history_id, page_token=page_token, history_types=['messageAdded']
+            )
+
+            for record in response.get('history', []):
+                for added in record.get('messagesAdded', []):
+                    message = added.get('message', {})
+                    message_id = message.get('id')
+                    # Черновики и отправленные нас не интересуют
+                    labels = message.get('labelIds', [])
+                    if not message_id or 'DRAFT' in labels or 'SENT' in labels:
+                        continue
+                    if message_id not in seen:
+                        seen.add(message_id)
+                        message_ids.append(message_id)
+
+            latest_history_id = response.get('historyId', latest_history_id)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        return message_ids, latest_history_id
+
+    async def iter_message_pages(self, query, page_token=None, page_size=None, max_pages=None):
+        """
+        Async-генератор постраничного листинга messages.list
+
+        Следующая страница запрашивается заранее, пока вызывающий код обрабатывает текущую.
+
+        Args:
+            query: Поисковый запрос Gmail
+            page_token: Токен страницы, с которой продолжить листинг
+            page_size: Размер страницы (по умолчанию GMAIL_PAGE_SIZE)
+            max_pages: Максимум страниц за вызов (по умолчанию GMAIL_MAX_PAGES)
+
+        Yields:
+            (message_ids, next_page_token) — next_page_token равен None на последней странице
+        """
+        page_size = page_size or GMAIL_PAGE_SIZE
+        max_pages = max_pages or GMAIL_MAX_PAGES
+
+        def fetch(token):
+            return asyncio.create_task(
+                self.client.list_messages(query, page_token=token, max_results=page_size)
+            )
+
+        pending = fetch(page_token)
+        pages = 0
+        try:
+            while pending:
+                response = await pending
+                pending = None
+                pages += 1
+
+                next_page_token = response.get('nextPageToken')
+                if next_page_token and pages < max_pages:
+                    pending = fetch(next_page_token)
+
+                yield [message['id'] for message in response.get('messages', [])], next_page_token
+        finally:
+            if pending:
+                pending.cancel()
+
+    async def _dedupe_page(self, message_ids, summary):
+        """Отсекает уже известные письма страницы и обновляет счетчики дедупликации"""
+        unseen_ids = await self._filter_unseen_message_ids(message_ids)
+        summary["listed"] += len(message_ids)
+        summary["already_known"] += len(message_ids) - len(unseen_ids)
+        summary["new"] += len(unseen_ids)
+        return unseen_ids
+
+    async def _extract_many(self, bodies):
+        """
+        Разбирает тела писем в пуле процессов или, для маленьких пачек, в потоке
+
+        Returns:
+            Список результатов extract_somon_email в том же порядке
+        """
+        pool = get_parse_pool()
+        if pool is None or len(bodies) < GMAIL_PARSE_POOL_MIN_BATCH:
+            return await asyncio.to_thread(extract_somon_emails, bodies)
+
+        # Делим пачку поровну между процессами
+        chunk_size = -(-len(bodies) // GMAIL_PARSE_PROCESSES)
+        loop = asyncio.get_running_loop()
+        try:
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(pool, extract_somon_emails, bodies[start:start + chunk_size])
+                for start in range(0, len(bodies), chunk_size)
+            ))
+        except BrokenProcessPool as e:
+            print(f"⚠️ Пул процессов разбора недоступен, разбираем в потоке: {e}")
+            shutdown_parse_pool()
+            return await asyncio.to_thread(extract_somon_emails, bodies)
+
+        return [result for chunk in chunks for result in chunk]
+
+    def _build_pipeline(self, summary):
+        """
+        Конвейер заголовки → письмо → разбор → вложение → сохранение для писем этого аккаунта
+
+        На вход подаются страницы {"page": ..., "ids": [...]}. Письмо, которое нужно
+        повторить, помечает свою страницу как failed — в том числе когда обработчик
+        стадии упал с исключением (см. stage_failed).
+        """
+        def stage_failed(item, error):
+            # Чекпоинт не должен уйти дальше писем, которые так и не обработались
+            item["page"]["failed"] = True
+
+        async def metadata(item, emit):
+            # Сначала только заголовки: полное письмо качаем лишь для откликов SomonTj
+            requests = {
+                message_id: AsyncGmailClient.message_request(
+                    message_id, format='metadata', metadata_headers=METADATA_HEADERS
+                )
+                for message_id in item["ids"]
+            }
+            passed = {}
+            async with aclosing(self.iter_batch(requests)) as results:
+                async for message_id, message, error in results:
+                    if error is not None:
+                        print(f"Ошибка получения заголовков письма {message_id}: {error}")
+                        item["page"]["failed"] = True
+                        continue
+                    meta = self._check_headers(message)
+                    if meta:
+                        passed[message_id] = meta
+
+            if passed:
+                await emit({"page": item["page"], "meta": passed})
+
+        async def fetch(item, emit):
+            requests = {
+                message_id: AsyncGmailClient.message_request(message_id, format='full')
+                for message_id in item["meta"]
+            }
+            async with aclosing(self.iter_batch(requests)) as results:
+                async for message_id, message, error in results:
+                    if error is not None:
+                        print(f"Ошибка получения письма {message_id}: {error}")
+                        item["page"]["failed"] = True
+                        continue
+                    await emit({
+                        "page": item["page"],
+                        "message_id": message_id,
+                        "message": message,
+                        "meta": item["meta"][message_id],
+                    })
+
+        async def parse(items, emit):
+            # Разбор HTML нагружает CPU — не блокируем event loop
+            bodies = await asyncio.to_thread(
+                lambda: [self.extract_body(item["message"]['payload']) for item in items]
+            )
+            contacts = await self._extract_many(bodies)
+
+            for item, body, contact_info in zip(items, bodies, contacts):
+                try:
+                    draft = self._prepare_application(
+                        item["message_id"], item["message"], item["meta"], body, contact_info
+                    )
+                except Exception as e:
+                    # Ошибка разбора не исправится повтором — не держим из-за нее чекпоинт
+                    print(f"Ошибка обработки сообщения {item['message_id']}: {e}")
+                    continue
+
+                if draft:
+                    await emit({"page": item["page"], "draft": draft, "blob": None})
+
+        async def download(item, emit):
+            # Вложения качаем по одному и потоково: в памяти только текущий кусок файла,
+            # параллельность ограничена числом воркеров стадии
+            draft = item["draft"]
+            if draft.get('attachment_id'):
+                item["blob"] = await self.download_attachment(
+                    draft['gmail_message_id'], draft['attachment_id'], draft['download_filename']
+                )
+            await emit(item)
+
+        async def persist(item, emit):
+            result = await self._persist_application(item["draft"], item["blob"])
+            if result.get('retry'):
+                item["page"]["failed"] = True
+
+            if result.get('success'):
+                summary["parsed_count"] += 1
+
+                # Добавляем новую вакансию в список если она была создана
+                if result.get('new_vacancy'):
+                    vacancy_title = result.get('vacancy_title')
+                    if vacancy_title and vacancy_title not in summary["new_vacancies"]:
+                        summary["new_vacancies"].append(vacancy_title)
+
+        return Pipeline([
+            Stage("metadata", metadata, workers=GMAIL_FETCH_WORKERS, queue_size=GMAIL_FETCH_WORKERS),
+            Stage("fetch", fetch, workers=GMAIL_FETCH_WORKERS, queue_size=GMAIL_FETCH_WORKERS),
+            # Разбор берет из очереди все накопившиеся письма: когда он не успевает,
+            # пачки растут и уходят в пул процессов
+            Stage("parse", parse, workers=GMAIL_PARSE_WORKERS, batch_size=GMAIL_BATCH_SIZE),
+            Stage("download", download, workers=GMAIL_DOWNLOAD_WORKERS),
+            # Один писатель: SQLite не любит параллельную запись, а get_or_create_vacancy
+            # при гонке создал бы дубликаты вакансий
+            Stage("persist", persist, workers=GMAIL_PERSIST_WORKERS),
+        ], queue_size=GMAIL_PIPELINE_QUEUE_SIZE, on_error=stage_failed)
+
+    async def _run_pipeline(self, pages, summary):
+        """Прогоняет страницы через конвейер и печатает метрики стадий"""
+        pipeline = self._build_pipeline(summary)
+        await pipeline.run(pages)
+        if pipeline.source_metrics.processed:
+            print(f"⏱ [{self.account_id}] Конвейер за {pipeline.elapsed:.1f}с:\n{pipeline.format_metrics()}")
+
+    async def _process_message_ids(self, message_ids, summary):
+        """
+        Обрабатывает письма по списку ID, накапливая результат в summary
+
+        Returns:
+            True если все письма обработаны (успешно или пропущены), False если есть письма для повтора
+        """
+        page = {"failed": False}
+
+        async def pages():
+            unseen_ids = await self._dedupe_page(message_ids, summary)
+            if unseen_ids:
+                yield {"page": page, "ids": unseen_ids}
+
+        await self._run_pipeline(pages(), summary)
+        return not page["failed"]
+
+    async def _drain_backfill(self, query, page_token, summary):
+        """
+        Дочитывает письма по запросу в пределах бюджета страниц
+
+        Листинг следующих страниц идет параллельно с обработкой уже полученных.
+
+        Returns:
+            (токен страницы для продолжения в следующем цикле, листинг исчерпан)
+        """
+        listed_pages = []
+
+        async def pages():
+            start_token = page_token
+            async with aclosing(self.iter_message_pages(query, page_token)) as listing:
+                async for message_ids, next_page_token in listing:
+                    page = {"token": start_token, "next_token": next_page_token, "failed": False}
+                    listed_pages.append(page)
+                    start_token = next_page_token
+
+                    unseen_ids = await self._dedupe_page(message_ids, summary)
+                    if unseen_ids:
+                        yield {"page": page, "ids": unseen_ids}
+
+        await self._run_pipeline(pages(), summary)
+
+        for page in listed_pages:
+            if page["failed"]:
+                # Оставляем курсор на первой неполной странице, чтобы повторить ее в следующем цикле
+                print(f"⚠️ [{self.account_id}] Часть писем не обработана, повторим страницу позже")
+                return page["token"], False
+
+        resume_token = listed_pages[-1]["next_token"] if listed_pages else page_token
+        return resume_token, resume_token is None
 
     async def parse_new_emails(self):
-        parsed_count = 0
-        new_vacancies = []
+        summary = {
+            "parsed_count": 0,
+            "new_vacancies": [],
+            # Счетчики дедупликации: сколько ID получено из Gmail, сколько уже в БД, сколько новых
+            "listed": 0,
+            "already_known": 0,
+            "new": 0,
+        }
 
         try:
             print(f"📧 Проверка аккаунта: {self.account_id}")
-            # Фильтруем письма от SomonTj с нужным заголовком (включая прочитанные)
-            query = 'from:noreply@somon.tj subject:"Отклик на вакансию"'
-            results = self.service.users().messages().list(
-                userId='me', q=query
-            ).execute()
-
-            messages = results.get('messages', [])
-
-            for message in messages:
-                result = await self.process_message(message['id'])
-                if result and result.get('success'):
-                    parsed_count += 1
+            # Все письма до этого момента будут обработаны, если history пройдет без ошибок
+            started_at = datetime.now()
+            caught_up = False
+            state = await self._load_sync_state()
+            history_id = state["last_history_id"]
+            backfill_query = state["backfill_query"]
+            backfill_page_token = state["backfill_page_token"]
+
+            if history_id:
+                try:
+                    message_ids, latest_history_id = await self._list_history_message_ids(history_id)
+                except GmailApiError as e:
+                    if e.status != 404:
+                        raise
+                    print(f"⚠️ [{self.account_id}] historyId {history_id} устарел, читаем письма за окно")
+                    # Незаконченный backfill начинаем заново полным запросом — окно его не покроет
+                    backfill_query = SOMON_QUERY if backfill_query else self._build_window_query(state["last_synced_at"])
+                    backfill_page_token = None
+                    history_id = await self._get_current_history_id()
+                else:
+                    # Чекпоинт сдвигаем только если все письма обработаны, иначе повторим с прежнего места
+                    if await self._process_message_ids(message_ids, summary):
+                        history_id = latest_history_id
+                        caught_up = True
+                    else:
+                        print(f"⚠️ [{self.account_id}] Часть писем не обработана, чекпоинт не сдвигаем")
+            elif not backfill_query:
+                # Первая синхронизация: полный запрос. historyId фиксируем до листинга,
+                # чтобы письма, пришедшие во время обработки, попали в history следующего цикла
+                backfill_query = SOMON_QUERY
+                backfill_page_token = None
+                history_id = await self._get_current_history_id()
+
+            if backfill_query:
+                backfill_page_token, finished = await self._drain_backfill(
+                    backfill_query, backfill_page_token, summary
+                )
+                if finished:
+                    backfill_query = None
+                else:
+                    print(f"📚 [{self.account_id}] Листинг не завершен, продолжим в следующем цикле")
+
+            checkpoint = {
+                "last_history_id": history_id,
+                "backfill_query": backfill_query,
+                "backfill_page_token": backfill_page_token,
+            }
+            # От last_synced_at строится окно после устаревшего historyId, поэтому время
+            # сдвигаем только когда сдвинулся чекпоинт history и нет незаконченного листинга
+            if caught_up and not backfill_query:
+                checkpoint["last_synced_at"] = started_at
+            await self._save_sync_state(**checkpoint)
 
-                    # Добавляем новую вакансию в список если она была создана
-                    if result.get('new_vacancy'):
-                        vacancy_title = result.get('vacancy_title')
-                        if vacancy_title and vacancy_title not in new_vacancies:
-                            new_vacancies.append(vacancy_title)
+            print(
+                f"📊 [{self.account_id}] Получено: {summary['listed']}, "
+                f"уже известно: {summary['already_known']}, новых: {summary['new']}"
+            )
 
         except Exception as e:
             print(f"Ошибка парсинга писем: {e}")
 
-        return {
-            "parsed_count": parsed_count,
-            "new_vacancies": new_vacancies
-        }
+        return summary
+
+    async def _filter_unseen_message_ids(self, message_ids):
+        """
+        Отсекает уже известные письма одним запросом на пачку ID
+
+        Учитываются и удаленные (soft delete) отклики, чтобы они не появлялись снова.
+
+        Returns:
+            Список новых ID в исходном порядке
+        """
+        known_ids = set()
+        async with AsyncSessionLocal() as session:
+            for start in range(0, len(message_ids), DEDUPE_CHUNK_SIZE):
+                chunk = message_ids[start:start + DEDUPE_CHUNK_SIZE]
+                result = await session.execute(
+                    select(Application.gmail_message_id).where(Application.gmail_message_id.in_(chunk))
+                )
+                known_ids.update(result.scalars().all())
+
+        return [message_id for message_id in message_ids if message_id not in known_ids]
 
     async def process_message(self, message_id):
+        """Обрабатывает одно письмо целиком: получение, разбор, вложение, сохранение"""
         try:
-            # Сначала проверяем, не обработано ли уже это письмо или не удалено ли оно
-            async with AsyncSessionLocal() as session:
-                from sqlalchemy import select
-                existing_check = await session.execute(
-                    select(Application).where(Application.gmail_message_id == message_id)
+            if not await self._filter_unseen_message_ids([message_id]):
+                print(f"Письмо {message_id} уже обработано или удалено, пропускаем")
+                return {"success": False}
+
+            headers = await self.client.get_message(
+                message_id, format='metadata', metadata_headers=METADATA_HEADERS
+            )
+            meta = self._check_headers(headers)
+            if not meta:
+                return {"success": False}
+
+            message = await self.client.get_message(message_id, format='full')
+
+            draft = self._prepare_application(message_id, message, meta)
+            if not draft:
+                return {"success": False}
+
+            blob = None
+            if draft.get('attachment_id'):
+                blob = await self.download_attachment(
+                    message_id, draft['attachment_id'], draft['download_filename']
                 )
-                existing_app = existing_check.scalar_one_or_none()
-                if existing_app:
-                    if existing_app.deleted_at is not None:
-                        print(f"Письмо {message_id} было удалено, пропускаем")
-                    else:
-                        print(f"Письмо {message_id} уже обработано, пропускаем")
-                    return {"success": False}
 
-            message = self.service.users().messages().get(
-                userId='me', id=message_id, format='full'
-            ).execute()
+            return await self._persist_application(draft, blob)
+
+        except Exception as e:
+            print(f"Ошибка обработки сообщения {message_id}: {e}")
+            return {"success": False, "retry": True}
+
+    def _check_headers(self, message):
+        """
+        Проверяет заголовки письма (достаточно format='metadata')
+
+        Returns:
+            dict с темой, названием вакансии и датой письма или None, если письмо не от SomonTj
+        """
+        headers = message.get('payload', {}).get('headers', [])
+        subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '')
+        from_email = next((h['value'] for h in headers if h['name'] == 'From'), '')
+
+        # Проверяем что письмо от SomonTj
+        if 'noreply@somon.tj' not in from_email:
+            print(f"Пропускаем письмо не от SomonTj: {from_email}")
+            return None
 
-            # Получаем дату письма из internalDate (миллисекунды)
-            internal_date_ms = int(message.get('internalDate', 0))
-            email_date = datetime.fromtimestamp(internal_date_ms / 1000) if internal_date_ms else datetime.now()
+        # Проверяем что заголовок начинается с "Отклик на вакансию"
+        if not subject.startswith('Отклик на вакансию'):
+            print(f"Пропускаем письмо без нужной темы: {subject}")
+            return None
 
-            headers = message['payload'].get('headers', [])
-            subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '')
-            from_email = next((h['value'] for h in headers if h['name'] == 'From'), '')
+        # Получаем дату письма из internalDate (миллисекунды)
+        internal_date_ms = int(message.get('internalDate', 0))
+        email_date = datetime.fromtimestamp(internal_date_ms / 1000) if internal_date_ms else datetime.now()
 
-            # Проверяем что письмо от SomonTj
-            if 'noreply@somon.tj' not in from_email:
-                print(f"Пропускаем письмо не от SomonTj: {from_email}")
-                return {"success": False}
+        return {
+            'subject': subject,
+            'vacancy_title': self.extract_vacancy_title(subject),
+            'created_at': email_date,
+        }
 
-            # Проверяем что заголовок начинается с "Отклик на вакансию"
-            if not subject.startswith('Отклик на вакансию'):
-                print(f"Пропускаем письмо без нужной темы: {subject}")
-                return {"success": False}
+    def _prepare_application(self, message_id, message, meta=None, body=None, contact_info=None):
+        """
+        Разбирает полное письмо Gmail в данные отклика
+
+        Args:
+            meta: Результат _check_headers, если заголовки уже проверены по метаданным
+            body: Уже извлеченное тело письма
+            contact_info: Уже разобранное тело (например, в пуле процессов)
+
+        Returns:
+            dict с данными отклика или None, если письмо не от SomonTj
+        """
+        if meta is None:
+            meta = self._check_headers(message)
+            if meta is None:
+                return None
 
-            print(f"Обрабатываем письмо от SomonTj: {subject}")
+        subject = meta['subject']
+        email_date = meta['created_at']
+        vacancy_title = meta['vacancy_title']
 
+        print(f"Обрабатываем письмо от SomonTj: {subject}")
+
+        if body is None:
             body = self.extract_body(message['payload'])
 
-            contact_info = self.extract_somon_contact_info(body)
-            print(f"Извлеченная контактная информация: {contact_info}")
+        # Контакты и ссылку на вложение достаем за один разбор HTML
+        if contact_info is None:
+            contact_info = self._extract_email_data(body)
+        print(f"Извлеченная контактная информация: {contact_info}")
+
+        print(f"Название вакансии: {vacancy_title}")
 
-            vacancy_title = self.extract_vacancy_title(subject)
-            print(f"Название вакансии: {vacancy_title}")
+        # Сохраняем ссылку на вложение вместо скачивания
+        attachment_url = None
+        attachment_filename = None
 
-            # Сохраняем ссылку на вложение вместо скачивания
-            attachment_url = None
-            attachment_filename = None
+        # Сначала ищем готовые ссылки в HTML
+        if body and contact_info['attachment_url']:
+            attachment_url = contact_info['attachment_url']
+            attachment_filename = contact_info['attachment_filename']
+            print(f"✅ Найдена ссылка на вложение: {attachment_filename}")
 
-            # Ищем ссылки на вложения прямо в HTML
-            def find_attachments_in_html(html_body):
+        # Если не нашли в HTML, ищем через parts (старый способ)
+        if not attachment_url:
+            def find_attachments(parts, depth=0):
                 nonlocal attachment_url, attachment_filename
-                try:
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(html_body, 'html.parser')
-
-                    # Ищем все ссылки в письме
-                    links = soup.find_all('a', href=True)
-
-                    for link in links:
-                        href = link['href']
-                        link_text = link.get_text().strip()
-
-                        # Ищем ссылки на вложения Gmail с правильным форматом
-                        if ('mail.google.com' in href and 'attid=' in href and 'view=att' in href):
-                            attachment_url = href
-                            # Пробуем извлечь имя файла из текста ссылки или окружающего контекста
-                            if link_text and not link_text.startswith('http') and len(link_text) > 3:
-                                attachment_filename = link_text
-                            print(f"✅ Найдена ссылка на вложение: {attachment_filename}")
+                for i, part in enumerate(parts):
+                    if part.get('filename') and part.get('filename') != '':
+                        attachment_filename = part['filename']
+                        attachment_id = part['body'].get('attachmentId')
+
+                        if attachment_id:
+                            # Формируем Gmail URL в нужном формате
+                            attachment_url = f"https://mail.google.com/mail/u/1?ui=2&ik=21f77b88b6&attid={attachment_id}&permmsgid=msg-f:{message_id}&view=att&zw&disp=inline"
+                            print(f"✅ Найдено вложение: {attachment_filename}")
                             return True
 
-                        # Альтернативно ищем ссылки на mail-attachment.googleusercontent.com
-                        elif 'mail-attachment.googleusercontent.com' in href:
-                            attachment_url = href
-                            if link_text and not link_text.startswith('http') and len(link_text) > 3:
-                                attachment_filename = link_text
-                            print(f"✅ Найдена ссылка на вложение: {attachment_filename}")
+                    # Рекурсивно ищем во вложенных parts
+                    if 'parts' in part:
+                        if find_attachments(part['parts'], depth + 1):
                             return True
-
-                except Exception as e:
-                    print(f"Ошибка поиска ссылок в HTML: {e}")
                 return False
 
-            # Сначала ищем готовые ссылки в HTML
-            if body:
-                find_attachments_in_html(body)
-
-            # Если не нашли в HTML, ищем через parts (старый способ)
-            if not attachment_url:
-                def find_attachments(parts, depth=0):
-                    nonlocal attachment_url, attachment_filename
-                    for i, part in enumerate(parts):
-                        if part.get('filename') and part.get('filename') != '':
-                            attachment_filename = part['filename']
-                            attachment_id = part['body'].get('attachmentId')
-
-                            if attachment_id:
-                                # Формируем Gmail URL в нужном формате
-                                attachment_url = f"https://mail.google.com/mail/u/1?ui=2&ik=21f77b88b6&attid={attachment_id}&permmsgid=msg-f:{message_id}&view=att&zw&disp=inline"
-                                print(f"✅ Найдено вложение: {attachment_filename}")
-                                return True
-
-                        # Рекурсивно ищем во вложенных parts
-                        if 'parts' in part:
-                            if find_attachments(part['parts'], depth + 1):
-                                return True
-                    return False
-
-                if 'parts' in message['payload']:
-                    find_attachments(message['payload']['parts'])
-
-            # Сначала извлекаем имя кандидата
-            name = contact_info.get('name') or 'Неизвестно'
-            if not name or name.strip() == '':
-                name = 'Неизвестно'
-
-            # Скачивание файлов с правильным именем
-            file_path = None
             if 'parts' in message['payload']:
-                for part in message['payload']['parts']:
-                    if part.get('filename'):
-                        file_path = await self.download_attachment(
-                            message_id, part['body']['attachmentId'], part['filename'], name
-                        )
-                        break
-            email = contact_info.get('email') or ''
+                find_attachments(message['payload']['parts'])
+
+        # Сначала извлекаем имя кандидата
+        name = contact_info.get('name') or 'Неизвестно'
+        if not name or name.strip() == '':
+            name = 'Неизвестно'
+
+        # Вложение для скачивания с правильным именем
+        attachment_id = None
+        download_filename = None
+        if 'parts' in message['payload']:
+            for part in message['payload']['parts']:
+                if part.get('filename'):
+                    attachment_id = part['body'].get('attachmentId')
+                    download_filename = part['filename']
+                    break
+
+        return {
+            'gmail_message_id': message_id,
+            'name': name,
+            'email': contact_info.get('email') or '',
+            'phone': contact_info.get('phone'),
+            'applicant_message': contact_info.get('message'),
+            'attachment_filename': attachment_filename,
+            'attachment_id': attachment_id,
+            'download_filename': download_filename,
+            'vacancy_title': vacancy_title,
+            'created_at': email_date,
+        }
+
+    async def _persist_application(self, draft, blob=None):
+        """
+        Сохраняет отклик в БД, создавая вакансию при необходимости
+
+        Args:
+            blob: StoredBlob вложения в хранилище резюме, если оно скачано
+        """
+        name = draft['name']
+        email = draft['email']
+        vacancy_title = draft['vacancy_title']
+        message_id = draft['gmail_message_id']
 
-            print(f"Подготовка к сохранению: name={name}, email={email}")
+        print(f"Подготовка к сохранению: name={name}, email={email}")
 
+        try:
             # Находим или создаем вакансию
             async with AsyncSessionLocal() as session:
                 # Получаем integer ID аккаунта из БД по account_id (строка типа "pwnz888")
-                from shared.models.gmail_account import GmailAccount
                 gmail_account_stmt = select(GmailAccount).where(GmailAccount.account_id == self.account_id)
                 gmail_account_result = await session.execute(gmail_account_stmt)
                 gmail_account = gmail_account_result.scalar_one_or_none()
@@ -271,24 +860,34 @@ class GmailParser:
 
                 vacancy, is_new_vacancy = await self.get_or_create_vacancy(session, vacancy_title, gmail_account_db_id)
 
+                # Ссылка на файл резюме учитывается в той же транзакции, что и отклик
+                file_path = await self.resume_storage.acquire(session, blob) if blob else None
+
                 application = Application(
                     name=name,
                     email=email,
-                    phone=contact_info.get('phone'),
+                    phone=draft['phone'],
                     file_path=file_path,
-                    attachment_filename=attachment_filename,
+                    file_sha256=blob.sha256 if blob else None,
+                    attachment_filename=draft['attachment_filename'],
                     gmail_message_id=message_id,
-                    applicant_message=contact_info.get('message'),
+                    applicant_message=draft['applicant_message'],
                     vacancy_id=vacancy.id if vacancy else None,
-                    created_at=email_date  # Используем дату письма вместо текущей даты
+                    created_at=draft['created_at']  # Используем дату письма вместо текущей даты
                 )
 
 
                 session.add(application)
                 try:
                     await session.commit()
+                    invalidate_stats()
                     print(f"✅ УСПЕШНО СОХРАНЕН отклик: {name} - {email} для вакансии: {vacancy_title}")
 
+                    # Текст резюме извлекается в фоне, чтобы анализ и вопросы не разбирали файл
+                    if blob:
+                        from bot.job_handlers import enqueue_resume_text
+                        await enqueue_resume_text(blob.sha256, file_path)
+
                     # Generate summary if application has resume file
                     # ВРЕМЕННО ОТКЛЮЧЕНО - генерация через кнопку в боте
                     # try:
@@ -310,17 +909,22 @@ class GmailParser:
 
                 except IntegrityError as e:
                     await session.rollback()
+                    # Файл, записанный только для этого отклика, больше не нужен
+                    if blob:
+                        await self.resume_storage.purge(blob.path)
                     print(f"❌ Отклик уже существует: {message_id} - {e}")
                     return {"success": False}
                 except Exception as e:
                     await session.rollback()
+                    if blob:
+                        await self.resume_storage.purge(blob.path)
                     print(f"❌ ОШИБКА сохранения: {e}")
                     print(f"Данные: name={name}, email={email}, vacancy_id={vacancy.id if vacancy else None}")
-                    return {"success": False}
+                    return {"success": False, "retry": True}
 
         except Exception as e:
             print(f"Ошибка обработки сообщения {message_id}: {e}")
-            return {"success": False}
+            return {"success": False, "retry": True}
 
     def extract_body(self, payload):
         body = ""
@@ -355,152 +959,14 @@ class GmailParser:
 
         return body
 
+    def _extract_email_data(self, html_body):
+        """Контакты кандидата и ссылка на вложение из HTML письма SomonTj"""
+        return extract_somon_emails([html_body])[0]
+
     def extract_somon_contact_info(self, html_body):
         """Извлекает контактную информацию из HTML письма SomonTj"""
-        try:
-            soup = BeautifulSoup(html_body, 'html.parser')
-            text = soup.get_text()
-
-            # Очищаем текст от лишних пробелов и переносов
-            text = re.sub(r'\s+', ' ', text).strip()
-
-            # print(f"Полный текст письма: {text}")  # Убираем из логов
-
-            # Извлекаем сообщение от кандидата
-            applicant_message = None
-            message_pattern = r'Текст сообщения:\s*(.*?)(?:Имя:|Email|$)'
-            message_match = re.search(message_pattern, text)
-            if message_match:
-                applicant_message = message_match.group(1).strip()
-                # Убираем стандартные фразы
-                if 'не предоставил сопроводительного письма' in applicant_message:
-                    applicant_message = None
-
-            # Ищем имя (расширенные варианты)
-            name = None
-
-            # Сначала пробуем найти через BeautifulSoup более точно
-            try:
-                # Ищем все <p> теги и проверяем их содержимое
-                p_tags = soup.find_all('p')
-                for p in p_tags:
-                    p_text = p.get_text().strip()
-                    if p_text.startswith('Имя:'):
-                        name = p_text.replace('Имя:', '').strip()
-                        break
-            except:
-                pass
-
-            # Если не нашли, используем регулярные выражения
-            if not name:
-                name_patterns = [
-                    # Основные варианты (с нормализованными пробелами)
-                    r'Имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
-                    r'Имя\s*[-:]\s*(.+?)(?:\s+Email|\s+Телефон|$)',
-                    r'Name:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
-                    r'ФИО:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
-                    r'Полное имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
-                    # Варианты с любым текстом между "Текст сообщения:" и "Имя:"
-                    r'Текст сообщения:.*?Имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
-                    # Поиск после "не предоставил сопроводительного письма"
-                    r'не предоставил сопроводительного письма.*?Имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
-                ]
-
-                for pattern in name_patterns:
-                    name_match = re.search(pattern, text, re.MULTILINE | re.DOTALL)
-                    if name_match:
-                        candidate_name = name_match.group(1).strip()
-                        # Проверяем что это похоже на имя (не слишком длинное и содержит буквы)
-                        if len(candidate_name) < 100 and re.search(r'[А-Яа-яA-Za-z]', candidate_name):
-                            name = candidate_name
-                            break
-
-            # Ищем email
-            email = None
-            # Ищем ссылки mailto
-            email_links = soup.find_all('a', href=re.compile(r'^mailto:'))
-            if email_links:
-                email = email_links[0]['href'].replace('mailto:', '')
-            else:
-                # Ищем в тексте (расширенные варианты)
-                email_patterns = [
-                    r'Email для контакта\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
-                    r'Email\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
-                    r'E-mail\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
-                    r'Почта\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
-                    r'электронная почта\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
-                    # Поиск email адресов в тексте после "не предоставил сопроводительного письма"
-                    r'не предоставил сопроводительного письма.*?([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-                    # Поиск email адресов в тексте
-                    r'Текст сообщения:.*?([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-                    r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-                ]
-
-                for pattern in email_patterns:
-                    email_match = re.search(pattern, text, re.MULTILINE | re.DOTALL)
-                    if email_match:
-                        candidate_email = email_match.group(1).strip()
-                        # Проверяем что это валидный email
-                        if '@' in candidate_email and '.' in candidate_email.split('@')[-1]:
-                            email = candidate_email
-                            break
-
-            # Ищем телефон (расширенные варианты)
-            phone = None
-
-            # Сначала пробуем найти через BeautifulSoup
-            try:
-                p_tags = soup.find_all('p')
-                for p in p_tags:
-                    p_text = p.get_text().strip()
-                    if p_text.startswith('Телефон для контакта'):
-                        phone = p_text.replace('Телефон для контакта -', '').replace('Телефон для контакта:', '').strip()
-                        break
-            except:
-                pass
-
-            # Если не нашли, используем регулярные выражения
-            if not phone:
-                phone_patterns = [
-                    r'Телефон для контакта\s*[-:]\s*(.+?)(?:\n|$)',
-                    r'Телефон\s*[-:]\s*(.+?)(?:\n|$)',
-                    r'Phone\s*[-:]\s*(.+?)(?:\n|$)',
-                    r'Моб\.\s*тел\.\s*[-:]\s*(.+?)(?:\n|$)',
-                    r'Мобильный\s*[-:]\s*(.+?)(?:\n|$)',
-                    r'Номер\s*[-:]\s*(.+?)(?:\n|$)',
-                    # Поиск номеров телефона после "не предоставил сопроводительного письма"
-                    r'не предоставил сопроводительного письма.*?(\+?992[0-9]{9})',
-                    r'не предоставил сопроводительного письма.*?(\+?[0-9]{9,15})',
-                    # Поиск номеров телефона в тексте
-                    r'Текст сообщения:.*?(\+?992[0-9]{9})',
-                    r'Текст сообщения:.*?(\+?[0-9]{9,15})',
-                    r'(\+?992[0-9]{9})',
-                    r'(\+?[0-9]{9,15})'
-                ]
-
-                for pattern in phone_patterns:
-                    phone_match = re.search(pattern, text, re.MULTILINE | re.DOTALL)
-                    if phone_match:
-                        candidate_phone = phone_match.group(1).strip()
-                        # Проверяем что это похоже на телефон
-                        if re.search(r'[0-9+]', candidate_phone) and len(candidate_phone.replace(' ', '').replace('-', '').replace('+', '')) >= 9:
-                            phone = candidate_phone
-                            break
-
-            result = {
-                'name': name,
-                'email': email,
-                'phone': phone,
-                'message': applicant_message
-            }
-
-            # Отладочные сообщения убраны
-
-            return result
-
-        except Exception as e:
-            print(f"Ошибка парсинга HTML: {e}")
-            return {'name': None, 'email': None, 'phone': None}
+        data = self._extract_email_data(html_body)
+        return {key: data[key] for key in ('name', 'email', 'phone', 'message')}
 
     def extract_vacancy_title(self, subject):
         """Извлекает название вакансии из заголовка"""
@@ -511,7 +977,6 @@ class GmailParser:
     async def get_or_create_vacancy(self, session, title, gmail_account_id=None):
         """Находит существующую вакансию или создает новую"""
         try:
-            from sqlalchemy import select
             stmt = select(Vacancy).where(Vacancy.title == title)
             result = await session.execute(stmt)
             vacancy = result.scalar_one_or_none()
@@ -3,16 +3,20 @@ from aiogram.filters import CommandStart, Command
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 from aiogram.filters.callback_data import CallbackData
 from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from shared.database.database import AsyncSessionLocal
+from shared.database.database import AsyncSessionLocal, session_scope
 from shared.models.vacancy import Application, Vacancy
 from shared.models.user import TelegramUser, RoleEnum
-from shared.services.resume_summary_service import ResumeSummaryService
 from bot.middleware import moderator_or_admin, admin_only
+from bot.jobs import enqueue, PRIORITY_HIGH
+from bot.utils.cache import invalidate_stats
+from bot.user_cache import user_cache
+from bot.utils.pagination import PageCallback, fetch_page, page_buttons
 from bot.apply_handlers import (
     setup_apply_handlers,
     show_vacancy_and_offer_apply,
@@ -164,20 +168,30 @@ async def _apply_bot_commands_scope(bot, user: TelegramUser, chat_id: int) -> No
         pass
 
 
+# Колонки для кнопок списков откликов: тексты из группы "heavy" списку не нужны
+APPLICATION_LIST_COLUMNS = (
+    Application.id,
+    Application.name,
+    Application.phone,
+    Application.email,
+    Application.is_processed,
+    Application.created_at,
+)
+
+
 def _build_unprocessed_stmt(user: TelegramUser):
     """Единый запрос для списка необработанных откликов.
 
     Согласован со stats_handler, чтобы счётчики совпадали:
     inner join на Vacancy + активный GmailAccount, фильтр только по
     Application.deleted_at и is_processed. Модератор дополнительно
-    ограничен своими привязанными аккаунтами.
+    ограничен своими привязанными аккаунтами. Выбирает только
+    APPLICATION_LIST_COLUMNS.
     """
-    from sqlalchemy.orm import selectinload
     from shared.models.gmail_account import GmailAccount
 
     stmt = (
-        select(Application)
-        .options(selectinload(Application.vacancy).selectinload(Vacancy.gmail_account))
+        select(*APPLICATION_LIST_COLUMNS)
         .join(Vacancy, Application.vacancy_id == Vacancy.id)
         .join(GmailAccount, Vacancy.gmail_account_id == GmailAccount.id)
         .where(
@@ -192,6 +206,263 @@ def _build_unprocessed_stmt(user: TelegramUser):
     return stmt
 
 
+async def _load_application_card(session, application_id):
+    """Отклик для карточки вместе с вакансией и отложенными текстами одним запросом (LEFT JOIN)"""
+    from sqlalchemy.orm import joinedload, undefer_group
+
+    stmt = (
+        select(Application)
+        .options(joinedload(Application.vacancy), undefer_group("heavy"))
+        .where(Application.id == application_id)
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+def _application_button_text(app, status=None):
+    """Текст кнопки отклика: {статус} {имя} - {телефон} - {email}"""
+    button_text = app.name
+    if app.phone:
+        button_text += f" - {app.phone}"
+    if app.email:
+        button_text += f" - {app.email}"
+
+    if status is None:
+        status = "✅" if app.is_processed else "❌"
+    return f"{status} {button_text}"
+
+
+async def _render_vacancies_page(session, user: TelegramUser, cursor: PageCallback = None):
+    """Страница списка вакансий: (текст, клавиатура); клавиатура None — список пуст"""
+    from sqlalchemy import func
+    from shared.models.gmail_account import GmailAccount
+
+    # Получаем список вакансий с фильтрацией по пользователю
+    if user.is_admin:
+        # Админ видит все вакансии (включая те, где gmail_account_id = NULL)
+        stmt = select(Vacancy).where(Vacancy.deleted_at.is_(None))
+    else:
+        # Модератор видит только вакансии привязанных к нему аккаунтов
+        stmt = select(Vacancy).join(
+            GmailAccount, Vacancy.gmail_account_id == GmailAccount.id, isouter=False
+        ).where(
+            GmailAccount.user_id == user.id,
+            Vacancy.deleted_at.is_(None)
+        )
+
+    page = await fetch_page(session, stmt, Vacancy.created_at, Vacancy.id, cursor)
+    if not page.rows:
+        return "Пока нет вакансий", None
+
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[])
+    for vacancy in page.rows:
+        # Счетчик не удаленных откликов ведут триггеры БД
+        button_text = f"{vacancy.title} ({vacancy.applications_count} откликов)"
+        keyboard.inline_keyboard.append([InlineKeyboardButton(
+            text=button_text,
+            callback_data=VacancyCallback(vacancy_id=vacancy.id).pack()
+        )])
+
+    total = None
+    if page.has_prev or page.has_next:
+        # Считается по индексу только когда список не влез в одну страницу
+        total = await session.scalar(select(func.count()).select_from(stmt.with_only_columns(Vacancy.id).subquery()))
+        keyboard.inline_keyboard.append(page_buttons(page, "vacancies", total=total))
+
+    return "📋 Выберите вакансию для просмотра откликов:", keyboard
+
+
+async def _render_vacancy_applications_page(session, vacancy_id: int, cursor: PageCallback = None):
+    """Страница откликов вакансии: (текст, клавиатура)"""
+    vacancy = await session.get(Vacancy, vacancy_id)
+    if not vacancy:
+        return "Вакансия не найдена", None
+
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[])
+    delete_button = InlineKeyboardButton(
+        text="🗑 Удалить вакансию",
+        callback_data=VacancyDeleteCallback(vacancy_id=vacancy.id, action="confirm").pack()
+    )
+    back_button = InlineKeyboardButton(
+        text="⬅️ Назад к вакансиям",
+        callback_data=BackCallback(to="vacancies").pack()
+    )
+
+    # Получаем отклики на эту вакансию (исключаем удаленные)
+    stmt = select(*APPLICATION_LIST_COLUMNS).where(
+        Application.vacancy_id == vacancy.id, Application.deleted_at.is_(None)
+    )
+    page = await fetch_page(session, stmt, Application.created_at, Application.id, cursor)
+
+    if not page.rows:
+        keyboard.inline_keyboard.append([delete_button])
+        keyboard.inline_keyboard.append([back_button])
+        return f"📋 Вакансия: {vacancy.title}\n\nОткликов пока нет", keyboard
+
+    for app in page.rows:
+        keyboard.inline_keyboard.append([InlineKeyboardButton(
+            text=_application_button_text(app),
+            callback_data=ApplicationCallback(application_id=app.id, source="vacancy").pack()
+        )])
+
+    navigation = page_buttons(page, "apps", key=vacancy.id, total=vacancy.applications_count)
+    if navigation:
+        keyboard.inline_keyboard.append(navigation)
+
+    # Кнопка "Отметить все как обработанные"
+    if vacancy.unprocessed_count > 0:
+        keyboard.inline_keyboard.append([InlineKeyboardButton(
+            text=f"✅ Отметить все как обработанные ({vacancy.unprocessed_count})",
+            callback_data=VacancyMarkAllProcessedCallback(vacancy_id=vacancy.id).pack()
+        )])
+
+    keyboard.inline_keyboard.append([delete_button])
+    keyboard.inline_keyboard.append([back_button])
+
+    text = f"📋 Вакансия: <b>{vacancy.title}</b>\n"
+    text += f"📊 Всего откликов: <b>{vacancy.applications_count}</b>\n\n"
+    text += "Выберите отклик для просмотра подробностей:"
+    return text, keyboard
+
+
+async def _render_unprocessed_page(session, user: TelegramUser, cursor: PageCallback = None):
+    """Страница необработанных откликов: (текст, клавиатура); клавиатура None — все обработаны"""
+    from sqlalchemy import func
+    from shared.models.gmail_account import GmailAccount
+
+    page = await fetch_page(session, _build_unprocessed_stmt(user), Application.created_at, Application.id, cursor)
+    if not page.rows:
+        return "✅ Все отклики обработаны!", None
+
+    # Общее число — по счетчикам вакансий, а не подсчетом строк
+    total_stmt = (
+        select(func.coalesce(func.sum(Vacancy.unprocessed_count), 0))
+        .join(GmailAccount, Vacancy.gmail_account_id == GmailAccount.id)
+        .where(GmailAccount.enabled == True)
+    )
+    if not user.is_admin:
+        total_stmt = total_stmt.where(GmailAccount.user_id == user.id)
+    total = await session.scalar(total_stmt)
+
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[])
+    for app in page.rows:
+        keyboard.inline_keyboard.append([InlineKeyboardButton(
+            text=_application_button_text(app, status="❌"),
+            callback_data=ApplicationCallback(application_id=app.id, source="unprocessed").pack()
+        )])
+
+    navigation = page_buttons(page, "unprocessed", total=total)
+    if navigation:
+        keyboard.inline_keyboard.append(navigation)
+
+    text = f"❌ <b>Необработанные отклики ({total}):</b>\n\n"
+    text += "Выберите отклик для просмотра и обработки:"
+    return text, keyboard
+
+
+async def _render_users_page(session, cursor: PageCallback = None):
+    """Страница списка пользователей бота: (текст, клавиатура); клавиатура None — список пуст"""
+    from sqlalchemy import func
+
+    page = await fetch_page(session, select(TelegramUser), TelegramUser.created_at, TelegramUser.id, cursor)
+    if not page.rows:
+        return "📭 Нет пользователей", None
+
+    total = await session.scalar(select(func.count(TelegramUser.id)))
+
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[])
+    for u in page.rows:
+        role_emoji = {
+            RoleEnum.USER: "👤",
+            RoleEnum.MODERATOR: "👨‍💼",
+            RoleEnum.ADMIN: "👑"
+        }.get(u.role, "👤")
+
+        button_text = f"{role_emoji} {u.first_name or 'Unknown'}"
+        if u.username:
+            button_text += f" (@{u.username})"
+
+        keyboard.inline_keyboard.append([InlineKeyboardButton(
+            text=button_text,
+            callback_data=UserCallback(user_id=u.id).pack()
+        )])
+
+    navigation = page_buttons(page, "users", total=total)
+    if navigation:
+        keyboard.inline_keyboard.append(navigation)
+
+    text = "👥 <b>Пользователи бота</b>\n\n"
+    text += f"Всего: <b>{total}</b>\n\n"
+    text += "Выберите пользователя для управления:"
+    return text, keyboard
+
+
+def _parse_stats_window(text):
+    """Период из "/stats 30d" в днях; None — за все время"""
+    import re
+
+    parts = (text or "").split()
+    if len(parts) < 2:
+        return None
+    match = re.fullmatch(r"(\d+)\s*[dд]?", parts[1].lower())
+    if not match or int(match.group(1)) <= 0:
+        return None
+    return int(match.group(1))
+
+
+def _build_stats_stmt(user: TelegramUser, window_days=None):
+    """Статистика /stats одним запросом с группировкой по Gmail аккаунту.
+
+    За все время берутся счетчики вакансий (их ведут триггеры), за период —
+    отклики по индексу (vacancy_id, created_at). Как и раньше, вакансии
+    считаются вместе с удаленными, отклики — только не удаленные.
+    """
+    from datetime import datetime, timedelta
+    from sqlalchemy import func, case, and_
+    from shared.models.gmail_account import GmailAccount
+
+    if window_days:
+        since = datetime.now() - timedelta(days=window_days)
+        stmt = (
+            select(
+                GmailAccount.id,
+                GmailAccount.name,
+                func.count(func.distinct(case((Vacancy.created_at >= since, Vacancy.id)))).label("vacancies"),
+                func.count(Application.id).label("total"),
+                func.coalesce(func.sum(case((Application.is_processed == True, 1), else_=0)), 0).label("processed"),
+                func.coalesce(func.sum(case((Application.is_processed == False, 1), else_=0)), 0).label("unprocessed"),
+            )
+            .select_from(GmailAccount)
+            .outerjoin(Vacancy, Vacancy.gmail_account_id == GmailAccount.id)
+            .outerjoin(Application, and_(
+                Application.vacancy_id == Vacancy.id,
+                Application.deleted_at.is_(None),
+                Application.created_at >= since,
+            ))
+        )
+    else:
+        total = func.coalesce(func.sum(Vacancy.applications_count), 0)
+        unprocessed = func.coalesce(func.sum(Vacancy.unprocessed_count), 0)
+        stmt = (
+            select(
+                GmailAccount.id,
+                GmailAccount.name,
+                func.count(Vacancy.id).label("vacancies"),
+                total.label("total"),
+                (total - unprocessed).label("processed"),
+                unprocessed.label("unprocessed"),
+            )
+            .select_from(GmailAccount)
+            .outerjoin(Vacancy, Vacancy.gmail_account_id == GmailAccount.id)
+        )
+
+    stmt = stmt.where(GmailAccount.enabled == True).group_by(GmailAccount.id).order_by(GmailAccount.id)
+    if not user.is_admin:
+        # Модератор видит только свои привязанные аккаунты
+        stmt = stmt.where(GmailAccount.user_id == user.id)
+    return stmt
+
+
 def setup_handlers(dp: Dispatcher):
 
     # Apply-FSM регистрируем первым, чтобы его state-хендлеры имели приоритет
@@ -237,7 +508,7 @@ def setup_handlers(dp: Dispatcher):
                 f"👤 Ваша роль: <b>Администратор</b>\n\n"
                 "<b>Команды:</b>\n"
                 "/start - Это сообщение\n"
-                "/stats - Статистика по откликам\n"
+                "/stats - Статистика по откликам (/stats 30d — за 30 дней)\n"
                 "/recent - Последние отклики\n"
                 "/unprocessed - Все необработанные отклики\n"
                 "/parse - Парсить новые письма\n"
@@ -262,7 +533,7 @@ def setup_handlers(dp: Dispatcher):
                 f"👤 Ваша роль: <b>Модератор</b>\n\n"
                 "<b>Команды:</b>\n"
                 "/start - Это сообщение\n"
-                "/stats - Статистика по откликам\n"
+                "/stats - Статистика по откликам (/stats 30d — за 30 дней)\n"
                 "/recent - Последние отклики\n"
                 "/unprocessed - Все необработанные отклики\n"
                 "/parse - Парсить новые письма\n"
@@ -283,128 +554,67 @@ def setup_handlers(dp: Dispatcher):
     @dp.message(Command("stats"))
     @moderator_or_admin
     async def stats_handler(message: Message, user: TelegramUser) -> None:
-        async with AsyncSessionLocal() as session:
-            from sqlalchemy import func, case
-            from shared.models.gmail_account import GmailAccount
+        from bot.utils.cache import stats_cache
 
-            # Получаем аккаунты в зависимости от роли
-            if user.is_admin:
-                accounts_stmt = select(GmailAccount).where(GmailAccount.enabled == True)
-            else:
-                # Модератор видит только свои привязанные аккаунты
-                accounts_stmt = select(GmailAccount).where(
-                    GmailAccount.enabled == True,
-                    GmailAccount.user_id == user.id
-                )
+        # "/stats 30d" — статистика только за последние N дней
+        window_days = _parse_stats_window(message.text)
+        cache_key = ("admin" if user.is_admin else user.id, window_days)
 
-            accounts_result = await session.execute(accounts_stmt)
-            accounts = accounts_result.scalars().all()
+        rows = stats_cache.get(cache_key)
+        if rows is None:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(_build_stats_stmt(user, window_days))
+                rows = result.all()
+            stats_cache.set(cache_key, rows)
 
             # Логирование для отладки
             print(f"User role: {user.role}, User ID: {user.id}, Is Admin: {user.is_admin}")
-            print(f"Found {len(accounts)} accounts for user")
+            print(f"Found {len(rows)} accounts for user")
 
-            if not accounts:
-                await message.answer("❌ Нет доступных аккаунтов для статистики")
-                return
+        if not rows:
+            await message.answer("❌ Нет доступных аккаунтов для статистики")
+            return
 
+        if window_days:
+            text = f"📊 <b>Статистика по аккаунтам за {window_days} дн.:</b>\n\n"
+        else:
             text = "📊 <b>Статистика по аккаунтам:</b>\n\n"
 
-            total_vacancies = 0
-            total_applications = 0
-            total_processed = 0
-            total_unprocessed = 0
-
-            for account in accounts:
-                # Статистика по вакансиям для этого аккаунта
-                vacancies_count_stmt = select(func.count(Vacancy.id)).where(
-                    Vacancy.gmail_account_id == account.id
-                )
-                vacancies_count = await session.scalar(vacancies_count_stmt)
-
-                # Статистика по откликам для этого аккаунта
-                applications_stmt = select(
-                    func.count(Application.id).label('total'),
-                    func.sum(case((Application.is_processed == True, 1), else_=0)).label('processed'),
-                    func.sum(case((Application.is_processed == False, 1), else_=0)).label('unprocessed')
-                ).select_from(Application).join(
-                    Vacancy, Application.vacancy_id == Vacancy.id
-                ).where(
-                    Vacancy.gmail_account_id == account.id,
-                    Application.deleted_at.is_(None)
-                )
-
-                result = await session.execute(applications_stmt)
-                stats = result.one()
-
-                apps_total = stats.total or 0
-                apps_processed = stats.processed or 0
-                apps_unprocessed = stats.unprocessed or 0
-
-                total_vacancies += vacancies_count
-                total_applications += apps_total
-                total_processed += apps_processed
-                total_unprocessed += apps_unprocessed
-
-                text += f"📧 <b>{account.name}</b>\n"
-                text += f"   📋 Вакансий: {vacancies_count}\n"
-                text += f"   👥 Откликов: {apps_total}\n"
-                text += f"   ✅ Обработано: {apps_processed}\n"
-                text += f"   ❌ Не обработано: {apps_unprocessed}\n\n"
-
-            # Общая статистика
-            text += f"━━━━━━━━━━━━━━━━━━━━\n"
-            text += f"📊 <b>Итого:</b>\n"
-            text += f"📧 Аккаунтов: <b>{len(accounts)}</b>\n"
-            text += f"📋 Вакансий: <b>{total_vacancies}</b>\n"
-            text += f"👥 Откликов: <b>{total_applications}</b>\n"
-            text += f"✅ Обработано: <b>{total_processed}</b>\n"
-            text += f"❌ Не обработано: <b>{total_unprocessed}</b>"
-
-            await message.answer(text, parse_mode="HTML")
+        total_vacancies = 0
+        total_applications = 0
+        total_processed = 0
+        total_unprocessed = 0
+
+        for row in rows:
+            total_vacancies += row.vacancies
+            total_applications += row.total
+            total_processed += row.processed
+            total_unprocessed += row.unprocessed
+
+            text += f"📧 <b>{row.name}</b>\n"
+            text += f"   📋 Вакансий: {row.vacancies}\n"
+            text += f"   👥 Откликов: {row.total}\n"
+            text += f"   ✅ Обработано: {row.processed}\n"
+            text += f"   ❌ Не обработано: {row.unprocessed}\n\n"
+
+        # Общая статистика
+        text += f"━━━━━━━━━━━━━━━━━━━━\n"
+        text += f"📊 <b>Итого:</b>\n"
+        text += f"📧 Аккаунтов: <b>{len(rows)}</b>\n"
+        text += f"📋 Вакансий: <b>{total_vacancies}</b>\n"
+        text += f"👥 Откликов: <b>{total_applications}</b>\n"
+        text += f"✅ Обработано: <b>{total_processed}</b>\n"
+        text += f"❌ Не обработано: <b>{total_unprocessed}</b>"
+
+        await message.answer(text, parse_mode="HTML")
 
     @dp.message(Command("recent"))
     @moderator_or_admin
     async def recent_handler(message: Message, user: TelegramUser) -> None:
         async with AsyncSessionLocal() as session:
-            # Получаем список вакансий с фильтрацией по пользователю
-            if user.is_admin:
-                # Админ видит все вакансии (включая те, где gmail_account_id = NULL)
-                stmt = select(Vacancy).where(Vacancy.deleted_at.is_(None)).order_by(desc(Vacancy.created_at))
-            else:
-                # Модератор видит только вакансии привязанных к нему аккаунтов
-                from shared.models.gmail_account import GmailAccount
-                stmt = select(Vacancy).join(
-                    GmailAccount, Vacancy.gmail_account_id == GmailAccount.id, isouter=False
-                ).where(
-                    GmailAccount.user_id == user.id,
-                    Vacancy.deleted_at.is_(None)
-                ).order_by(desc(Vacancy.created_at))
+            text, keyboard = await _render_vacancies_page(session, user)
 
-            result = await session.execute(stmt)
-            vacancies = result.scalars().all()
-
-            if not vacancies:
-                await message.answer("Пока нет вакансий")
-                return
-
-            # Создаем клавиатуру с вакансиями
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-
-            for vacancy in vacancies:
-                # Считаем количество откликов для каждой вакансии (исключаем удаленные)
-                count_stmt = select(Application).where(Application.vacancy_id == vacancy.id, Application.deleted_at.is_(None))
-                count_result = await session.execute(count_stmt)
-                applications_count = len(count_result.scalars().all())
-
-                button_text = f"{vacancy.title} ({applications_count} откликов)"
-                button = InlineKeyboardButton(
-                    text=button_text,
-                    callback_data=VacancyCallback(vacancy_id=vacancy.id).pack()
-                )
-                keyboard.inline_keyboard.append([button])
-
-            await message.answer("📋 Выберите вакансию для просмотра откликов:", reply_markup=keyboard)
+        await message.answer(text, reply_markup=keyboard, parse_mode="HTML")
 
     @dp.message(Command("parse"))
     @moderator_or_admin
@@ -414,7 +624,9 @@ def setup_handlers(dp: Dispatcher):
         try:
             import json
             import os
+            from contextlib import aclosing
             from bot.gmail_parser import GmailParser
+            from bot.scheduler import poll_accounts
             from shared.models.gmail_account import GmailAccount
 
             # Получаем список аккаунтов для парсинга в зависимости от роли
@@ -452,12 +664,31 @@ def setup_handlers(dp: Dispatcher):
             total_parsed = 0
             all_new_vacancies = []
 
-            for parser in parsers:
-                result = await parser.parse_new_emails()
-                total_parsed += result["parsed_count"]
+            progress_lines = []
 
-                if result["new_vacancies"]:
-                    all_new_vacancies.extend(result["new_vacancies"])
+            try:
+                # Аккаунты проверяются параллельно, прогресс показываем по мере готовности
+                async with aclosing(poll_accounts(parsers)) as results:
+                    async for parser, result, error in results:
+                        if error is not None:
+                            progress_lines.append(f"❌ {parser.account_id}: {error}")
+                        else:
+                            total_parsed += result["parsed_count"]
+                            progress_lines.append(f"✅ {parser.account_id}: {result['parsed_count']}")
+
+                            if result["new_vacancies"]:
+                                all_new_vacancies.extend(result["new_vacancies"])
+
+                        if len(progress_lines) < len(parsers):
+                            try:
+                                await status_msg.edit_text(
+                                    "🔄 Парсинг новых писем...\n\n" + "\n".join(progress_lines)
+                                )
+                            except Exception:
+                                pass
+            finally:
+                for parser in parsers:
+                    await parser.close()
 
             if total_parsed > 0:
                 text = f"✅ Парсинг завершен!\nОбработано новых откликов: <b>{total_parsed}</b>"
@@ -488,38 +719,9 @@ def setup_handlers(dp: Dispatcher):
     @moderator_or_admin
     async def unprocessed_handler(message: Message, user: TelegramUser) -> None:
         async with AsyncSessionLocal() as session:
-            stmt = _build_unprocessed_stmt(user)
-            result = await session.execute(stmt)
-            unprocessed_applications = result.scalars().all()
-
-            if not unprocessed_applications:
-                await message.answer("✅ Все отклики обработаны!")
-                return
-
-            # Создаем клавиатуру с необработанными откликами
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-
-            for app in unprocessed_applications:
-                # Формируем текст кнопки: {имя} - {телефон} - {email}
-                button_text = app.name
-                if app.phone:
-                    button_text += f" - {app.phone}"
-                if app.email:
-                    button_text += f" - {app.email}"
+            text, keyboard = await _render_unprocessed_page(session, user)
 
-                # Добавляем эмодзи для необработанных
-                button_text = f"❌ {button_text}"
-
-                button = InlineKeyboardButton(
-                    text=button_text,
-                    callback_data=ApplicationCallback(application_id=app.id, source="unprocessed").pack()
-                )
-                keyboard.inline_keyboard.append([button])
-
-            text = f"❌ <b>Необработанные отклики ({len(unprocessed_applications)}):</b>\n\n"
-            text += "Выберите отклик для просмотра и обработки:"
-
-            await message.answer(text, reply_markup=keyboard, parse_mode="HTML")
+        await message.answer(text, reply_markup=keyboard, parse_mode="HTML")
 
     @dp.callback_query(VacancyCallback.filter())
     async def vacancy_applications_handler(query: CallbackQuery, callback_data: VacancyCallback, user: TelegramUser) -> None:
@@ -530,87 +732,42 @@ def setup_handlers(dp: Dispatcher):
             return
 
         async with AsyncSessionLocal() as session:
-            # Получаем вакансию
-            vacancy_stmt = select(Vacancy).where(Vacancy.id == callback_data.vacancy_id)
-            vacancy_result = await session.execute(vacancy_stmt)
-            vacancy = vacancy_result.scalar_one_or_none()
+            text, keyboard = await _render_vacancy_applications_page(session, callback_data.vacancy_id)
 
-            if not vacancy:
-                await query.message.edit_text("Вакансия не найдена")
-                return
+        await query.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
 
-            # Получаем отклики на эту вакансию (исключаем удаленные)
-            apps_stmt = select(Application).where(Application.vacancy_id == callback_data.vacancy_id, Application.deleted_at.is_(None)).order_by(desc(Application.created_at))
-            apps_result = await session.execute(apps_stmt)
-            applications = apps_result.scalars().all()
+    @dp.callback_query(PageCallback.filter())
+    async def page_handler(query: CallbackQuery, callback_data: PageCallback, user: TelegramUser) -> None:
+        """Листание страниц списков (вакансии, отклики, необработанные, пользователи)"""
+        await query.answer()
 
-            if not applications:
-                keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-                delete_button = InlineKeyboardButton(
-                    text="🗑 Удалить вакансию",
-                    callback_data=VacancyDeleteCallback(vacancy_id=vacancy.id, action="confirm").pack()
-                )
-                keyboard.inline_keyboard.append([delete_button])
-                back_button = InlineKeyboardButton(
-                    text="⬅️ Назад к вакансиям",
-                    callback_data=BackCallback(to="vacancies").pack()
-                )
-                keyboard.inline_keyboard.append([back_button])
-                await query.message.edit_text(f"📋 Вакансия: {vacancy.title}\n\nОткликов пока нет", reply_markup=keyboard)
+        if callback_data.name == "users":
+            if not user.is_admin:
+                await query.answer("❌ Недостаточно прав", show_alert=True)
                 return
+        elif not user.has_permission('view_applications'):
+            await query.answer("❌ У вас нет прав для просмотра откликов", show_alert=True)
+            return
 
-            # Создаем клавиатуру с откликами
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-
-            for app in applications:
-                # Формируем текст кнопки: {имя} - {телефон} - {email}
-                button_text = app.name
-                if app.phone:
-                    button_text += f" - {app.phone}"
-                if app.email:
-                    button_text += f" - {app.email}"
-
-                # Добавляем статус обработки
-                status = "✅" if app.is_processed else "❌"
-                button_text = f"{status} {button_text}"
-
-                button = InlineKeyboardButton(
-                    text=button_text,
-                    callback_data=ApplicationCallback(application_id=app.id, source="vacancy").pack()
-                )
-                keyboard.inline_keyboard.append([button])
-
-            # Кнопка "Отметить все как обработанные"
-            unprocessed_count = sum(1 for app in applications if not app.is_processed)
-            if unprocessed_count > 0:
-                mark_all_button = InlineKeyboardButton(
-                    text=f"✅ Отметить все как обработанные ({unprocessed_count})",
-                    callback_data=VacancyMarkAllProcessedCallback(vacancy_id=vacancy.id).pack()
-                )
-                keyboard.inline_keyboard.append([mark_all_button])
-
-            # Кнопка "Удалить вакансию"
-            delete_button = InlineKeyboardButton(
-                text="🗑 Удалить вакансию",
-                callback_data=VacancyDeleteCallback(vacancy_id=vacancy.id, action="confirm").pack()
-            )
-            keyboard.inline_keyboard.append([delete_button])
-
-            # Добавляем кнопку "Назад к вакансиям"
-            back_button = InlineKeyboardButton(
-                text="⬅️ Назад к вакансиям",
-                callback_data=BackCallback(to="vacancies").pack()
-            )
-            keyboard.inline_keyboard.append([back_button])
-
-            text = f"📋 Вакансия: <b>{vacancy.title}</b>\n"
-            text += f"📊 Всего откликов: <b>{len(applications)}</b>\n\n"
-            text += "Выберите отклик для просмотра подробностей:"
+        async with AsyncSessionLocal() as session:
+            if callback_data.name == "vacancies":
+                text, keyboard = await _render_vacancies_page(session, user, callback_data)
+            elif callback_data.name == "apps":
+                text, keyboard = await _render_vacancy_applications_page(session, callback_data.key, callback_data)
+            elif callback_data.name == "unprocessed":
+                text, keyboard = await _render_unprocessed_page(session, user, callback_data)
+            elif callback_data.name == "users":
+                text, keyboard = await _render_users_page(session, callback_data)
+            else:
+                return
 
+        try:
             await query.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+        except Exception:
+            pass  # Сообщение не изменилось (повторное нажатие на номер страницы)
 
     @dp.callback_query(ApplicationCallback.filter())
-    async def application_details_handler(query: CallbackQuery, callback_data: ApplicationCallback, user: TelegramUser) -> None:
+    async def application_details_handler(query: CallbackQuery, callback_data: ApplicationCallback, user: TelegramUser, session: AsyncSession = None) -> None:
         from bot.utils.formatters import format_application_details
 
         await query.answer()
@@ -619,20 +776,15 @@ def setup_handlers(dp: Dispatcher):
             await query.answer("❌ У вас нет прав для просмотра откликов", show_alert=True)
             return
 
-        async with AsyncSessionLocal() as session:
-            # Получаем отклик
-            app_stmt = select(Application).where(Application.id == callback_data.application_id)
-            app_result = await session.execute(app_stmt)
-            application = app_result.scalar_one_or_none()
+        async with session_scope(session) as session:
+            # Получаем отклик вместе с вакансией
+            application = await _load_application_card(session, callback_data.application_id)
 
             if not application:
                 await query.message.edit_text("Отклик не найден")
                 return
 
-            # Получаем вакансию
-            vacancy_stmt = select(Vacancy).where(Vacancy.id == application.vacancy_id)
-            vacancy_result = await session.execute(vacancy_stmt)
-            vacancy = vacancy_result.scalar_one_or_none()
+            vacancy = application.vacancy
 
             # Формируем детальную информацию
             text = format_application_details(application, vacancy, include_description=False)
@@ -714,18 +866,16 @@ def setup_handlers(dp: Dispatcher):
             await query.message.edit_text(text, parse_mode="HTML", reply_markup=keyboard)
 
     @dp.callback_query(ProcessCallback.filter())
-    async def process_status_handler(query: CallbackQuery, callback_data: ProcessCallback, user: TelegramUser) -> None:
+    async def process_status_handler(query: CallbackQuery, callback_data: ProcessCallback, user: TelegramUser, session: AsyncSession = None) -> None:
         await query.answer()
 
         if not user.has_permission('change_status'):
             await query.answer("❌ У вас нет прав для изменения статуса", show_alert=True)
             return
 
-        async with AsyncSessionLocal() as session:
-            # Получаем отклик
-            app_stmt = select(Application).where(Application.id == callback_data.application_id)
-            app_result = await session.execute(app_stmt)
-            application = app_result.scalar_one_or_none()
+        async with session_scope(session) as session:
+            # Получаем отклик вместе с вакансией
+            application = await _load_application_card(session, callback_data.application_id)
 
             if not application:
                 await query.message.edit_text("❌ Отклик не найден")
@@ -758,11 +908,10 @@ def setup_handlers(dp: Dispatcher):
 
             # Сохраняем изменения
             await session.commit()
+            invalidate_stats()
 
-            # Получаем вакансию для обновления информации
-            vacancy_stmt = select(Vacancy).where(Vacancy.id == application.vacancy_id)
-            vacancy_result = await session.execute(vacancy_stmt)
-            vacancy = vacancy_result.scalar_one_or_none()
+            # Вакансия загружена вместе с откликом
+            vacancy = application.vacancy
 
             # Обновляем сообщение с новой информацией
             from bot.utils.formatters import format_application_details
@@ -815,7 +964,7 @@ def setup_handlers(dp: Dispatcher):
             asyncio.create_task(delete_message_after_delay(status_msg, 1))
 
     @dp.message(lambda message: message.from_user.id in user_description_states and message.text and not message.text.startswith('/'))
-    async def handle_description_input(message: Message, user: TelegramUser) -> None:
+    async def handle_description_input(message: Message, user: TelegramUser, session: AsyncSession = None) -> None:
         """Обрабатывает ввод описания обработки отклика"""
         from bot.utils.formatters import format_application_details
 
@@ -848,11 +997,9 @@ def setup_handlers(dp: Dispatcher):
             )
             return
 
-        async with AsyncSessionLocal() as session:
-            # Получаем отклик
-            app_stmt = select(Application).where(Application.id == application_id)
-            app_result = await session.execute(app_stmt)
-            application = app_result.scalar_one_or_none()
+        async with session_scope(session) as session:
+            # Получаем отклик вместе с вакансией
+            application = await _load_application_card(session, application_id)
 
             if not application:
                 del user_description_states[message.from_user.id]
@@ -865,11 +1012,9 @@ def setup_handlers(dp: Dispatcher):
                 application.is_processed = True
 
             await session.commit()
+            invalidate_stats()
 
-            # Получаем вакансию
-            vacancy_stmt = select(Vacancy).where(Vacancy.id == application.vacancy_id)
-            vacancy_result = await session.execute(vacancy_stmt)
-            vacancy = vacancy_result.scalar_one_or_none()
+            vacancy = application.vacancy
 
             # Очищаем состояние
             del user_description_states[message.from_user.id]
@@ -949,7 +1094,7 @@ def setup_handlers(dp: Dispatcher):
             asyncio.create_task(delete_message_after_delay(message, 2))
 
     @dp.callback_query(DescriptionCallback.filter())
-    async def description_handler(query: CallbackQuery, callback_data: DescriptionCallback, user: TelegramUser) -> None:
+    async def description_handler(query: CallbackQuery, callback_data: DescriptionCallback, user: TelegramUser, session: AsyncSession = None) -> None:
         """Обрабатывает просмотр и редактирование описания обработки"""
         from bot.utils.formatters import format_application_details
 
@@ -959,20 +1104,15 @@ def setup_handlers(dp: Dispatcher):
             await query.answer("❌ У вас нет прав для просмотра откликов", show_alert=True)
             return
 
-        async with AsyncSessionLocal() as session:
-            # Получаем отклик
-            app_stmt = select(Application).where(Application.id == callback_data.application_id)
-            app_result = await session.execute(app_stmt)
-            application = app_result.scalar_one_or_none()
+        async with session_scope(session) as session:
+            # Получаем отклик вместе с вакансией
+            application = await _load_application_card(session, callback_data.application_id)
 
             if not application:
                 await query.message.edit_text("❌ Отклик не найден")
                 return
 
-            # Получаем вакансию
-            vacancy_stmt = select(Vacancy).where(Vacancy.id == application.vacancy_id)
-            vacancy_result = await session.execute(vacancy_stmt)
-            vacancy = vacancy_result.scalar_one_or_none()
+            vacancy = application.vacancy
 
             if callback_data.action == "view":
                 # Показываем полную информацию с описанием
@@ -1092,8 +1232,14 @@ def setup_handlers(dp: Dispatcher):
                     await query.message.edit_text("❌ Отклик не найден")
                     return
 
-                # Удаляем файл если он существует
-                if application.file_path and os.path.exists(application.file_path):
+                from shared.services.resume_storage import ResumeStorage
+                resume_storage = ResumeStorage()
+
+                # Файл из хранилища удаляем, только если на него не ссылаются другие отклики
+                orphan_path = None
+                if application.file_sha256:
+                    orphan_path = await resume_storage.release(session, application.file_sha256)
+                elif application.file_path and os.path.exists(application.file_path):
                     try:
                         os.remove(application.file_path)
                         print(f"Удален файл: {application.file_path}")
@@ -1104,6 +1250,9 @@ def setup_handlers(dp: Dispatcher):
                 from datetime import datetime
                 application.deleted_at = datetime.now()
                 await session.commit()
+                invalidate_stats()
+
+                await resume_storage.purge(orphan_path)
 
                 # Показываем уведомление об удалении
                 await query.message.edit_text(
@@ -1118,36 +1267,8 @@ def setup_handlers(dp: Dispatcher):
                 # Возвращаемся к соответствующему меню в зависимости от источника
                 if callback_data.source == "unprocessed":
                     # Возвращаемся к списку необработанных откликов
-                    async with AsyncSessionLocal() as session:
-                        stmt = _build_unprocessed_stmt(user)
-                        result = await session.execute(stmt)
-                        unprocessed_applications = result.scalars().all()
-
-                        if not unprocessed_applications:
-                            await query.message.edit_text("✅ Все отклики обработаны!", parse_mode="HTML")
-                            return
-
-                        keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-
-                        for app in unprocessed_applications:
-                            button_text = app.name
-                            if app.phone:
-                                button_text += f" - {app.phone}"
-                            if app.email:
-                                button_text += f" - {app.email}"
-
-                            button_text = f"❌ {button_text}"
-
-                            button = InlineKeyboardButton(
-                                text=button_text,
-                                callback_data=ApplicationCallback(application_id=app.id, source="unprocessed").pack()
-                            )
-                            keyboard.inline_keyboard.append([button])
-
-                        text = f"❌ <b>Необработанные отклики ({len(unprocessed_applications)}):</b>\n\n"
-                        text += "Выберите отклик для просмотра и обработки:"
-
-                        await query.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+                    back_callback = BackCallback(to="unprocessed")
+                    await back_handler(query, back_callback, user)
 
                 elif callback_data.source == "vacancy":
                     # Возвращаемся к списку откликов вакансии
@@ -1222,6 +1343,7 @@ def setup_handlers(dp: Dispatcher):
                 ).values(deleted_at=now)
                 apps_result = await session.execute(apps_update)
                 await session.commit()
+                invalidate_stats()
 
                 await query.message.edit_text(
                     f"✅ Вакансия <b>{vacancy.title}</b> удалена\n"
@@ -1251,6 +1373,7 @@ def setup_handlers(dp: Dispatcher):
             ).values(is_processed=True)
             result = await session.execute(stmt)
             await session.commit()
+            invalidate_stats()
 
             await query.answer(f"✅ Отмечено как обработанные: {result.rowcount}", show_alert=True)
 
@@ -1275,247 +1398,34 @@ def setup_handlers(dp: Dispatcher):
                 pass  # Игнорируем ошибки если сообщение уже удалено
             del user_resume_messages[user_id]
 
-        if callback_data.to == "vacancies":
-            # Возвращаемся к списку вакансий
-            async with AsyncSessionLocal() as session:
-                stmt = select(Vacancy).where(Vacancy.deleted_at.is_(None)).order_by(desc(Vacancy.created_at))
-                result = await session.execute(stmt)
-                vacancies = result.scalars().all()
-
-                if not vacancies:
-                    await query.message.edit_text("Пока нет вакансий")
-                    return
-
-                keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-
-                for vacancy in vacancies:
-                    count_stmt = select(Application).where(Application.vacancy_id == vacancy.id, Application.deleted_at.is_(None))
-                    count_result = await session.execute(count_stmt)
-                    applications_count = len(count_result.scalars().all())
-
-                    button_text = f"{vacancy.title} ({applications_count} откликов)"
-                    button = InlineKeyboardButton(
-                        text=button_text,
-                        callback_data=VacancyCallback(vacancy_id=vacancy.id).pack()
-                    )
-                    keyboard.inline_keyboard.append([button])
-
-                await query.message.edit_text("📋 Выберите вакансию для просмотра откликов:", reply_markup=keyboard)
-
-        elif callback_data.to == "applications":
-            # Возвращаемся к списку откликов конкретной вакансии
-            async with AsyncSessionLocal() as session:
-                vacancy_stmt = select(Vacancy).where(Vacancy.id == callback_data.vacancy_id)
-                vacancy_result = await session.execute(vacancy_stmt)
-                vacancy = vacancy_result.scalar_one_or_none()
-
-                if not vacancy:
-                    await query.message.edit_text("Вакансия не найдена")
-                    return
-
-                apps_stmt = select(Application).where(Application.vacancy_id == callback_data.vacancy_id, Application.deleted_at.is_(None)).order_by(desc(Application.created_at))
-                apps_result = await session.execute(apps_stmt)
-                applications = apps_result.scalars().all()
-
-                if not applications:
-                    await query.message.edit_text(f"📋 Вакансия: {vacancy.title}\n\nОткликов пока нет")
-                    return
-
-                keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-
-                for app in applications:
-                    button_text = app.name
-                    if app.phone:
-                        button_text += f" - {app.phone}"
-                    if app.email:
-                        button_text += f" - {app.email}"
-
-                    status = "✅" if app.is_processed else "❌"
-                    button_text = f"{status} {button_text}"
-
-                    button = InlineKeyboardButton(
-                        text=button_text,
-                        callback_data=ApplicationCallback(application_id=app.id).pack()
-                    )
-                    keyboard.inline_keyboard.append([button])
-
-                # Добавляем кнопку "Назад к вакансиям"
-                back_button = InlineKeyboardButton(
-                    text="⬅️ Назад к вакансиям",
-                    callback_data=BackCallback(to="vacancies").pack()
-                )
-                keyboard.inline_keyboard.append([back_button])
-
-                text = f"📋 Вакансия: <b>{vacancy.title}</b>\n"
-                text += f"📊 Всего откликов: <b>{len(applications)}</b>\n\n"
-                text += "Выберите отклик для просмотра подробностей:"
-
-                await query.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
-
-        elif callback_data.to == "unprocessed":
-            # Возвращаемся к списку необработанных откликов
-            async with AsyncSessionLocal() as session:
-                stmt = _build_unprocessed_stmt(user)
-                result = await session.execute(stmt)
-                unprocessed_applications = result.scalars().all()
-
-                if not unprocessed_applications:
-                    await query.message.edit_text("✅ Все отклики обработаны!")
-                    return
-
-                keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-
-                for app in unprocessed_applications:
-                    button_text = app.name
-                    if app.phone:
-                        button_text += f" - {app.phone}"
-                    if app.email:
-                        button_text += f" - {app.email}"
-
-                    button_text = f"❌ {button_text}"
-
-                    button = InlineKeyboardButton(
-                        text=button_text,
-                        callback_data=ApplicationCallback(application_id=app.id, source="unprocessed").pack()
-                    )
-                    keyboard.inline_keyboard.append([button])
-
-                text = f"❌ <b>Необработанные отклики ({len(unprocessed_applications)}):</b>\n\n"
-                text += "Выберите отклик для просмотра и обработки:"
+        async with AsyncSessionLocal() as session:
+            if callback_data.to == "vacancies":
+                # Возвращаемся к списку вакансий
+                text, keyboard = await _render_vacancies_page(session, user)
+            elif callback_data.to == "applications":
+                # Возвращаемся к списку откликов конкретной вакансии
+                text, keyboard = await _render_vacancy_applications_page(session, callback_data.vacancy_id)
+            elif callback_data.to == "unprocessed":
+                # Возвращаемся к списку необработанных откликов
+                text, keyboard = await _render_unprocessed_page(session, user)
+            else:
+                return
 
-                await query.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+        await query.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
 
     async def do_export(message: Message, user: TelegramUser, filter_type: str = "all") -> None:
-        status_msg = await message.answer("📊 Создаю Excel файл с откликами...")
-
-        try:
-            async with AsyncSessionLocal() as session:
-                from sqlalchemy.orm import selectinload
+        # Excel собирается в очереди задач, результат придет в этот же чат
+        status_msg = await message.answer("📊 Экспорт поставлен в очередь...")
 
-                # Получаем все не удаленные отклики с вакансиями
-                stmt = select(Application).options(selectinload(Application.vacancy)).where(
-                    Application.deleted_at.is_(None)
-                )
-
-                # Добавляем фильтр по статусу обработки, если нужно
-                if filter_type == "unprocessed":
-                    stmt = stmt.where(Application.is_processed == False)
-
-                stmt = stmt.order_by(desc(Application.created_at))
-                result = await session.execute(stmt)
-                applications = result.scalars().all()
-
-                if not applications:
-                    filter_text = "необработанных откликов" if filter_type == "unprocessed" else "откликов"
-                    await status_msg.edit_text(f"📭 Нет {filter_text} для экспорта")
-                    import asyncio
-                    asyncio.create_task(delete_message_after_delay(status_msg, 2))
-                    asyncio.create_task(delete_message_after_delay(message, 2))
-                    return
-
-                # Создаем Excel файл
-                from openpyxl import Workbook
-                from openpyxl.styles import Font, PatternFill, Alignment
-                from datetime import datetime
-
-                wb = Workbook()
-                ws = wb.active
-                ws.title = "Отклики на вакансии"
-
-                # Заголовки
-                headers = [
-                    "ID", "Имя", "Email", "Телефон", "Вакансия",
-                    "Статус", "Дата отклика", "Сообщение", "Описание обработки", "Файл", "Анализ резюме"
-                ]
-
-                # Стиль заголовков
-                header_font = Font(bold=True, color="FFFFFF")
-                header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-
-                for col, header in enumerate(headers, 1):
-                    cell = ws.cell(row=1, column=col, value=header)
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = Alignment(horizontal="center")
-
-                # Данные
-                for row, app in enumerate(applications, 2):
-                    ws.cell(row=row, column=1, value=app.id)
-                    ws.cell(row=row, column=2, value=app.name or "")
-                    ws.cell(row=row, column=3, value=app.email or "")
-                    ws.cell(row=row, column=4, value=app.phone or "")
-                    ws.cell(row=row, column=5, value=app.vacancy.title if app.vacancy else "")
-                    ws.cell(row=row, column=6, value="Обработан" if app.is_processed else "Не обработан")
-                    ws.cell(row=row, column=7, value=app.created_at.strftime('%d.%m.%Y %H:%M') if app.created_at else "")
-
-                    # Колонка "Сообщение" с переносом текста
-                    message_cell = ws.cell(row=row, column=8, value=app.applicant_message or "")
-                    message_cell.alignment = Alignment(wrap_text=True, vertical="top")
-
-                    # Колонка "Описание обработки" с переносом текста
-                    description_cell = ws.cell(row=row, column=9, value=app.processing_description or "")
-                    description_cell.alignment = Alignment(wrap_text=True, vertical="top")
-
-                    ws.cell(row=row, column=10, value=app.attachment_filename or "")
-
-                    # Колонка "Анализ резюме" с очищенным от HTML текстом
-                    summary_text = clean_html_tags(app.summary) if app.summary else ""
-                    summary_cell = ws.cell(row=row, column=11, value=summary_text)
-                    summary_cell.alignment = Alignment(wrap_text=True, vertical="top")
-
-                # Автоширина колонок
-                for column in ws.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    ws.column_dimensions[column_letter].width = adjusted_width
-
-                # Сохраняем файл
-                filename = f"отклики_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-                file_path = f"exports/{filename}"
-
-                # Создаем директорию если её нет
-                import os
-                os.makedirs("exports", exist_ok=True)
-
-                wb.save(file_path)
-
-                # Отправляем файл
-                from aiogram.types import FSInputFile
-                file = FSInputFile(file_path, filename=filename)
-
-                export_type_text = "Только необработанные" if filter_type == "unprocessed" else "Все отклики"
-                await status_msg.edit_text(f"✅ Excel файл готов!\nОтклики: {len(applications)}")
-                await message.answer_document(
-                    file,
-                    caption=f"📊 Экспорт откликов\n\n"
-                           f"Тип: {export_type_text}\n"
-                           f"Всего откликов: {len(applications)}\n"
-                           f"Создан: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
-                )
-
-                # Удаляем временный файл
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-
-                # Удаляем сообщения через 2 секунды
-                import asyncio
-                asyncio.create_task(delete_message_after_delay(status_msg, 2))
-                asyncio.create_task(delete_message_after_delay(message, 2))
-
-        except Exception as e:
-            await status_msg.edit_text(f"❌ Ошибка создания Excel: {str(e)}")
+        job_id, created = await enqueue(
+            "export",
+            {"chat_id": message.chat.id, "status_message_id": status_msg.message_id, "filter_type": filter_type},
+            idempotency_key=f"export:{message.chat.id}:{filter_type}",
+        )
+        if not created:
+            await status_msg.edit_text("⏳ Такой экспорт уже готовится, дождитесь файла")
             import asyncio
-            asyncio.create_task(delete_message_after_delay(status_msg, 2))
-            asyncio.create_task(delete_message_after_delay(message, 2))
+            asyncio.create_task(delete_message_after_delay(status_msg, 3))
 
     @dp.message(Command("export"))
     @moderator_or_admin
@@ -1570,8 +1480,13 @@ def setup_handlers(dp: Dispatcher):
         if callback_data.action == "show":
             # Показываем готовый summary
             async with AsyncSessionLocal() as session:
-                # Получаем отклик
-                app_stmt = select(Application).where(Application.id == callback_data.application_id)
+                # Получаем отклик вместе с отложенным summary
+                from sqlalchemy.orm import undefer
+                app_stmt = (
+                    select(Application)
+                    .options(undefer(Application.summary))
+                    .where(Application.id == callback_data.application_id)
+                )
                 app_result = await session.execute(app_stmt)
                 application = app_result.scalar_one_or_none()
 
@@ -1589,56 +1504,19 @@ def setup_handlers(dp: Dispatcher):
         elif callback_data.action == "generate":
             status_msg = await query.message.answer("🤖 Генерирую анализ резюме...")
 
-            try:
-                async with AsyncSessionLocal() as session:
-                    # Получаем отклик
-                    app_stmt = select(Application).where(Application.id == callback_data.application_id)
-                    app_result = await session.execute(app_stmt)
-                    application = app_result.scalar_one_or_none()
-
-                    if not application:
-                        await status_msg.edit_text("❌ Отклик не найден")
-                        return
-
-                    # Получаем вакансию
-                    vacancy_stmt = select(Vacancy).where(Vacancy.id == application.vacancy_id)
-                    vacancy_result = await session.execute(vacancy_stmt)
-                    vacancy = vacancy_result.scalar_one_or_none()
-
-                    # Создаем сервис для генерации summary
-                    summary_service = ResumeSummaryService()
-
-                    # Генерируем summary
-                    summary = await summary_service.generate_summary_for_application(application, vacancy)
-
-                    if summary:
-                        # Сохраняем summary в базу данных
-                        application.summary = summary
-                        await session.commit()
-
-                        await status_msg.edit_text("✅ Анализ резюме сгенерирован!")
-
-                        # Отправляем сгенерированный summary с кнопкой для генерации вопросов
-                        summary_msg = f"🤖 <b>Анализ резюме для {application.name}:</b>\n\n{summary}"
-                        questions_keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                            [InlineKeyboardButton(
-                                text="❓ Сгенерировать вопросы для собеседования",
-                                callback_data=QuestionsCallback(application_id=application.id, action="generate").pack()
-                            )]
-                        ])
-                        await query.message.answer(summary_msg, parse_mode="HTML", reply_markup=questions_keyboard)
-
-                        # Удаляем статусное сообщение через 2 секунды
-                        import asyncio
-                        asyncio.create_task(delete_message_after_delay(status_msg, 2))
-
-                    else:
-                        await status_msg.edit_text("❌ Не удалось сгенерировать анализ резюме")
-                        import asyncio
-                        asyncio.create_task(delete_message_after_delay(status_msg, 3))
-
-            except Exception as e:
-                await status_msg.edit_text(f"❌ Ошибка при генерации анализа: {str(e)}")
+            # Генерация идет в очереди задач, результат придет в этот же чат
+            job_id, created = await enqueue(
+                "summary",
+                {
+                    "application_id": callback_data.application_id,
+                    "chat_id": query.message.chat.id,
+                    "status_message_id": status_msg.message_id,
+                },
+                priority=PRIORITY_HIGH,
+                idempotency_key=f"summary:{callback_data.application_id}:{query.message.chat.id}",
+            )
+            if not created:
+                await status_msg.edit_text("⏳ Анализ этого резюме уже генерируется")
                 import asyncio
                 asyncio.create_task(delete_message_after_delay(status_msg, 3))
 
@@ -1653,59 +1531,18 @@ def setup_handlers(dp: Dispatcher):
         if callback_data.action == "generate":
             status_msg = await query.message.answer("🤖 Генерирую вопросы для собеседования...")
 
-            try:
-                async with AsyncSessionLocal() as session:
-                    # Получаем отклик
-                    app_stmt = select(Application).where(Application.id == callback_data.application_id)
-                    app_result = await session.execute(app_stmt)
-                    application = app_result.scalar_one_or_none()
-
-                    if not application:
-                        await status_msg.edit_text("❌ Отклик не найден")
-                        return
-
-                    # Проверяем наличие файла резюме
-                    if not application.file_path:
-                        await status_msg.edit_text("❌ Файл резюме не найден")
-                        return
-
-                    # Получаем вакансию
-                    vacancy_stmt = select(Vacancy).where(Vacancy.id == application.vacancy_id)
-                    vacancy_result = await session.execute(vacancy_stmt)
-                    vacancy = vacancy_result.scalar_one_or_none()
-
-                    # Извлекаем текст из резюме
-                    from shared.services.document_extractor import DocumentTextExtractor
-                    from shared.services.gemini_service import GeminiService
-
-                    extractor = DocumentTextExtractor()
-                    resume_text = extractor.extract_text_from_file(application.file_path)
-
-                    if not resume_text:
-                        await status_msg.edit_text("❌ Не удалось извлечь текст из резюме")
-                        return
-
-                    # Генерируем вопросы через Gemini
-                    gemini_service = GeminiService()
-                    vacancy_title = vacancy.title if vacancy else ""
-                    questions = gemini_service.generate_interview_questions(resume_text, vacancy_title)
-
-                    if questions:
-                        await status_msg.edit_text("✅ Вопросы сгенерированы!")
-
-                        # Отправляем вопросы
-                        await query.message.answer(questions, parse_mode="HTML")
-
-                        # Удаляем статусное сообщение через 2 секунды
-                        import asyncio
-                        asyncio.create_task(delete_message_after_delay(status_msg, 2))
-                    else:
-                        await status_msg.edit_text("❌ Не удалось сгенерировать вопросы")
-                        import asyncio
-                        asyncio.create_task(delete_message_after_delay(status_msg, 3))
-
-            except Exception as e:
-                await status_msg.edit_text(f"❌ Ошибка при генерации вопросов: {str(e)}")
+            job_id, created = await enqueue(
+                "questions",
+                {
+                    "application_id": callback_data.application_id,
+                    "chat_id": query.message.chat.id,
+                    "status_message_id": status_msg.message_id,
+                },
+                priority=PRIORITY_HIGH,
+                idempotency_key=f"questions:{callback_data.application_id}:{query.message.chat.id}",
+            )
+            if not created:
+                await status_msg.edit_text("⏳ Вопросы по этому резюме уже генерируются")
                 import asyncio
                 asyncio.create_task(delete_message_after_delay(status_msg, 3))
 
@@ -1941,6 +1778,7 @@ def setup_handlers(dp: Dispatcher):
                 # Отвязываем
                 gmail_account.user_id = None
                 await session.commit()
+                invalidate_stats()
 
                 await query.answer("✅ Аккаунт отвязан от пользователя", show_alert=True)
 
@@ -1966,6 +1804,7 @@ def setup_handlers(dp: Dispatcher):
                 # Привязываем к пользователю
                 gmail_account.user_id = callback_data.user_id
                 await session.commit()
+                invalidate_stats()
 
                 # Получаем пользователя для отображения
                 linked_user = await session.get(TelegramUser, callback_data.user_id)
@@ -2081,6 +1920,7 @@ def setup_handlers(dp: Dispatcher):
                 # Удаляем из БД
                 await session.delete(account)
                 await session.commit()
+                invalidate_stats()
 
                 await query.message.edit_text(
                     f"✅ Аккаунт <b>{account_name}</b> успешно удален",
@@ -2131,6 +1971,7 @@ def setup_handlers(dp: Dispatcher):
                 status_msg = f"❌ Аккаунт <b>{account.name}</b> отключен"
 
             await session.commit()
+            invalidate_stats()
 
             # Показываем уведомление
             notification = await query.message.answer(status_msg, parse_mode="HTML")
@@ -2307,39 +2148,9 @@ def setup_handlers(dp: Dispatcher):
     async def users_handler(message: Message, user: TelegramUser) -> None:
         """Показывает список всех пользователей бота"""
         async with AsyncSessionLocal() as session:
-            stmt = select(TelegramUser).order_by(TelegramUser.created_at.desc())
-            result = await session.execute(stmt)
-            users = result.scalars().all()
-
-            if not users:
-                await message.answer("📭 Нет пользователей")
-                return
-
-            # Создаем клавиатуру с пользователями
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-
-            for u in users:
-                role_emoji = {
-                    RoleEnum.USER: "👤",
-                    RoleEnum.MODERATOR: "👨‍💼",
-                    RoleEnum.ADMIN: "👑"
-                }.get(u.role, "👤")
-
-                button_text = f"{role_emoji} {u.first_name or 'Unknown'}"
-                if u.username:
-                    button_text += f" (@{u.username})"
-
-                button = InlineKeyboardButton(
-                    text=button_text,
-                    callback_data=UserCallback(user_id=u.id).pack()
-                )
-                keyboard.inline_keyboard.append([button])
+            text, keyboard = await _render_users_page(session)
 
-            text = "👥 <b>Пользователи бота</b>\n\n"
-            text += f"Всего: <b>{len(users)}</b>\n\n"
-            text += "Выберите пользователя для управления:"
-
-            await message.answer(text, reply_markup=keyboard, parse_mode="HTML")
+        await message.answer(text, reply_markup=keyboard, parse_mode="HTML")
 
     @dp.callback_query(UserCallback.filter())
     async def user_details_handler(query: CallbackQuery, callback_data: UserCallback, user: TelegramUser) -> None:
@@ -2445,6 +2256,7 @@ def setup_handlers(dp: Dispatcher):
             new_role = RoleEnum[callback_data.role.upper()]
             selected_user.role = new_role
             await session.commit()
+            user_cache.invalidate(selected_user.telegram_id)
 
             role_name = {
                 RoleEnum.USER: "Пользователь",
@@ -2476,35 +2288,9 @@ def setup_handlers(dp: Dispatcher):
             return
 
         async with AsyncSessionLocal() as session:
-            stmt = select(TelegramUser).order_by(TelegramUser.created_at.desc())
-            result = await session.execute(stmt)
-            users = result.scalars().all()
-
-            # Создаем клавиатуру с пользователями
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-
-            for u in users:
-                role_emoji = {
-                    RoleEnum.USER: "👤",
-                    RoleEnum.MODERATOR: "👨‍💼",
-                    RoleEnum.ADMIN: "👑"
-                }.get(u.role, "👤")
+            text, keyboard = await _render_users_page(session)
 
-                button_text = f"{role_emoji} {u.first_name or 'Unknown'}"
-                if u.username:
-                    button_text += f" (@{u.username})"
-
-                button = InlineKeyboardButton(
-                    text=button_text,
-                    callback_data=UserCallback(user_id=u.id).pack()
-                )
-                keyboard.inline_keyboard.append([button])
-
-            text = "👥 <b>Пользователи бота</b>\n\n"
-            text += f"Всего: <b>{len(users)}</b>\n\n"
-            text += "Выберите пользователя для управления:"
-
-            await query.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+        await query.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
 
     @dp.message(Command("cancel"))
     async def cancel_handler(message: Message) -> None:
@@ -0,0 +1,189 @@
+"""
+Конвейер обработки писем на asyncio.Queue
+
+Каждая стадия (получение, разбор, загрузка вложения, сохранение) работает своими
+воркерами и читает из ограниченной очереди. Стадии выполняются одновременно: пока одно
+письмо сохраняется в БД, следующее разбирается, а для третьего качается вложение.
+Заполненная очередь останавливает предыдущую стадию (backpressure), поэтому память
+не растет, если одна из стадий медленнее остальных.
+"""
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+
+logger = logging.getLogger(__name__)
+
+
+class StageMetrics:
+    """Счетчики одной стадии: обработано, ошибок, занятость воркеров и глубина очереди"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+
+    def sample_depth(self, depth):
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    @property
+    def avg_depth(self):
+        return self._depth_total / self._depth_samples if self._depth_samples else 0.0
+
+    def as_dict(self, elapsed):
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "throughput": self.processed / elapsed if elapsed > 0 else 0.0,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "max_depth": self.max_depth,
+            "avg_depth": round(self.avg_depth, 2),
+        }
+
+
+class Stage:
+    """
+    Стадия конвейера
+
+    Args:
+        name: Имя стадии для метрик
+        handler: async handler(item, emit) — emit(next_item) передает результат дальше;
+            не вызванный emit означает, что элемент отфильтрован
+        workers: Количество параллельных воркеров
+        queue_size: Размер входной очереди (0 — без ограничения)
+        batch_size: Если больше 1, handler получает список из уже накопившихся
+            в очереди элементов (не больше batch_size)
+    """
+
+    def __init__(self, name, handler, workers=1, queue_size=None, batch_size=1):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.batch_size = max(1, batch_size)
+
+
+class Pipeline:
+    """
+    Запускает стадии над элементами из async-генератора source
+
+    Args:
+        on_error: on_error(item, error) вызывается для каждого элемента пачки, на которой
+            упал обработчик стадии — например, чтобы не двигать чекпоинт мимо этих элементов
+    """
+
+    def __init__(self, stages, queue_size=100, source_name="list", on_error=None):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.on_error = on_error
+        self.source_metrics = StageMetrics(source_name, 1)
+        self.metrics = [StageMetrics(stage.name, stage.workers) for stage in stages]
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def snapshot(self):
+        """Текущие метрики всех стадий"""
+        elapsed = self.elapsed
+        return [self.source_metrics.as_dict(elapsed)] + [metrics.as_dict(elapsed) for metrics in self.metrics]
+
+    def format_metrics(self):
+        """Метрики одной строкой на стадию для лога"""
+        lines = []
+        for item in self.snapshot():
+            lines.append(
+                f"{item['stage']}: {item['processed']} шт ({item['throughput']:.1f}/с), "
+                f"ошибок {item['failed']}, воркеров {item['workers']}, занято {item['busy_seconds']:.1f}с, "
+                f"очередь макс {item['max_depth']} / сред {item['avg_depth']}"
+            )
+        return "\n".join(lines)
+
+    async def _worker(self, stage, metrics, queue, emit):
+        while True:
+            items = [await queue.get()]
+            while len(items) < stage.batch_size and not queue.empty():
+                items.append(queue.get_nowait())
+
+            started = time.monotonic()
+            try:
+                await stage.handler(items if stage.batch_size > 1 else items[0], emit)
+                metrics.processed += len(items)
+            except Exception as e:
+                # Ошибка одного элемента не должна останавливать воркер — иначе join() зависнет
+                metrics.failed += len(items)
+                logger.exception(f"Ошибка на стадии {stage.name} ({len(items)} шт): {e}")
+                if self.on_error is not None:
+                    for item in items:
+                        try:
+                            self.on_error(item, e)
+                        except Exception:
+                            logger.exception(f"Ошибка в on_error стадии {stage.name}")
+            finally:
+                metrics.busy_seconds += time.monotonic() - started
+                for _ in items:
+                    queue.task_done()
+
+    async def run(self, source):
+        """
+        Прогоняет все элементы source через стадии и ждет их завершения
+
+        Returns:
+            Метрики стадий (см. snapshot)
+        """
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        queues = [
+            asyncio.Queue(maxsize=stage.queue_size if stage.queue_size is not None else self.queue_size)
+            for stage in self.stages
+        ]
+
+        def make_emit(index):
+            if index >= len(queues):
+                async def discard(item):
+                    pass
+                return discard
+
+            queue, metrics = queues[index], self.metrics[index]
+
+            async def emit(item):
+                await queue.put(item)
+                metrics.sample_depth(queue.qsize())
+            return emit
+
+        workers = [
+            asyncio.create_task(self._worker(stage, self.metrics[index], queues[index], make_emit(index + 1)))
+            for index, stage in enumerate(self.stages)
+            for _ in range(stage.workers)
+        ]
+        emit_first = make_emit(0)
+
+        try:
+            async with aclosing(source) as items:
+                async for item in items:
+                    self.source_metrics.processed += 1
+                    await emit_first(item)
+
+            # Элементы идут только вперед, поэтому достаточно дождаться очередей по порядку
+            for queue in queues:
+                await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.finished_at = time.monotonic()
+
+        return self.snapshot()
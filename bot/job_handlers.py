@@ -0,0 +1,314 @@
+"""
+Обработчики фоновых задач: анализ резюме, вопросы, экспорт, уведомления, извлечение текста резюме
+
+Каждый обработчик получает bot и payload задачи и сам пишет результат в чат.
+Исключение (в том числе JobError) означает неудачную попытку — задача повторится.
+"""
+import asyncio
+import os
+from datetime import datetime
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, FSInputFile
+from sqlalchemy import desc, select
+from sqlalchemy.orm import selectinload, undefer, undefer_group
+
+from bot.handlers import QuestionsCallback, clean_html_tags
+from bot.jobs import job_handler, JobError, enqueue, PRIORITY_LOW
+from shared.database.database import AsyncSessionLocal
+from shared.models.vacancy import Application, Vacancy
+from shared.models.user import TelegramUser, RoleEnum
+from shared.services.resume_summary_service import ResumeSummaryService
+from shared.services.resume_texts import extract_and_store, find_stale_blobs, get_resume_text
+
+
+async def _set_status(bot, payload, text):
+    """Обновляет статусное сообщение задачи"""
+    if not payload.get("status_message_id"):
+        return
+    try:
+        await bot.edit_message_text(text, chat_id=payload["chat_id"], message_id=payload["status_message_id"])
+    except Exception:
+        pass
+
+
+async def _delete_status_later(bot, payload, delay_seconds):
+    """Удаляет статусное сообщение задачи через указанное количество секунд"""
+    if not payload.get("status_message_id"):
+        return
+
+    async def delete():
+        await asyncio.sleep(delay_seconds)
+        try:
+            await bot.delete_message(chat_id=payload["chat_id"], message_id=payload["status_message_id"])
+        except Exception:
+            pass  # Игнорируем ошибки если сообщение уже удалено
+
+    asyncio.create_task(delete())
+
+
+async def _load_application(session, application_id):
+    # Сопроводительное письмо отложено (группа "heavy"), а нужно для анализа
+    application = await session.get(
+        Application, application_id, options=[undefer(Application.applicant_message)]
+    )
+    vacancy = None
+    if application and application.vacancy_id:
+        vacancy = await session.get(Vacancy, application.vacancy_id)
+    return application, vacancy
+
+
+@job_handler("summary", failure_text="❌ Ошибка при генерации анализа")
+async def summary_job(bot, payload):
+    async with AsyncSessionLocal() as session:
+        application, vacancy = await _load_application(session, payload["application_id"])
+
+        if not application:
+            await _set_status(bot, payload, "❌ Отклик не найден")
+            return
+
+        # Без файла резюме повтор не поможет
+        if not application.file_path and not application.attachment_filename:
+            await _set_status(bot, payload, "❌ Не удалось сгенерировать анализ резюме")
+            await _delete_status_later(bot, payload, 3)
+            return
+
+        summary_service = ResumeSummaryService()
+        summary = await summary_service.generate_summary_for_application(application, vacancy)
+        if not summary:
+            raise JobError("Не удалось сгенерировать анализ резюме")
+
+        # Сохраняем summary в базу данных
+        application.summary = summary
+        await session.commit()
+
+    await _set_status(bot, payload, "✅ Анализ резюме сгенерирован!")
+
+    # Отправляем сгенерированный summary с кнопкой для генерации вопросов
+    summary_msg = f"🤖 <b>Анализ резюме для {application.name}:</b>\n\n{summary}"
+    questions_keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(
+            text="❓ Сгенерировать вопросы для собеседования",
+            callback_data=QuestionsCallback(application_id=application.id, action="generate").pack()
+        )]
+    ])
+    await bot.send_message(payload["chat_id"], summary_msg, parse_mode="HTML", reply_markup=questions_keyboard)
+    await _delete_status_later(bot, payload, 2)
+
+
+async def enqueue_resume_text(sha256, file_path):
+    """Ставит в очередь извлечение текста файла резюме (одна задача на файл)"""
+    await enqueue(
+        "extract_resume_text",
+        {"sha256": sha256, "file_path": file_path},
+        priority=PRIORITY_LOW,
+        idempotency_key=f"extract_resume_text:{sha256}",
+    )
+
+
+async def enqueue_stale_resume_texts():
+    """Ставит в очередь файлы без извлеченного текста или с текстом от старой версии извлечения"""
+    stale = await find_stale_blobs()
+    for sha256, file_path in stale:
+        await enqueue_resume_text(sha256, file_path)
+    return len(stale)
+
+
+@job_handler("extract_resume_text")
+async def extract_resume_text_job(bot, payload):
+    # Файл могли удалить вместе с последним откликом — тогда и извлекать нечего
+    if not os.path.exists(payload["file_path"]):
+        return
+    await extract_and_store(payload["sha256"], payload["file_path"])
+
+
+@job_handler("questions", failure_text="❌ Ошибка при генерации вопросов")
+async def questions_job(bot, payload):
+    from shared.services.gemini_service import GeminiService, GEMINI_MODEL, QUESTIONS_PROMPT_VERSION
+    from shared.services import llm_cache
+
+    async with AsyncSessionLocal() as session:
+        application, vacancy = await _load_application(session, payload["application_id"])
+
+    if not application:
+        await _set_status(bot, payload, "❌ Отклик не найден")
+        return
+
+    # Проверяем наличие файла резюме
+    if not application.file_path:
+        await _set_status(bot, payload, "❌ Файл резюме не найден")
+        return
+
+    # Текст резюме извлекается один раз на файл (resume_texts)
+    resume_text = await get_resume_text(application.file_path, application.file_sha256)
+    if not resume_text:
+        await _set_status(bot, payload, "❌ Не удалось извлечь текст из резюме")
+        return
+
+    # Генерируем вопросы через Gemini, если для этого резюме и вакансии их еще нет в кеше
+    gemini_service = GeminiService()
+    vacancy_title = vacancy.title if vacancy else ""
+    questions = await llm_cache.get_or_generate(
+        "questions", GEMINI_MODEL, QUESTIONS_PROMPT_VERSION, vacancy_title, (resume_text,),
+        generate=lambda: gemini_service.generate_interview_questions(resume_text, vacancy_title)
+    )
+    if not questions:
+        raise JobError("Не удалось сгенерировать вопросы")
+
+    await _set_status(bot, payload, "✅ Вопросы сгенерированы!")
+    await bot.send_message(payload["chat_id"], questions, parse_mode="HTML")
+    await _delete_status_later(bot, payload, 2)
+
+
+def _build_export_workbook(applications, file_path):
+    """Собирает Excel файл с откликами"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Отклики на вакансии"
+
+    # Заголовки
+    headers = [
+        "ID", "Имя", "Email", "Телефон", "Вакансия",
+        "Статус", "Дата отклика", "Сообщение", "Описание обработки", "Файл", "Анализ резюме"
+    ]
+
+    # Стиль заголовков
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = Alignment(horizontal="center")
+
+    # Данные
+    for row, app in enumerate(applications, 2):
+        ws.cell(row=row, column=1, value=app.id)
+        ws.cell(row=row, column=2, value=app.name or "")
+        ws.cell(row=row, column=3, value=app.email or "")
+        ws.cell(row=row, column=4, value=app.phone or "")
+        ws.cell(row=row, column=5, value=app.vacancy.title if app.vacancy else "")
+        ws.cell(row=row, column=6, value="Обработан" if app.is_processed else "Не обработан")
+        ws.cell(row=row, column=7, value=app.created_at.strftime('%d.%m.%Y %H:%M') if app.created_at else "")
+
+        # Колонка "Сообщение" с переносом текста
+        message_cell = ws.cell(row=row, column=8, value=app.applicant_message or "")
+        message_cell.alignment = Alignment(wrap_text=True, vertical="top")
+
+        # Колонка "Описание обработки" с переносом текста
+        description_cell = ws.cell(row=row, column=9, value=app.processing_description or "")
+        description_cell.alignment = Alignment(wrap_text=True, vertical="top")
+
+        ws.cell(row=row, column=10, value=app.attachment_filename or "")
+
+        # Колонка "Анализ резюме" с очищенным от HTML текстом
+        summary_text = clean_html_tags(app.summary) if app.summary else ""
+        summary_cell = ws.cell(row=row, column=11, value=summary_text)
+        summary_cell.alignment = Alignment(wrap_text=True, vertical="top")
+
+    # Автоширина колонок
+    for column in ws.columns:
+        max_length = 0
+        column_letter = column[0].column_letter
+        for cell in column:
+            try:
+                if len(str(cell.value)) > max_length:
+                    max_length = len(str(cell.value))
+            except:
+                pass
+        adjusted_width = min(max_length + 2, 50)
+        ws.column_dimensions[column_letter].width = adjusted_width
+
+    wb.save(file_path)
+
+
+@job_handler("export", failure_text="❌ Ошибка создания Excel")
+async def export_job(bot, payload):
+    filter_type = payload.get("filter_type", "all")
+
+    async with AsyncSessionLocal() as session:
+        # Получаем все не удаленные отклики с вакансиями
+        stmt = select(Application).options(
+            selectinload(Application.vacancy), undefer_group("heavy")
+        ).where(
+            Application.deleted_at.is_(None)
+        )
+
+        # Добавляем фильтр по статусу обработки, если нужно
+        if filter_type == "unprocessed":
+            stmt = stmt.where(Application.is_processed == False)
+
+        stmt = stmt.order_by(desc(Application.created_at))
+        result = await session.execute(stmt)
+        applications = result.scalars().all()
+
+    if not applications:
+        filter_text = "необработанных откликов" if filter_type == "unprocessed" else "откликов"
+        await _set_status(bot, payload, f"📭 Нет {filter_text} для экспорта")
+        await _delete_status_later(bot, payload, 2)
+        return
+
+    await _set_status(bot, payload, "📊 Создаю Excel файл с откликами...")
+
+    filename = f"отклики_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    file_path = f"exports/{payload['chat_id']}_{filename}"
+
+    # Создаем директорию если её нет
+    os.makedirs("exports", exist_ok=True)
+
+    try:
+        # Сборка книги — долгая синхронная работа, не блокируем event loop
+        await asyncio.to_thread(_build_export_workbook, applications, file_path)
+
+        export_type_text = "Только необработанные" if filter_type == "unprocessed" else "Все отклики"
+        await _set_status(bot, payload, f"✅ Excel файл готов!\nОтклики: {len(applications)}")
+        await bot.send_document(
+            payload["chat_id"],
+            FSInputFile(file_path, filename=filename),
+            caption=f"📊 Экспорт откликов\n\n"
+                    f"Тип: {export_type_text}\n"
+                    f"Всего откликов: {len(applications)}\n"
+                    f"Создан: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+        )
+    finally:
+        # Удаляем временный файл
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+    await _delete_status_later(bot, payload, 2)
+
+
+@job_handler("notify_staff", failure_text=None)
+async def notify_staff_job(bot, payload):
+    async with AsyncSessionLocal() as session:
+        stmt = select(TelegramUser.telegram_id).where(
+            TelegramUser.role.in_([RoleEnum.MODERATOR, RoleEnum.ADMIN])
+        )
+        result = await session.execute(stmt)
+        staff_ids = result.scalars().all()
+
+    text = (
+        "🆕 <b>Новый отклик через бота</b>\n\n"
+        f"📢 Вакансия: <b>{payload.get('vacancy_title', '—')}</b>\n"
+        f"👤 {payload.get('name', '—')}\n"
+        f"📱 {payload.get('phone', '—')}\n"
+        f"📧 {payload.get('email', '—')}\n"
+    )
+    if payload.get("applicant_message"):
+        text += f"📝 {payload['applicant_message'][:300]}\n"
+    if payload.get("attachment_filename"):
+        text += f"📎 {payload['attachment_filename']}\n"
+    text += f"\nID отклика: <code>{payload['application_id']}</code>"
+
+    # Повтор задачи разослал бы уведомление всем заново, поэтому ошибки отправки
+    # отдельным сотрудникам пропускаем, как и раньше
+    for telegram_id in staff_ids:
+        try:
+            await bot.send_message(telegram_id, text, parse_mode="HTML")
+        except Exception:
+            continue
@@ -0,0 +1,262 @@
+"""
+Очередь фоновых задач на таблице jobs
+
+Медленная работа (анализ резюме, вопросы для собеседования, экспорт, уведомления)
+ставится в очередь через enqueue() и выполняется пулом воркеров JobWorkerPool.
+Задачи переживают перезапуск процесса: выполняемая задача держит таймаут видимости
+(locked_until), после которого ее заберет другой воркер. Упавшие задачи повторяются
+с экспоненциальной задержкой, ключ идемпотентности не дает поставить дубликат,
+пока такая же задача ждет или выполняется.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.dialects.sqlite import insert
+
+from shared.database.database import AsyncSessionLocal
+from shared.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Сколько секунд задача считается занятой воркером; дольше — задача отменяется и повторяется
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE = 5
+JOB_BACKOFF_MAX = 600
+
+PRIORITY_LOW = -10
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 10
+
+ACTIVE_STATUSES = ("pending", "running")
+
+# {job_type: (handler, failure_text)}
+_handlers = {}
+# Будит воркеры сразу после enqueue, не дожидаясь следующего опроса
+_wakeup = asyncio.Event()
+
+
+class JobError(Exception):
+    """Ошибка выполнения задачи — задача будет повторена"""
+
+
+def job_handler(job_type, failure_text="❌ Не удалось выполнить задачу"):
+    """
+    Регистрирует обработчик задач типа job_type
+
+    Обработчик вызывается как handler(bot, payload). Исключение означает неудачную
+    попытку; после последней попытки в чат payload["chat_id"] уходит failure_text.
+    """
+    def decorator(func):
+        _handlers[job_type] = (func, failure_text)
+        return func
+    return decorator
+
+
+async def enqueue(job_type, payload, priority=PRIORITY_NORMAL, idempotency_key=None, max_attempts=None):
+    """
+    Ставит задачу в очередь
+
+    Returns:
+        (job_id, created) — created равен False, если активная задача с таким
+        idempotency_key уже есть; тогда возвращается ее id
+    """
+    now = datetime.now()
+    stmt = insert(Job).values(
+        type=job_type,
+        payload=json.dumps(payload, ensure_ascii=False),
+        status="pending",
+        priority=priority,
+        attempts=0,
+        max_attempts=max_attempts or JOB_MAX_ATTEMPTS,
+        run_at=now,
+        idempotency_key=idempotency_key,
+        created_at=now,
+    )
+    if idempotency_key:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[Job.idempotency_key],
+            index_where=Job.status.in_(ACTIVE_STATUSES),
+        )
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(stmt)
+        await session.commit()
+
+        if result.rowcount == 0:
+            existing_id = await session.scalar(
+                select(Job.id).where(Job.idempotency_key == idempotency_key, Job.status.in_(ACTIVE_STATUSES))
+            )
+            return existing_id, False
+
+        job_id = result.inserted_primary_key[0]
+
+    _wakeup.set()
+    return job_id, True
+
+
+class JobWorkerPool:
+    """Пул воркеров, выполняющих задачи из таблицы jobs"""
+
+    def __init__(self, bot, workers=JOB_WORKERS):
+        self.bot = bot
+        self.workers = max(1, workers)
+        self.tasks = []
+
+    async def start_background(self):
+        """Запускает воркеры в фоне"""
+        self.tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+        logger.info(f"🧵 Запущено воркеров очереди задач: {self.workers}")
+
+    async def stop(self):
+        """Останавливает воркеры; прерванные задачи возвращаются в очередь"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        logger.info("⏹️ Очередь задач остановлена")
+
+    async def _worker(self, index):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Ошибка получения задачи из очереди: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(_wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                _wakeup.clear()
+                continue
+
+            await self._run(job)
+
+    async def _claim(self):
+        """Забирает следующую задачу: сначала по приоритету, затем по времени"""
+        now = datetime.now()
+        stale = and_(Job.status == "running", Job.locked_until < now)
+        claimable = or_(
+            and_(Job.status == "pending", Job.run_at <= now),
+            and_(stale, Job.attempts < Job.max_attempts),
+        )
+
+        async with AsyncSessionLocal() as session:
+            # Задачи, которые падали вместе с процессом на последней попытке, больше не берем
+            await session.execute(
+                update(Job)
+                .where(stale, Job.attempts >= Job.max_attempts)
+                .values(status="failed", finished_at=now, locked_until=None,
+                        last_error="Превышен таймаут выполнения")
+            )
+
+            candidate_ids = (await session.execute(
+                select(Job.id).where(claimable)
+                .order_by(Job.priority.desc(), Job.run_at, Job.id)
+                .limit(self.workers)
+            )).scalars().all()
+
+            for job_id in candidate_ids:
+                # Условие повторяется в UPDATE: задачу мог забрать другой воркер
+                result = await session.execute(
+                    update(Job)
+                    .where(Job.id == job_id, claimable)
+                    .values(
+                        status="running",
+                        attempts=Job.attempts + 1,
+                        locked_until=now + timedelta(seconds=JOB_VISIBILITY_TIMEOUT),
+                    )
+                )
+                if result.rowcount == 1:
+                    await session.commit()
+                    return await session.get(Job, job_id, populate_existing=True)
+
+            await session.commit()
+        return None
+
+    async def _run(self, job):
+        handler, failure_text = _handlers.get(job.type, (None, None))
+        try:
+            payload = json.loads(job.payload)
+        except ValueError as e:
+            await self._finish(job, "failed", f"Некорректный payload: {e}")
+            return
+
+        if handler is None:
+            await self._finish(job, "failed", f"Неизвестный тип задачи: {job.type}")
+            return
+
+        try:
+            await asyncio.wait_for(handler(self.bot, payload), JOB_VISIBILITY_TIMEOUT)
+        except asyncio.CancelledError:
+            # Остановка бота: возвращаем задачу в очередь без штрафной попытки
+            await self._release(job)
+            raise
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            logger.error(f"Задача {job.id} ({job.type}) упала на попытке {job.attempts}: {error}")
+            await self._retry_or_fail(job, payload, error, failure_text)
+        else:
+            await self._finish(job, "done")
+
+    async def _finish(self, job, status, error=None):
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(Job).where(Job.id == job.id).values(
+                    status=status, finished_at=datetime.now(), locked_until=None, last_error=error
+                )
+            )
+            await session.commit()
+
+    async def _release(self, job):
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(Job).where(Job.id == job.id).values(
+                    status="pending", attempts=Job.attempts - 1, locked_until=None
+                )
+            )
+            await session.commit()
+
+    async def _retry_or_fail(self, job, payload, error, failure_text):
+        if job.attempts >= job.max_attempts:
+            await self._finish(job, "failed", error)
+            if failure_text:
+                await self._report(payload, f"{failure_text}: {error}")
+            return
+
+        delay = min(JOB_BACKOFF_BASE * 2 ** (job.attempts - 1), JOB_BACKOFF_MAX)
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(Job).where(Job.id == job.id).values(
+                    status="pending",
+                    run_at=datetime.now() + timedelta(seconds=delay),
+                    locked_until=None,
+                    last_error=error,
+                )
+            )
+            await session.commit()
+
+        if payload.get("status_message_id"):
+            await self._report(payload, f"🔁 Попытка {job.attempts} не удалась, повторю через {delay} с...")
+
+    async def _report(self, payload, text):
+        """Пишет в статусное сообщение задачи или отдельным сообщением в чат"""
+        chat_id = payload.get("chat_id")
+        if not chat_id:
+            return
+
+        try:
+            if payload.get("status_message_id"):
+                await self.bot.edit_message_text(text, chat_id=chat_id, message_id=payload["status_message_id"])
+            else:
+                await self.bot.send_message(chat_id, text)
+        except Exception as e:
+            logger.warning(f"Не удалось сообщить о задаче в чат {chat_id}: {e}")
@@ -12,10 +12,18 @@ from dotenv import load_dotenv
 
 from bot.handlers import setup_handlers
 from bot.scheduler import GmailScheduler
+from bot.jobs import JobWorkerPool
+from bot.user_cache import user_cache
+from shared.services.document_extractor import extraction_pool
+from bot import job_handlers  # Регистрирует обработчики фоновых задач
 from shared.database.database import async_engine
 from shared.models.vacancy import Base
 from shared.models.user import TelegramUser
 from shared.models.gmail_account import GmailAccount  # Импортируем для создания таблицы
+from shared.models.resume_blob import ResumeBlob
+from shared.models.job import Job
+from shared.models.llm_cache import LlmCacheEntry
+from shared.models.resume_text import ResumeText
 
 load_dotenv()
 
@@ -33,8 +41,11 @@ async def main():
     bot = Bot(TOKEN)
     dp = Dispatcher()
 
+    # Одна сессия БД на апдейт — общая для middleware и хендлеров
+    from bot.middleware import DbSessionMiddleware, RoleCheckMiddleware
+    dp.update.outer_middleware(DbSessionMiddleware())
+
     # Регистрируем middleware для проверки ролей
-    from bot.middleware import RoleCheckMiddleware
     dp.message.middleware(RoleCheckMiddleware())
     dp.callback_query.middleware(RoleCheckMiddleware())
 
@@ -56,9 +67,29 @@ async def main():
     except Exception as e:
         print(f"⚠️ Не удалось запустить Gmail scheduler: {e}")
 
+    # Воркеры очереди фоновых задач (анализ резюме, экспорт, уведомления)
+    job_pool = JobWorkerPool(bot)
+    await job_pool.start_background()
+
+    # Файлы кандидатов из неподтвержденных откликов (состояние FSM не переживает перезапуск)
+    from bot.apply_handlers import resume_storage
+    removed_uploads = resume_storage.cleanup_uploads()
+    if removed_uploads:
+        print(f"🗑 Удалено брошенных загрузок резюме: {removed_uploads}")
+
+    # Извлекаем текст резюме, которых нет в resume_texts или которые разобраны старой версией
+    from bot.job_handlers import enqueue_stale_resume_texts
+    stale_count = await enqueue_stale_resume_texts()
+    if stale_count:
+        print(f"📄 В очередь на извлечение текста поставлено резюме: {stale_count}")
+
     try:
         await dp.start_polling(bot)
     finally:
+        await job_pool.stop()
+        extraction_pool.shutdown()
+        # Сохраняем новых пользователей, которые еще не записаны в БД
+        await user_cache.flush()
         if scheduler:
             await scheduler.stop()
         await bot.session.close()
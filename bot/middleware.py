@@ -1,11 +1,122 @@
-"""Middleware для проверки прав доступа"""
+"""Middleware для проверки прав доступа и сессии БД на апдейт"""
+import inspect
+import logging
+import os
+import time
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
-from aiogram.types import Message, CallbackQuery
-from sqlalchemy import select
+from aiogram.types import Message, CallbackQuery, TelegramObject
+
+from bot.user_cache import user_cache
+from shared.database.database import AsyncSessionLocal, QueryCounter, current_query_counter
+from shared.models.user import TelegramUser
+
+logger = logging.getLogger(__name__)
+
+# Больше запросов на один апдейт — пишем предупреждение в лог
+DB_QUERIES_WARN_THRESHOLD = int(os.getenv("DB_QUERIES_WARN_THRESHOLD", "10"))
+# Раз в N секунд пишем в лог число SQL запросов на апдейт за прошедший период (0 — не писать)
+DB_QUERY_STATS_INTERVAL = int(os.getenv("DB_QUERY_STATS_INTERVAL", "600"))
+
+# Параметры из data, которые декораторы прав пробрасывают в хендлер
+HANDLER_KWARGS = ('callback_data', 'session')
+
+
+class UpdateQueryStats:
+    """Сколько SQL запросов уходит на один апдейт: всего, максимум и по типам апдейтов"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.updates = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.by_type = {}  # {event_type: [updates, queries]}
+
+    def record(self, event_type, queries):
+        self.updates += 1
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+        totals = self.by_type.setdefault(event_type, [0, 0])
+        totals[0] += 1
+        totals[1] += queries
+
+    def as_dict(self):
+        return {
+            "updates": self.updates,
+            "queries": self.queries,
+            "avg_queries": round(self.queries / self.updates, 2) if self.updates else 0.0,
+            "max_queries": self.max_queries,
+            "by_type": {
+                event_type: round(queries / updates, 2)
+                for event_type, (updates, queries) in self.by_type.items()
+            },
+        }
+
+    def format_metrics(self):
+        """Метрики одной строкой для лога"""
+        stats = self.as_dict()
+        by_type = ", ".join(f"{event_type} {avg}" for event_type, avg in sorted(stats["by_type"].items()))
+        return (
+            f"апдейтов {stats['updates']}, запросов {stats['queries']}, "
+            f"на апдейт сред {stats['avg_queries']} / макс {stats['max_queries']} ({by_type})"
+        )
+
+    def flush_due(self, interval):
+        """Строка метрик за период, если он истек (счетчики начинаются заново), иначе None"""
+        elapsed = time.monotonic() - self.started
+        if not interval or elapsed < interval or not self.updates:
+            return None
+        line = f"за {elapsed:.0f}с {self.format_metrics()}"
+        self.reset()
+        return line
+
+
+update_query_stats = UpdateQueryStats()
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """
+    Одна сессия БД на апдейт (unit of work)
+
+    Сессия передается в data['session'] — ее получают RoleCheckMiddleware и хендлеры
+    с параметром session. Незакоммиченные изменения откатываются при закрытии.
+    Заодно считает SQL запросы апдейта (см. update_query_stats) и раз в
+    DB_QUERY_STATS_INTERVAL секунд пишет их сводку в лог.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        counter = QueryCounter()
+        token = current_query_counter.set(counter)
+        try:
+            async with AsyncSessionLocal() as session:
+                data['session'] = session
+                return await handler(event, data)
+        finally:
+            current_query_counter.reset(token)
+            event_type = getattr(event, "event_type", type(event).__name__)
+            update_query_stats.record(event_type, counter.count)
+            if counter.count > DB_QUERIES_WARN_THRESHOLD:
+                logger.warning(
+                    f"Апдейт {getattr(event, 'update_id', '?')} ({event_type}): "
+                    f"{counter.count} SQL запросов (порог {DB_QUERIES_WARN_THRESHOLD})"
+                )
+            metrics = update_query_stats.flush_due(DB_QUERY_STATS_INTERVAL)
+            if metrics:
+                logger.info(f"📊 SQL запросы {metrics}")
 
-from shared.database.database import AsyncSessionLocal
-from shared.models.user import TelegramUser, RoleEnum
+
+def _handler_kwargs(handler, kwargs):
+    """Параметры из data, которые принимает хендлер"""
+    parameters = inspect.signature(handler).parameters
+    return {k: v for k, v in kwargs.items() if k in HANDLER_KWARGS and k in parameters}
 
 
 class RoleCheckMiddleware(BaseMiddleware):
@@ -31,27 +142,22 @@ class RoleCheckMiddleware(BaseMiddleware):
         else:
             return await handler(event, data)
 
-        # Получаем или создаем пользователя в БД
-        async with AsyncSessionLocal() as session:
-            stmt = select(TelegramUser).where(TelegramUser.telegram_id == telegram_id)
-            result = await session.execute(stmt)
-            user = result.scalar_one_or_none()
-
-            if not user:
-                # Создаем нового пользователя с ролью USER
-                user = TelegramUser(
-                    telegram_id=telegram_id,
-                    username=username,
-                    first_name=first_name,
-                    last_name=last_name,
-                    role=RoleEnum.USER
-                )
-                session.add(user)
-                await session.commit()
-                await session.refresh(user)
-
-            # Добавляем пользователя в data для использования в хендлерах
-            data['user'] = user
+        # Снимок пользователя из кеша; новый пользователь сохраняется в БД отложенно
+        session = data.get('session')
+        data['user'] = await user_cache.get_or_create(
+            telegram_id,
+            username=username,
+            first_name=first_name,
+            last_name=last_name,
+            session=session,
+        )
+
+        # При промахе кеша сессия апдейта открыла транзакцию чтения. Закрываем ее, чтобы
+        # соединение не держалось весь хендлер: хендлеры со своей AsyncSessionLocal()
+        # иначе занимают по два читателя на апдейт. Сессия возьмет соединение снова при
+        # следующем запросе.
+        if session is not None and session.in_transaction():
+            await session.commit()
 
         return await handler(event, data)
 
@@ -83,8 +189,7 @@ def has_permission(permission: str):
                 return
 
             # Передаем только нужные параметры
-            filtered_kwargs = {k: v for k, v in kwargs.items() if k == 'callback_data'}
-            return await handler(event, user=user, **filtered_kwargs)
+            return await handler(event, user=user, **_handler_kwargs(handler, kwargs))
 
         return wrapper
     return decorator
@@ -113,8 +218,7 @@ def admin_only(handler):
             return
 
         # Передаем только нужные параметры
-        filtered_kwargs = {k: v for k, v in kwargs.items() if k == 'callback_data'}
-        return await handler(event, user=user, **filtered_kwargs)
+        return await handler(event, user=user, **_handler_kwargs(handler, kwargs))
 
     return wrapper
 
@@ -137,7 +241,6 @@ def moderator_or_admin(handler):
             return
 
         # Передаем только нужные параметры
-        filtered_kwargs = {k: v for k, v in kwargs.items() if k == 'callback_data'}
-        return await handler(event, user=user, **filtered_kwargs)
+        return await handler(event, user=user, **_handler_kwargs(handler, kwargs))
 
     return wrapper
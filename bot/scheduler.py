@@ -2,11 +2,50 @@ import asyncio
 import logging
 import json
 import os
+from contextlib import aclosing
 from datetime import datetime
-from bot.gmail_parser import GmailParser
+from bot.gmail_parser import GmailParser, shutdown_parse_pool
 
 logger = logging.getLogger(__name__)
 
+# Сколько аккаунтов проверяем одновременно и сколько секунд даем одному аккаунту
+GMAIL_MAX_CONCURRENT_ACCOUNTS = int(os.getenv("GMAIL_MAX_CONCURRENT_ACCOUNTS", "4"))
+GMAIL_ACCOUNT_TIMEOUT = int(os.getenv("GMAIL_ACCOUNT_TIMEOUT", "240"))
+
+
+async def poll_accounts(parsers, max_concurrency=None, timeout=None):
+    """
+    Параллельно проверяет аккаунты и отдает результаты по мере готовности
+
+    Одновременно работает не больше max_concurrency аккаунтов. Аккаунт, не уложившийся
+    в timeout, отменяется и возвращается с ошибкой, не задерживая остальные.
+
+    Yields:
+        (parser, result, error) — result равен None при ошибке
+    """
+    max_concurrency = max_concurrency or GMAIL_MAX_CONCURRENT_ACCOUNTS
+    timeout = timeout or GMAIL_ACCOUNT_TIMEOUT
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def poll(parser):
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(parser.parse_new_emails(), timeout)
+                return parser, result, None
+            except asyncio.TimeoutError:
+                return parser, None, TimeoutError(f"аккаунт не ответил за {timeout} с")
+            except Exception as e:
+                return parser, None, e
+
+    tasks = [asyncio.create_task(poll(parser)) for parser in parsers]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 class GmailScheduler:
     def __init__(self, interval_minutes: int = 5, accounts_config_path: str = "bot/gmail_accounts.json"):
         """
@@ -61,10 +100,17 @@ class GmailScheduler:
             total_parsed = 0
             all_new_vacancies = []
 
-            # Проверяем все аккаунты
-            for parser in self.parsers:
-                try:
-                    result = await parser.parse_new_emails()
+            # Проверяем аккаунты параллельно, результаты приходят по мере готовности
+            async with aclosing(poll_accounts(self.parsers)) as results:
+                async for parser, result, error in results:
+                    if error is not None:
+                        logger.error(f"❌ Ошибка при проверке аккаунта {parser.account_id}: {error}")
+                        continue
+
+                    logger.info(
+                        f"📨 [{parser.account_id}] Получено: {result.get('listed', 0)}, "
+                        f"уже известно: {result.get('already_known', 0)}, новых: {result.get('new', 0)}"
+                    )
 
                     if result['parsed_count'] > 0:
                         total_parsed += result['parsed_count']
@@ -76,9 +122,6 @@ class GmailScheduler:
                     else:
                         logger.info(f"📭 [{parser.account_id}] Новых откликов не найдено")
 
-                except Exception as e:
-                    logger.error(f"❌ Ошибка при проверке аккаунта {parser.account_id}: {e}")
-
             # Итоговая статистика
             if total_parsed > 0:
                 logger.info(f"📊 Всего обработано откликов: {total_parsed}")
@@ -120,4 +163,7 @@ class GmailScheduler:
                 await self.task
             except asyncio.CancelledError:
                 pass
+        for parser in self.parsers:
+            await parser.close()
+        shutdown_parse_pool()
         logger.info("⏹️ Scheduler остановлен")
@@ -0,0 +1,347 @@
+"""
+Однопроходный разбор HTML писем SomonTj
+
+Письмо токенизируется один раз без построения дерева: за один проход собирается
+текст (без script/style/комментариев), тексты <p> и ссылки <a>. Затем по ним
+отрабатывают заранее скомпилированные шаблоны. Правила разбора повторяют
+BeautifulSoup(html, 'html.parser') + get_text(), поэтому результат совпадает
+с прежним разбором.
+"""
+import re
+from html.entities import html5
+from html.parser import HTMLParser
+
+# Теги без закрывающего тега — закрываются сразу после открытия
+VOID_ELEMENTS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem',
+    'meta', 'param', 'source', 'track', 'wbr',
+    'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex', 'nextid', 'spacer',
+})
+# Текст внутри этих тегов не попадает в get_text()
+HIDDEN_TEXT_ELEMENTS = frozenset({'rt', 'rp', 'style', 'script', 'template'})
+# Внутри этих тегов пробельные строки не схлопываются
+PRESERVE_WHITESPACE_ELEMENTS = frozenset({'pre', 'textarea'})
+# Теги, текст которых нужен отдельно
+CAPTURED_ELEMENTS = frozenset({'p', 'a'})
+ASCII_SPACES = frozenset('\x20\x0a\x09\x0c\x0d')
+
+WHITESPACE_RE = re.compile(r'\s+')
+LETTER_RE = re.compile(r'[А-Яа-яA-Za-z]')
+PHONE_CHAR_RE = re.compile(r'[0-9+]')
+MAILTO_RE = re.compile(r'^mailto:')
+
+MESSAGE_RE = re.compile(r'Текст сообщения:\s*(.*?)(?:Имя:|Email|$)')
+
+_FLAGS = re.MULTILINE | re.DOTALL
+
+NAME_PATTERNS = tuple(re.compile(pattern, _FLAGS) for pattern in (
+    # Основные варианты (с нормализованными пробелами)
+    r'Имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+    r'Имя\s*[-:]\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+    r'Name:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+    r'ФИО:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+    r'Полное имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+    # Варианты с любым текстом между "Текст сообщения:" и "Имя:"
+    r'Текст сообщения:.*?Имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+    # Поиск после "не предоставил сопроводительного письма"
+    r'не предоставил сопроводительного письма.*?Имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+))
+
+EMAIL_PATTERNS = tuple(re.compile(pattern, _FLAGS) for pattern in (
+    r'Email для контакта\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
+    r'Email\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
+    r'E-mail\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
+    r'Почта\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
+    r'электронная почта\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
+    # Поиск email адресов в тексте после "не предоставил сопроводительного письма"
+    r'не предоставил сопроводительного письма.*?([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+    # Поиск email адресов в тексте
+    r'Текст сообщения:.*?([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+    r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+))
+
+PHONE_PATTERNS = tuple(re.compile(pattern, _FLAGS) for pattern in (
+    r'Телефон для контакта\s*[-:]\s*(.+?)(?:\n|$)',
+    r'Телефон\s*[-:]\s*(.+?)(?:\n|$)',
+    r'Phone\s*[-:]\s*(.+?)(?:\n|$)',
+    r'Моб\.\s*тел\.\s*[-:]\s*(.+?)(?:\n|$)',
+    r'Мобильный\s*[-:]\s*(.+?)(?:\n|$)',
+    r'Номер\s*[-:]\s*(.+?)(?:\n|$)',
+    # Поиск номеров телефона после "не предоставил сопроводительного письма"
+    r'не предоставил сопроводительного письма.*?(\+?992[0-9]{9})',
+    r'не предоставил сопроводительного письма.*?(\+?[0-9]{9,15})',
+    # Поиск номеров телефона в тексте
+    r'Текст сообщения:.*?(\+?992[0-9]{9})',
+    r'Текст сообщения:.*?(\+?[0-9]{9,15})',
+    r'(\+?992[0-9]{9})',
+    r'(\+?[0-9]{9,15})',
+))
+
+
+class _SomonHTMLScanner(HTMLParser):
+    """
+    Токенизатор, повторяющий построение дерева BeautifulSoup с html.parser
+
+    Стек тегов хранит только имена: закрывающий тег снимает стек до последнего
+    открытого тега с тем же именем, незакрытые теги закрываются в конце документа.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.strings = []
+        # Открытые <p>/<a> и уже закрытые — в порядке появления в документе
+        self.elements = []
+        self._data = []
+        self._stack = []
+        self._hidden = 0
+        self._preserve = 0
+        self._closed_void = []
+
+    def _flush(self, visible=None):
+        if not self._data:
+            return
+        data = ''.join(self._data)
+        self._data = []
+        if not self._preserve and all(char in ASCII_SPACES for char in data):
+            data = '\n' if '\n' in data else ' '
+        # CDATA попадает в текст даже внутри script/style, как в BeautifulSoup
+        if visible or (visible is None and not self._hidden):
+            self.strings.append(data)
+
+    def _push(self, name, attrs):
+        element = None
+        if name in CAPTURED_ELEMENTS:
+            element = {'name': name, 'attrs': attrs, 'start': len(self.strings), 'text': None}
+            self.elements.append(element)
+        if name in HIDDEN_TEXT_ELEMENTS:
+            self._hidden += 1
+        if name in PRESERVE_WHITESPACE_ELEMENTS:
+            self._preserve += 1
+        self._stack.append((name, element))
+
+    def _pop(self):
+        name, element = self._stack.pop()
+        if element is not None:
+            element['text'] = ''.join(self.strings[element['start']:])
+        if name in HIDDEN_TEXT_ELEMENTS:
+            self._hidden -= 1
+        if name in PRESERVE_WHITESPACE_ELEMENTS:
+            self._preserve -= 1
+
+    def _pop_to(self, name):
+        if not any(open_name == name for open_name, _ in self._stack):
+            return
+        while self._stack:
+            open_name = self._stack[-1][0]
+            self._pop()
+            if open_name == name:
+                break
+
+    def handle_starttag(self, tag, attrs, handle_void=True):
+        self._flush()
+        attr_dict = {}
+        for key, value in attrs:
+            attr_dict[key] = '' if value is None else value
+        self._push(tag, attr_dict)
+        if handle_void and tag in VOID_ELEMENTS:
+            self._end(tag, check_closed_void=False)
+            self._closed_void.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_void=False)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self._end(tag)
+
+    def _end(self, tag, check_closed_void=True):
+        if check_closed_void and tag in self._closed_void:
+            self._closed_void.remove(tag)
+            return
+        self._flush()
+        self._pop_to(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_charref(self, name):
+        if name[0] in 'xX':
+            code = int(name.lstrip(name[0]), 16)
+        else:
+            code = int(name)
+
+        data = None
+        if code < 256:
+            # Числовые ссылки 128-159 на практике означают символы windows-1252
+            try:
+                data = bytes([code]).decode('windows-1252')
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(code)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or '\N{REPLACEMENT CHARACTER}')
+
+    def handle_entityref(self, name):
+        character = html5.get(f'{name};')
+        self.handle_data(character if character is not None else f'&{name}')
+
+    def _handle_special(self, data, visible=False):
+        self._flush()
+        self._data.append(data)
+        self._flush(visible=visible)
+
+    def handle_comment(self, data):
+        self._handle_special(data)
+
+    def handle_decl(self, data):
+        self._handle_special(data[len('DOCTYPE '):])
+
+    def unknown_decl(self, data):
+        # CDATA попадает в текст, прочие объявления — нет
+        if data.upper().startswith('CDATA['):
+            self._handle_special(data[len('CDATA['):], visible=True)
+        else:
+            self._handle_special(data)
+
+    def handle_pi(self, data):
+        self._handle_special(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+        while self._stack:
+            self._pop()
+
+
+def _first_match(patterns, text, accept):
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            candidate = match.group(1).strip()
+            if accept(candidate):
+                return candidate
+    return None
+
+
+def _is_name(candidate):
+    # Похоже на имя: не слишком длинное и содержит буквы
+    return len(candidate) < 100 and LETTER_RE.search(candidate) is not None
+
+
+def _is_email(candidate):
+    return '@' in candidate and '.' in candidate.split('@')[-1]
+
+
+def _is_phone(candidate):
+    digits = candidate.replace(' ', '').replace('-', '').replace('+', '')
+    return PHONE_CHAR_RE.search(candidate) is not None and len(digits) >= 9
+
+
+def _is_attachment_link(href):
+    return (
+        ('mail.google.com' in href and 'attid=' in href and 'view=att' in href)
+        or 'mail-attachment.googleusercontent.com' in href
+    )
+
+
+def extract_somon_email(html_body):
+    """
+    Извлекает данные отклика из HTML письма SomonTj за один разбор
+
+    Returns:
+        dict с ключами name, email, phone, message, attachment_url, attachment_filename
+    """
+    scanner = _SomonHTMLScanner()
+    scanner.feed(html_body)
+    scanner.close()
+
+    # Очищаем текст от лишних пробелов и переносов
+    text = WHITESPACE_RE.sub(' ', ''.join(scanner.strings)).strip()
+
+    name = None
+    phone = None
+    name_found = phone_found = False
+    mailto = None
+    attachment_url = None
+    attachment_filename = None
+
+    for element in scanner.elements:
+        element_text = element['text'].strip()
+        if element['name'] == 'p':
+            if not name_found and element_text.startswith('Имя:'):
+                name = element_text.replace('Имя:', '').strip()
+                name_found = True
+            if not phone_found and element_text.startswith('Телефон для контакта'):
+                phone = element_text.replace('Телефон для контакта -', '').replace('Телефон для контакта:', '').strip()
+                phone_found = True
+            continue
+
+        href = element['attrs'].get('href')
+        if href is None:
+            continue
+        if mailto is None and MAILTO_RE.search(href):
+            mailto = href
+        if attachment_url is None and _is_attachment_link(href):
+            attachment_url = href
+            if element_text and not element_text.startswith('http') and len(element_text) > 3:
+                attachment_filename = element_text
+
+    # Извлекаем сообщение от кандидата
+    applicant_message = None
+    message_match = MESSAGE_RE.search(text)
+    if message_match:
+        applicant_message = message_match.group(1).strip()
+        # Убираем стандартные фразы
+        if 'не предоставил сопроводительного письма' in applicant_message:
+            applicant_message = None
+
+    if not name:
+        name = _first_match(NAME_PATTERNS, text, _is_name) or name
+
+    if mailto is not None:
+        email = mailto.replace('mailto:', '')
+    else:
+        email = _first_match(EMAIL_PATTERNS, text, _is_email)
+
+    if not phone:
+        phone = _first_match(PHONE_PATTERNS, text, _is_phone) or phone
+
+    return {
+        'name': name,
+        'email': email,
+        'phone': phone,
+        'message': applicant_message,
+        'attachment_url': attachment_url,
+        'attachment_filename': attachment_filename,
+    }
+
+
+def empty_result():
+    """Результат для письма, которое не удалось разобрать"""
+    return {
+        'name': None, 'email': None, 'phone': None, 'message': None,
+        'attachment_url': None, 'attachment_filename': None,
+    }
+
+
+def extract_somon_emails(bodies):
+    """
+    Разбирает пачку тел писем — точка входа для воркеров пула процессов
+
+    Принимает и возвращает только строки и словари, поэтому безопасна для pickle.
+    Ошибка разбора одного письма не роняет всю пачку.
+
+    Returns:
+        Список результатов extract_somon_email в том же порядке
+    """
+    results = []
+    for body in bodies:
+        try:
+            results.append(extract_somon_email(body))
+        except Exception as e:
+            print(f"Ошибка парсинга HTML: {e}")
+            results.append(empty_result())
+    return results
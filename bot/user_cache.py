@@ -0,0 +1,172 @@
+"""
+Кеш пользователей Telegram для RoleCheckMiddleware
+
+Middleware вызывается на каждое сообщение и callback, поэтому роль пользователя
+берется из кеша снимков (TTL + LRU по telegram_id), а в БД идем только при промахе.
+Новые кандидаты не вставляются по одному: снимок сразу попадает в кеш, а строки
+сохраняются пачкой через upsert (write-behind) спустя USER_WRITE_BEHIND_DELAY секунд.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from shared.database.database import AsyncSessionLocal, session_scope
+from shared.models.user import TelegramUser, RoleEnum, ROLE_PERMISSIONS
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+USER_WRITE_BEHIND_DELAY = float(os.getenv("USER_WRITE_BEHIND_DELAY", "2"))
+# Больше новых пользователей в очереди — сохраняем сразу, не дожидаясь задержки
+USER_WRITE_BEHIND_BATCH = 100
+
+
+class UserSnapshot(NamedTuple):
+    """
+    Отвязанный от сессии снимок TelegramUser с тем же интерфейсом проверки ролей
+
+    id равен None, пока новый пользователь не сохранен в БД.
+    """
+    id: Optional[int]
+    telegram_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    role: RoleEnum
+
+    @classmethod
+    def from_model(cls, user: TelegramUser) -> "UserSnapshot":
+        return cls(user.id, user.telegram_id, user.username, user.first_name, user.last_name, user.role)
+
+    @property
+    def is_admin(self):
+        return self.role == RoleEnum.ADMIN
+
+    @property
+    def is_moderator(self):
+        return self.role == RoleEnum.MODERATOR
+
+    @property
+    def is_user(self):
+        return self.role == RoleEnum.USER
+
+    def has_permission(self, permission: str) -> bool:
+        return permission in ROLE_PERMISSIONS.get(self.role, [])
+
+
+class UserCache:
+    """Снимки пользователей по telegram_id с отложенной вставкой новых"""
+
+    def __init__(self, ttl=USER_CACHE_TTL, max_size=USER_CACHE_MAX_SIZE, write_delay=USER_WRITE_BEHIND_DELAY):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.write_delay = write_delay
+        self._entries = OrderedDict()  # {telegram_id: (expires_at, snapshot)}
+        self._pending = {}  # {telegram_id: snapshot} — еще не сохранены в БД
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+
+    def _get_cached(self, telegram_id):
+        entry = self._entries.get(telegram_id)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at < time.monotonic():
+            del self._entries[telegram_id]
+            return None
+        self._entries.move_to_end(telegram_id)
+        return snapshot
+
+    def _put(self, snapshot: UserSnapshot):
+        self._entries[snapshot.telegram_id] = (time.monotonic() + self.ttl, snapshot)
+        self._entries.move_to_end(snapshot.telegram_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, telegram_id=None):
+        """Сбрасывает снимок пользователя (или все снимки) — например, после смены роли"""
+        if telegram_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(telegram_id, None)
+
+    async def get_or_create(self, telegram_id, username=None, first_name=None, last_name=None,
+                            session=None) -> UserSnapshot:
+        """Снимок пользователя; нового пользователя создает с ролью USER"""
+        snapshot = self._get_cached(telegram_id) or self._pending.get(telegram_id)
+        if snapshot is not None:
+            return snapshot
+
+        async with session_scope(session) as session:
+            user = await session.scalar(select(TelegramUser).where(TelegramUser.telegram_id == telegram_id))
+            if user is not None:
+                snapshot = UserSnapshot.from_model(user)
+
+        if snapshot is None:
+            snapshot = UserSnapshot(None, telegram_id, username, first_name, last_name, RoleEnum.USER)
+            self._pending[telegram_id] = snapshot
+            self._schedule_flush()
+
+        self._put(snapshot)
+        return snapshot
+
+    def _schedule_flush(self):
+        if len(self._pending) >= USER_WRITE_BEHIND_BATCH:
+            asyncio.create_task(self.flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.write_delay)
+        await self.flush()
+
+    async def flush(self):
+        """Сохраняет накопленных новых пользователей одним upsert"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+
+            try:
+                async with AsyncSessionLocal() as session:
+                    await session.execute(
+                        insert(TelegramUser)
+                        .values([
+                            {
+                                "telegram_id": snapshot.telegram_id,
+                                "username": snapshot.username,
+                                "first_name": snapshot.first_name,
+                                "last_name": snapshot.last_name,
+                                "role": RoleEnum.USER,
+                            }
+                            for snapshot in pending.values()
+                        ])
+                        .on_conflict_do_nothing(index_elements=[TelegramUser.telegram_id])
+                    )
+                    await session.commit()
+
+                    # Подставляем id из БД (и роль, если строку успели создать иначе)
+                    result = await session.execute(
+                        select(TelegramUser).where(TelegramUser.telegram_id.in_(list(pending)))
+                    )
+                    for user in result.scalars():
+                        self._put(UserSnapshot.from_model(user))
+            except Exception as e:
+                logger.error(f"Не удалось сохранить новых пользователей ({len(pending)}): {e}")
+                # Вернем в очередь и повторим через USER_WRITE_BEHIND_DELAY
+                for telegram_id, snapshot in pending.items():
+                    self._pending.setdefault(telegram_id, snapshot)
+                self._flush_task = asyncio.create_task(self._flush_later())
+                return
+
+            logger.info(f"Сохранено новых пользователей: {len(pending)}")
+
+
+user_cache = UserCache()
@@ -0,0 +1,65 @@
+"""
+Small in-process TTL cache for handler results.
+"""
+import os
+import time
+
+
+STATS_CACHE_TTL = int(os.getenv("STATS_CACHE_TTL", "60"))
+
+
+class TTLCache:
+    """
+    Dictionary cache whose entries expire after `ttl` seconds.
+
+    The bot runs as a single process, so invalidation is a plain in-memory
+    operation that writers call right after commit.
+    """
+
+    def __init__(self, ttl: int, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+
+    def get(self, key):
+        """Return the cached value or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        if len(self._entries) >= self.max_entries:
+            self._evict_expired()
+            if len(self._entries) >= self.max_entries:
+                # Drop the oldest entry (dicts keep insertion order)
+                self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at < now]:
+            del self._entries[key]
+
+
+# Results of /stats keyed by (scope, window_days); see stats_handler
+stats_cache = TTLCache(ttl=STATS_CACHE_TTL)
+
+
+def invalidate_stats():
+    """Call after anything that changes applications, vacancies or account scope."""
+    stats_cache.invalidate()
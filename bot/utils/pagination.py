@@ -0,0 +1,143 @@
+"""
+Keyset (cursor) pagination for inline keyboard lists.
+
+Lists are ordered newest first by (created_at, id). A page is fetched with a
+row-value comparison against the last/first row of the previous page, so a page
+never reads more than `page_size + 1` rows no matter how deep the user scrolls.
+
+SQLite stores timestamps as text in two shapes: "YYYY-MM-DD HH:MM:SS" from the
+CURRENT_TIMESTAMP server default and "YYYY-MM-DD HH:MM:SS.ffffff" from Python.
+The cursor therefore carries created_at exactly as stored and is compared as
+text, the same way ORDER BY sorts it.
+"""
+import os
+import re
+from typing import List, NamedTuple, Optional
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardButton
+from sqlalchemy import String, tuple_, type_coerce
+
+
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "20"))
+
+
+class PageCallback(CallbackData, prefix="page"):
+    name: str  # List name, e.g. "vacancies", "apps", "unprocessed", "users"
+    key: int = 0  # Extra list key (vacancy_id for the applications of one vacancy)
+    dir: str = "n"  # "n" — older rows after the cursor, "p" — newer rows before it
+    ts: str = ""  # Digits of the cursor created_at as stored, see _encode_ts
+    id: int = 0  # Cursor row id
+    num: int = 1  # Number of the page being opened (display only)
+
+
+class Page(NamedTuple):
+    rows: list
+    number: int
+    has_prev: bool
+    has_next: bool
+    first_key: Optional[tuple] = None  # (stored created_at, id) of the first row
+    last_key: Optional[tuple] = None  # (stored created_at, id) of the last row
+
+
+def _encode_ts(value: Optional[str]) -> str:
+    """Stored created_at without separators: ":" is the callback_data separator"""
+    return re.sub(r"\D", "", value) if value else ""
+
+
+def _decode_ts(value: str) -> Optional[str]:
+    """Rebuild the stored created_at text from its digits"""
+    if not value or not value.isdigit() or len(value) < 14:
+        return None
+    text = f"{value[0:4]}-{value[4:6]}-{value[6:8]} {value[8:10]}:{value[10:12]}:{value[12:14]}"
+    if len(value) > 14:
+        text += f".{value[14:]}"
+    return text
+
+
+async def fetch_page(session, stmt, created_col, id_col, cursor: Optional[PageCallback] = None,
+                     page_size: int = LIST_PAGE_SIZE) -> Page:
+    """
+    Fetch one page of `stmt` ordered by (created_col, id_col) descending.
+
+    Args:
+        session: AsyncSession
+        stmt: Select of an entity or of a column projection with filters applied;
+            its own ORDER BY is replaced
+        created_col: Timestamp column of the cursor
+        id_col: Primary key column used as a tie-breaker
+        cursor: PageCallback from a "next"/"prev" button, None for the first page
+        page_size: Rows per page
+
+    Returns:
+        Page with rows in display order (newest first)
+    """
+    base = stmt.order_by(None)
+    ts = _decode_ts(cursor.ts) if cursor else None
+    backwards = bool(cursor and cursor.dir == "p" and ts)
+    # Raw text of created_at, for the cursor and for text comparison with it
+    stored_ts = type_coerce(created_col, String)
+    entity = len(base.column_descriptions) == 1
+    stmt = base.add_columns(stored_ts.label("_cursor_ts"), id_col.label("_cursor_id"))
+    key = tuple_(stored_ts, id_col)
+
+    if ts is None:
+        stmt = stmt.order_by(created_col.desc(), id_col.desc())
+    elif backwards:
+        stmt = stmt.where(key > tuple_(ts, cursor.id)).order_by(created_col.asc(), id_col.asc())
+    else:
+        stmt = stmt.where(key < tuple_(ts, cursor.id)).order_by(created_col.desc(), id_col.desc())
+
+    result = await session.execute(stmt.limit(page_size + 1))
+    fetched = list(result.unique().all())
+    if not fetched and ts is not None:
+        # Rows of this page were deleted in the meantime — start over
+        return await fetch_page(session, base, created_col, id_col, None, page_size)
+    has_more = len(fetched) > page_size
+    fetched = fetched[:page_size]
+    if backwards:
+        fetched.reverse()
+
+    keys = [(row._cursor_ts, row._cursor_id) for row in fetched]
+    # A projection keeps its Row objects (the cursor columns ride along as extra fields)
+    rows = [row[0] for row in fetched] if entity else fetched
+    first_key, last_key = (keys[0], keys[-1]) if keys else (None, None)
+
+    number = cursor.num if cursor and ts else 1
+    if backwards:
+        # Going back from page N: there is a page before this one only if more rows exist
+        return Page(rows, number, has_prev=has_more, has_next=True, first_key=first_key, last_key=last_key)
+    return Page(rows, number, has_prev=ts is not None, has_next=has_more, first_key=first_key, last_key=last_key)
+
+
+def page_buttons(page: Page, name: str, key: int = 0, total: Optional[int] = None,
+                 page_size: int = LIST_PAGE_SIZE) -> List[InlineKeyboardButton]:
+    """Row of "prev / page N of M / next" buttons; empty when everything fits on one page."""
+    if not page.rows or (not page.has_prev and not page.has_next):
+        return []
+
+    buttons = []
+    if page.has_prev:
+        first_ts, first_id = page.first_key
+        buttons.append(InlineKeyboardButton(
+            text="⬅️",
+            callback_data=PageCallback(
+                name=name, key=key, dir="p", ts=_encode_ts(first_ts), id=first_id, num=page.number - 1
+            ).pack()
+        ))
+
+    pages = f" / {max(1, -(-total // page_size))}" if total is not None else ""
+    buttons.append(InlineKeyboardButton(
+        text=f"{page.number}{pages}",
+        callback_data=PageCallback(name=name, key=key, dir="n").pack()  # Back to the first page
+    ))
+
+    if page.has_next:
+        last_ts, last_id = page.last_key
+        buttons.append(InlineKeyboardButton(
+            text="➡️",
+            callback_data=PageCallback(
+                name=name, key=key, dir="n", ts=_encode_ts(last_ts), id=last_id, num=page.number + 1
+            ).pack()
+        ))
+    return buttons
@@ -1,20 +1,148 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 import os
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./hrbot.db")
 ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite:///", "sqlite+aiosqlite:///")
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Настройки соединений SQLite (применяются к каждому новому соединению)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Размер кеша страниц в КиБ и размер отображения файла в память в байтах
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+
+# Запись идет через одно соединение, чтение — через пул
+SQLITE_SPLIT_WRITER = os.getenv("SQLITE_SPLIT_WRITER", "true").lower() == "true"
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "5"))
+# Сколько секунд запись ждет освобождения соединения писателя
+SQLITE_WRITE_WAIT_TIMEOUT = int(os.getenv("SQLITE_WRITE_WAIT_TIMEOUT", "60"))
+# Сколько читателей открывать сверх SQLITE_READ_POOL_SIZE при пиковой нагрузке (в WAL читатели не мешают друг другу)
+SQLITE_READ_MAX_OVERFLOW = int(os.getenv("SQLITE_READ_MAX_OVERFLOW", "10"))
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        # Отрицательное значение cache_size задается в КиБ, а не в страницах
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA temp_store={SQLITE_TEMP_STORE}")
+    finally:
+        cursor.close()
+
+
+def _sqlite_engine_options(pool_size, max_overflow=0):
+    if not IS_SQLITE:
+        return {}
+    # Для aiosqlite по умолчанию используется NullPool — новое соединение на каждый запрос
+    return {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": SQLITE_WRITE_WAIT_TIMEOUT,
+    }
+
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-async_engine = create_async_engine(ASYNC_DATABASE_URL)
+
+# Движок писателя: в SQLite одновременно пишет только одно соединение, поэтому
+# записи выстраиваются в очередь на пуле, а не падают с "database is locked"
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **(
+        _sqlite_engine_options(1) if SQLITE_SPLIT_WRITER
+        else _sqlite_engine_options(SQLITE_READ_POOL_SIZE, SQLITE_READ_MAX_OVERFLOW)
+    ),
+)
+
+if IS_SQLITE and SQLITE_SPLIT_WRITER:
+    # В режиме WAL читатели не блокируются писателем
+    async_read_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        **_sqlite_engine_options(SQLITE_READ_POOL_SIZE, SQLITE_READ_MAX_OVERFLOW),
+    )
+else:
+    async_read_engine = async_engine
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    if async_read_engine is not async_engine:
+        event.listen(async_read_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+
+class QueryCounter:
+    """Число SQL запросов в текущем контексте (одном апдейте бота)"""
+
+    def __init__(self):
+        self.count = 0
+
+
+# Устанавливается DbSessionMiddleware на время обработки апдейта
+current_query_counter: ContextVar[QueryCounter | None] = ContextVar("current_query_counter", default=None)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = current_query_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+
+event.listen(engine, "before_cursor_execute", _count_query)
+event.listen(async_engine.sync_engine, "before_cursor_execute", _count_query)
+if async_read_engine is not async_engine:
+    event.listen(async_read_engine.sync_engine, "before_cursor_execute", _count_query)
+
+
+class RoutingSession(Session):
+    """
+    Сессия, которая отправляет чтение в пул читателей, а запись — писателю
+
+    После первой записи сессия до конца транзакции работает только через писателя,
+    чтобы последующие SELECT видели еще не закоммиченные изменения.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if async_read_engine is async_engine:
+            return async_engine.sync_engine
+
+        if self.info.get("writing") or self._flushing or _is_write(clause):
+            self.info["writing"] = True
+            return async_engine.sync_engine
+        return async_read_engine.sync_engine
+
+
+def _is_write(clause):
+    if clause is None:
+        return False
+    # Про произвольный text() ничего не известно — считаем записью
+    return getattr(clause, "is_dml", False) or isinstance(clause, TextClause)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_writer_route(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("writing", None)
+
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+AsyncSessionLocal = async_sessionmaker(expire_on_commit=False, sync_session_class=RoutingSession)
 
 Base = declarative_base()
 
@@ -27,4 +155,13 @@ def get_db():
 
 async def get_async_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+@asynccontextmanager
+async def session_scope(session=None):
+    """Переданная сессия (из DbSessionMiddleware) или новая, если хендлер вызван напрямую"""
+    if session is not None:
+        yield session
+        return
+    async with AsyncSessionLocal() as new_session:
+        yield new_session
@@ -1,5 +1,9 @@
 from shared.models.vacancy import Vacancy, Application
 from shared.models.user import TelegramUser, RoleEnum
 from shared.models.gmail_account import GmailAccount
+from shared.models.resume_blob import ResumeBlob
+from shared.models.job import Job
+from shared.models.llm_cache import LlmCacheEntry
+from shared.models.resume_text import ResumeText
 
-__all__ = ['Vacancy', 'Application', 'TelegramUser', 'RoleEnum', 'GmailAccount']
+__all__ = ['Vacancy', 'Application', 'TelegramUser', 'RoleEnum', 'GmailAccount', 'ResumeBlob', 'Job', 'LlmCacheEntry', 'ResumeText']
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from shared.database.database import Base
 
@@ -13,7 +13,18 @@ class GmailAccount(Base):
     token_path = Column(String, nullable=False)
     enabled = Column(Boolean, default=True)
     user_id = Column(Integer, ForeignKey('telegram_users.id'), nullable=True)
+    # Чекпоинт инкрементальной синхронизации через users.history.list
+    last_history_id = Column(String(32), nullable=True)
+    last_synced_at = Column(DateTime(timezone=True), nullable=True)
+    # Незавершенный постраничный листинг (первая синхронизация или восстановление)
+    backfill_query = Column(String, nullable=True)
+    backfill_page_token = Column(String, nullable=True)
 
     # Relationship
     user = relationship("TelegramUser", back_populates="gmail_accounts")
     vacancies = relationship("Vacancy", back_populates="gmail_account")
+
+    __table_args__ = (
+        # Аккаунты модератора (/stats, /parse, списки вакансий)
+        Index("ix_gmail_accounts_user_enabled", "user_id", "enabled"),
+    )
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, text
+from sqlalchemy.sql import func
+from shared.database.database import Base
+
+
+class Job(Base):
+    """Фоновая задача в очереди (см. bot/jobs.py)"""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    type = Column(String(50), nullable=False)  # "summary", "questions", "export", "notify_staff"
+    payload = Column(Text, nullable=False, default="{}")  # JSON с параметрами задачи
+    status = Column(String(20), nullable=False, default="pending", server_default="pending")  # pending/running/done/failed
+    priority = Column(Integer, nullable=False, default=0, server_default="0")  # Больше — раньше
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False, default=5, server_default="5")
+    run_at = Column(DateTime(timezone=True), server_default=func.now())  # Не раньше этого времени (backoff)
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # Таймаут видимости выполняемой задачи
+    idempotency_key = Column(String(255), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_priority_run_at", "status", "priority", "run_at"),
+        # Одна активная задача на ключ; завершенные ключ не занимают
+        Index(
+            "ix_jobs_active_idempotency_key", "idempotency_key", unique=True,
+            sqlite_where=text("status IN ('pending', 'running')"),
+        ),
+    )
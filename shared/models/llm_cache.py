@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from shared.database.database import Base
+
+
+class LlmCacheEntry(Base):
+    """Сохраненный ответ LLM (см. shared/services/llm_cache.py)"""
+    __tablename__ = "llm_cache"
+
+    key = Column(String(64), primary_key=True)  # SHA-256 от вида ответа, модели, версии промпта и хешей входных данных
+    kind = Column(String(20), nullable=False)  # "summary", "questions"
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(Integer, nullable=False)
+    result = Column(Text, nullable=False)
+    hits = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Для вытеснения старых записей
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from shared.database.database import Base
+
+
+class ResumeBlob(Base):
+    """Файл резюме в хранилище по содержимому (SHA-256), общий для одинаковых файлов"""
+    __tablename__ = "resume_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String(500), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")  # Сколько откликов ссылается на файл
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
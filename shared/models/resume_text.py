@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from shared.database.database import Base
+
+
+class ResumeText(Base):
+    """Извлеченный текст файла резюме (см. shared/services/resume_texts.py)"""
+    __tablename__ = "resume_texts"
+
+    sha256 = Column(String(64), primary_key=True)  # Хеш содержимого файла, как в resume_blobs
+    extractor_version = Column(Integer, nullable=False)  # DocumentTextExtractor.VERSION на момент извлечения
+    text = Column(Text, nullable=True)  # None — из файла не удалось извлечь текст
+    extracted_at = Column(DateTime(timezone=True), server_default=func.now())
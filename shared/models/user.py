@@ -12,6 +12,26 @@ class RoleEnum(enum.Enum):
     ADMIN = "admin"
 
 
+# Права каждой роли (см. TelegramUser.has_permission)
+ROLE_PERMISSIONS = {
+    RoleEnum.USER: [],
+    RoleEnum.MODERATOR: [
+        'view_applications',
+        'change_status',
+        'export_data',
+        'parse_emails'
+    ],
+    RoleEnum.ADMIN: [
+        'view_applications',
+        'change_status',
+        'export_data',
+        'parse_emails',
+        'manage_accounts',
+        'manage_users'
+    ]
+}
+
+
 class TelegramUser(Base):
     """Пользователи Telegram"""
     __tablename__ = "telegram_users"
@@ -58,22 +78,4 @@ class TelegramUser(Base):
         - manage_accounts: управление Gmail аккаунтами
         - manage_users: управление пользователями
         """
-        permissions_map = {
-            RoleEnum.USER: [],
-            RoleEnum.MODERATOR: [
-                'view_applications',
-                'change_status',
-                'export_data',
-                'parse_emails'
-            ],
-            RoleEnum.ADMIN: [
-                'view_applications',
-                'change_status',
-                'export_data',
-                'parse_emails',
-                'manage_accounts',
-                'manage_users'
-            ]
-        }
-
-        return permission in permissions_map.get(self.role, [])
+        return permission in ROLE_PERMISSIONS.get(self.role, [])
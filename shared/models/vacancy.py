@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Text, ForeignKey, Index, text, event, DDL
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from shared.database.database import Base
 
@@ -12,10 +12,21 @@ class Vacancy(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     gmail_account_id = Column(Integer, ForeignKey("gmail_accounts.id"), nullable=True)  # Привязка к Gmail аккаунту (integer PK)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # Счетчики откликов, их ведут триггеры на applications (см. APPLICATION_COUNTER_TRIGGERS)
+    applications_count = Column(Integer, nullable=False, default=0, server_default="0")  # Не удаленные
+    unprocessed_count = Column(Integer, nullable=False, default=0, server_default="0")  # Не удаленные и не обработанные
+    deleted_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     applications = relationship("Application", back_populates="vacancy")
     gmail_account = relationship("GmailAccount", back_populates="vacancies")
 
+    __table_args__ = (
+        # Список вакансий модератора и счетчики /stats по аккаунту
+        Index("ix_vacancies_gmail_account_deleted_created", "gmail_account_id", "deleted_at", "created_at"),
+        # Список всех активных вакансий (/recent у админа)
+        Index("ix_vacancies_active_created", "created_at", sqlite_where=text("deleted_at IS NULL")),
+    )
+
 class Application(Base):
     __tablename__ = "applications"
 
@@ -24,16 +35,69 @@ class Application(Base):
     email = Column(String(255), nullable=True)
     phone = Column(String(50), nullable=True)
     file_path = Column(String(500), nullable=True)
+    file_sha256 = Column(String(64), nullable=True, index=True)  # Ключ файла в хранилище resume_blobs
     attachment_filename = Column(String(255), nullable=True)
     gmail_message_id = Column(String(255), unique=True, nullable=True)
-    applicant_message = Column(Text, nullable=True)
+    # Большие тексты не грузятся вместе с откликом: списки обходятся без них,
+    # карточка подгружает их через undefer_group("heavy")
+    applicant_message = deferred(Column(Text, nullable=True), group="heavy")
     vacancy_id = Column(Integer, ForeignKey("vacancies.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_processed = Column(Boolean, default=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
-    summary = Column(Text, nullable=True)
-    processing_description = Column(Text, nullable=True)
+    summary = deferred(Column(Text, nullable=True), group="heavy")
+    processing_description = deferred(Column(Text, nullable=True), group="heavy")
     source = Column(String(20), nullable=False, default="gmail", server_default="gmail")
     telegram_user_id = Column(BigInteger, nullable=True)
 
-    vacancy = relationship("Vacancy", back_populates="applications")
\ No newline at end of file
+    vacancy = relationship("Vacancy", back_populates="applications")
+
+    __table_args__ = (
+        # Отклики вакансии, новые сверху
+        Index(
+            "ix_applications_active_vacancy_created", "vacancy_id", "created_at",
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        # Необработанные отклики (_build_unprocessed_stmt)
+        Index(
+            "ix_applications_active_processed_created", "is_processed", "created_at",
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index("ix_applications_telegram_user_id", "telegram_user_id"),
+    )
+
+
+# Триггеры срабатывают и на массовые update(Application), которые обходят события ORM
+_COUNTER_DELTA = """
+    applications_count = applications_count {sign} ({row}.deleted_at IS NULL),
+    unprocessed_count = unprocessed_count {sign} ({row}.deleted_at IS NULL AND NOT coalesce({row}.is_processed, 0)),
+    deleted_count = deleted_count {sign} ({row}.deleted_at IS NOT NULL)
+"""
+
+APPLICATION_COUNTER_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_applications_counters_insert
+    AFTER INSERT ON applications
+    BEGIN
+        UPDATE vacancies SET {_COUNTER_DELTA.format(sign="+", row="NEW")} WHERE id = NEW.vacancy_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_applications_counters_delete
+    AFTER DELETE ON applications
+    BEGIN
+        UPDATE vacancies SET {_COUNTER_DELTA.format(sign="-", row="OLD")} WHERE id = OLD.vacancy_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_applications_counters_update
+    AFTER UPDATE OF vacancy_id, is_processed, deleted_at ON applications
+    BEGIN
+        UPDATE vacancies SET {_COUNTER_DELTA.format(sign="-", row="OLD")} WHERE id = OLD.vacancy_id;
+        UPDATE vacancies SET {_COUNTER_DELTA.format(sign="+", row="NEW")} WHERE id = NEW.vacancy_id;
+    END
+    """,
+)
+
+for _trigger_sql in APPLICATION_COUNTER_TRIGGERS:
+    event.listen(Application.__table__, "after_create", DDL(_trigger_sql).execute_if(dialect="sqlite"))
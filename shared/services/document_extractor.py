@@ -1,21 +1,47 @@
 import os
-from typing import Optional, Tuple
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional, Tuple
 import PyPDF2
 from docx import Document
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Extraction runs in worker processes so a malformed or huge file cannot hang or bloat the bot
+EXTRACT_PROCESSES = int(os.getenv("EXTRACT_PROCESSES", "2"))
+# Wall-clock limit per file, seconds; the worker is killed when it is exceeded
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "60"))
+# Address space limit of a worker (RLIMIT_AS), MB; 0 disables it
+EXTRACT_MAX_MEMORY_MB = int(os.getenv("EXTRACT_MAX_MEMORY_MB", "1024"))
+# Only the first N pages of a PDF are read
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "50"))
+# Character budget of the extracted text (prompts need only the beginning); 0 — no limit
+EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", "20000"))
+# Workers are replaced with fresh processes after about this many files each
+EXTRACT_MAX_TASKS_PER_CHILD = int(os.getenv("EXTRACT_MAX_TASKS_PER_CHILD", "50"))
+
+
 class DocumentTextExtractor:
     """Service for extracting text from PDF and DOCX files"""
 
+    # Bump when extraction output changes: stored resume texts of older versions are re-extracted
+    VERSION = 3  # 2: PDFs are capped at EXTRACT_MAX_PAGES pages; 3: text is capped at EXTRACT_MAX_CHARS
+
     @staticmethod
-    def extract_text_from_file(file_path: str) -> Optional[str]:
+    def extract_text_from_file(file_path: str, max_pages: Optional[int] = None,
+                               max_chars: Optional[int] = None) -> Optional[str]:
         """
         Extract text from PDF or DOCX file
 
+        Runs in the calling process; async code should use extraction_pool.extract() instead.
+
         Args:
             file_path: Path to the file
+            max_pages: Read at most this many PDF pages
+            max_chars: Stop reading once this many characters are collected
 
         Returns:
             Extracted text or None if extraction failed
@@ -25,45 +51,79 @@ class DocumentTextExtractor:
             return None
 
         file_extension = os.path.splitext(file_path)[1].lower()
+        if file_extension not in ('.pdf', '.docx'):
+            logger.warning(f"Unsupported file format: {file_extension}")
+            return None
 
         try:
-            if file_extension == '.pdf':
-                return DocumentTextExtractor._extract_from_pdf(file_path)
-            elif file_extension == '.docx':
-                return DocumentTextExtractor._extract_from_docx(file_path)
-            else:
-                logger.warning(f"Unsupported file format: {file_extension}")
-                return None
+            return DocumentTextExtractor._join_chunks(
+                DocumentTextExtractor.iter_chunks(file_path, max_pages), max_chars
+            )
+        except MemoryError:
+            # Let the pool report the memory limit instead of "no text"
+            raise
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {str(e)}")
             return None
 
     @staticmethod
-    def _extract_from_pdf(file_path: str) -> str:
-        """Extract text from PDF file"""
-        text = ""
+    def iter_chunks(file_path: str, max_pages: Optional[int] = None) -> Iterator[str]:
+        """
+        Yield the text of a PDF or DOCX file piece by piece
+
+        A PDF yields one chunk per page, a DOCX one per paragraph and per table row.
+        Nothing is read past the chunk the caller stops at.
+
+        Args:
+            file_path: Path to the file
+            max_pages: Read at most this many PDF pages
+
+        Raises:
+            ValueError: Unsupported file format
+        """
+        file_extension = os.path.splitext(file_path)[1].lower()
+        if file_extension == '.pdf':
+            return DocumentTextExtractor._iter_pdf_chunks(file_path, max_pages)
+        elif file_extension == '.docx':
+            return DocumentTextExtractor._iter_docx_chunks(file_path)
+        raise ValueError(f"Unsupported file format: {file_extension}")
+
+    @staticmethod
+    def _join_chunks(chunks: Iterator[str], max_chars: Optional[int] = None) -> str:
+        """Join chunks in one pass, stopping at max_chars characters"""
+        parts = []
+        length = 0
+        for chunk in chunks:
+            if max_chars and length + len(chunk) >= max_chars:
+                parts.append(chunk[:max_chars - length])
+                break
+            parts.append(chunk)
+            length += len(chunk)
+        return "".join(parts).strip()
+
+    @staticmethod
+    def _iter_pdf_chunks(file_path: str, max_pages: Optional[int] = None) -> Iterator[str]:
+        """Text of PDF pages, one page per chunk"""
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
+            page_count = len(pdf_reader.pages)
+            if max_pages is not None and page_count > max_pages:
+                logger.warning(f"{file_path}: reading {max_pages} of {page_count} pages")
+                page_count = max_pages
+            for index in range(page_count):
+                yield pdf_reader.pages[index].extract_text() + "\n"
 
     @staticmethod
-    def _extract_from_docx(file_path: str) -> str:
-        """Extract text from DOCX file"""
+    def _iter_docx_chunks(file_path: str) -> Iterator[str]:
+        """Text of DOCX paragraphs, then of table rows"""
         doc = Document(file_path)
-        text = ""
         for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
+            yield paragraph.text + "\n"
 
         # Extract text from tables
         for table in doc.tables:
             for row in table.rows:
-                for cell in row.cells:
-                    text += cell.text + " "
-                text += "\n"
-
-        return text.strip()
+                yield "".join(cell.text + " " for cell in row.cells) + "\n"
 
     @staticmethod
     def is_supported_format(filename: str) -> bool:
@@ -71,4 +131,128 @@ class DocumentTextExtractor:
         if not filename:
             return False
         extension = os.path.splitext(filename)[1].lower()
-        return extension in ['.pdf', '.docx']
\ No newline at end of file
+        return extension in ['.pdf', '.docx']
+
+
+class ExtractionError(Exception):
+    """
+    Extraction was aborted: timeout, memory limit or a crashed worker
+
+    `permanent` is False when the failure may not be caused by the file itself
+    (the worker died during a pool restart); such a file should be tried again later.
+    """
+
+    def __init__(self, message: str, permanent: bool = True):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+def _limit_worker_memory(max_memory_mb: int):
+    """Pool initializer: caps the worker's address space"""
+    if max_memory_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return
+    limit = max_memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+class ExtractionPool:
+    """
+    Process pool for DocumentTextExtractor with per-file limits
+
+    Workers are spawned (forking a process with a running event loop is unsafe)
+    and capped with RLIMIT_AS. After processes * max_tasks_per_child files the pool
+    is retired: new files go to a fresh pool while the old one finishes its work and
+    exits. ProcessPoolExecutor's own max_tasks_per_child is not used, it deadlocks
+    on Python 3.11 when more files are queued than the workers may take. A file that
+    runs past the timeout gets its worker killed; since ProcessPoolExecutor cannot
+    kill a single worker, the whole pool is restarted and the other files that were
+    in flight are retried once on the new pool. At most `processes` files are
+    submitted at a time, so the timeout counts only the time a file is being parsed,
+    not the time it waits for a free worker.
+    """
+
+    def __init__(self, processes: int = EXTRACT_PROCESSES, timeout: float = EXTRACT_TIMEOUT,
+                 max_memory_mb: int = EXTRACT_MAX_MEMORY_MB, max_pages: int = EXTRACT_MAX_PAGES,
+                 max_chars: int = EXTRACT_MAX_CHARS, max_tasks_per_child: int = EXTRACT_MAX_TASKS_PER_CHILD):
+        self.processes = max(1, processes)
+        self.timeout = timeout
+        self.max_memory_mb = max_memory_mb
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.max_tasks_per_child = max_tasks_per_child
+        self._pool = None
+        self._submitted = 0  # Files sent to the current pool
+        self._slots = None  # Created on first use, inside the running event loop
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is not None and 0 < self.max_tasks_per_child * self.processes <= self._submitted:
+            # Recycle: running files finish in the old pool, then its workers exit
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_worker_memory,
+                initargs=(self.max_memory_mb,),
+            )
+            self._submitted = 0
+        self._submitted += 1
+        return self._pool
+
+    def _restart(self, pool: ProcessPoolExecutor):
+        """Kills the workers of `pool`; the next call starts a new pool"""
+        if self._pool is pool:
+            self._pool = None
+        # ProcessPoolExecutor has no public way to stop a busy worker
+        for process in list((pool._processes or {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def extract(self, file_path: str) -> Optional[str]:
+        """
+        Extract text from a PDF or DOCX file in a worker process
+
+        Returns:
+            Extracted text or None if the file has no readable text
+
+        Raises:
+            ExtractionError: The file hit the timeout or memory limit, or crashed the worker
+        """
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.processes)
+
+        for attempt in (1, 2):
+            # A file waits here for a free worker, outside of its timeout
+            async with self._slots:
+                pool = self._get_pool()
+                future = loop.run_in_executor(
+                    pool, DocumentTextExtractor.extract_text_from_file, file_path, self.max_pages, self.max_chars
+                )
+                try:
+                    return await asyncio.wait_for(future, self.timeout)
+                except asyncio.TimeoutError:
+                    self._restart(pool)
+                    raise ExtractionError(f"{file_path}: extraction timed out after {self.timeout:g}s")
+                except MemoryError:
+                    raise ExtractionError(f"{file_path}: extraction exceeded {self.max_memory_mb} MB")
+                except BrokenProcessPool:
+                    # Killed by a restart for another file, or crashed on this one: retry once
+                    self._restart(pool)
+                    if attempt == 2:
+                        raise ExtractionError(f"{file_path}: extraction worker crashed", permanent=False)
+                    logger.warning(f"Extraction pool restarted, retrying {file_path}")
+
+    def shutdown(self):
+        """Stops the workers"""
+        if self._pool is not None:
+            self._restart(self._pool)
+
+
+# Shared by everything that extracts resume text in the bot process
+extraction_pool = ExtractionPool()
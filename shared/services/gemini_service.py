@@ -1,13 +1,108 @@
 import os
+import asyncio
 import logging
+import random
+import time
 from typing import Optional
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from dotenv import load_dotenv
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+GEMINI_MODEL = "gemini-2.5-pro"
+# Bump when a prompt changes: cached results of the old prompt stop matching (see llm_cache)
+SUMMARY_PROMPT_VERSION = 1
+QUESTIONS_PROMPT_VERSION = 1
+
+# Max simultaneous Gemini requests for the whole process
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "3"))
+# Deadline of a single request, seconds
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "60"))
+# Attempts per call, including the first one
+GEMINI_MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "3"))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "2"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "30"))
+# Consecutive transient failures that open the circuit, and how long it stays open
+GEMINI_BREAKER_THRESHOLD = int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5"))
+GEMINI_BREAKER_COOLDOWN = float(os.getenv("GEMINI_BREAKER_COOLDOWN", "60"))
+
+# 429, 5xx and timeouts are worth retrying; anything else (bad request, blocked prompt) is not
+RETRYABLE_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServerError,
+    google_exceptions.DeadlineExceeded,
+    asyncio.TimeoutError,
+)
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the API is degraded.
+
+    After `threshold` consecutive transient failures the circuit opens for
+    `cooldown` seconds. Then one trial call is let through: success closes
+    the circuit, failure opens it again.
+    """
+
+    def __init__(self, threshold: int = GEMINI_BREAKER_THRESHOLD, cooldown: float = GEMINI_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Whether a call may be made now"""
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < self.cooldown or self._trial_in_flight:
+            return False
+        self._trial_in_flight = True  # Half-open: a single trial call
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            if self.opened_at is None:
+                logger.warning(f"Gemini circuit opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """End a call that produced no outcome (e.g. it was cancelled)"""
+        self._trial_in_flight = False
+
+
+# Shared by all GeminiService instances: services are created per job
+_semaphore: Optional[asyncio.Semaphore] = None
+breaker = CircuitBreaker()
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for attempt 1, 2, ..."""
+    return random.uniform(0, min(GEMINI_BACKOFF_MAX, GEMINI_BACKOFF_BASE * 2 ** attempt))
+
+
 class GeminiService:
     """Service for working with Google Gemini API"""
 
@@ -17,9 +112,55 @@ class GeminiService:
             raise ValueError("GEMINI_API_KEY environment variable is required")
 
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-pro')
+        self.model = genai.GenerativeModel(GEMINI_MODEL)
 
-    def generate_resume_summary(self, resume_text: str, cover_letter_text: str = "", vacancy_title: str = "") -> Optional[str]:
+    async def _generate(self, prompt: str, what: str) -> Optional[str]:
+        """
+        Run one generation through the shared concurrency limit, deadline, retries and circuit breaker
+
+        Args:
+            prompt: Prompt text
+            what: Name of the request for logs
+
+        Returns:
+            Response text or None if generation failed
+        """
+        for attempt in range(1, GEMINI_MAX_ATTEMPTS + 1):
+            if not breaker.allow():
+                logger.warning(f"Gemini circuit is open, skipping {what}")
+                return None
+
+            try:
+                async with _get_semaphore():
+                    response = await asyncio.wait_for(
+                        self.model.generate_content_async(prompt, request_options={"timeout": GEMINI_TIMEOUT}),
+                        timeout=GEMINI_TIMEOUT,
+                    )
+                text = response.text
+            except RETRYABLE_ERRORS as e:
+                breaker.record_failure()
+                if attempt == GEMINI_MAX_ATTEMPTS:
+                    logger.error(f"Error generating {what} after {attempt} attempts: {e!r}")
+                    return None
+                delay = _backoff_delay(attempt)
+                logger.warning(f"Gemini {what} attempt {attempt} failed ({e!r}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)  # Outside the semaphore: waiting does not hold a slot
+                continue
+            except Exception as e:
+                # The API answered, so it is not degraded; retrying would not help either
+                breaker.record_success()
+                logger.error(f"Error generating {what}: {str(e)}")
+                return None
+            except BaseException:
+                # Cancelled mid-call: free the half-open trial slot or the circuit never closes
+                breaker.release()
+                raise
+
+            breaker.record_success()
+            return text
+        return None
+
+    async def generate_resume_summary(self, resume_text: str, cover_letter_text: str = "", vacancy_title: str = "") -> Optional[str]:
         """
         Generate HTML summary for resume using Gemini API
 
@@ -32,13 +173,7 @@ class GeminiService:
             Generated HTML summary or None if generation failed
         """
         prompt = self._build_prompt(resume_text, cover_letter_text, vacancy_title)
-
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            logger.error(f"Error generating resume summary: {str(e)}")
-            return None
+        return await self._generate(prompt, "resume summary")
 
     def _build_prompt(self, resume_text: str, cover_letter_text: str, vacancy_title: str) -> str:
         """Build prompt for Gemini API"""
@@ -85,7 +220,7 @@ class GeminiService:
 
         return prompt
 
-    def generate_interview_questions(self, resume_text: str, vacancy_title: str = "") -> Optional[str]:
+    async def generate_interview_questions(self, resume_text: str, vacancy_title: str = "") -> Optional[str]:
         """
         Generate interview questions based on candidate's resume
 
@@ -142,9 +277,4 @@ class GeminiService:
 Вакансия: {vacancy_title if vacancy_title else "не указана"}
 Резюме: {resume_text}"""
 
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            logger.error(f"Error generating interview questions: {str(e)}")
-            return None
\ No newline at end of file
+        return await self._generate(prompt, "interview questions")
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Кеш ответов LLM в SQLite
+
+Анализ резюме и вопросы для собеседования зависят только от текста резюме,
+сопроводительного письма, названия вакансии, промпта и модели. Ключ кеша — SHA-256
+от всего этого, поэтому одно и то же резюме на несколько вакансий с одинаковым
+названием или повторное нажатие кнопки не тратят запрос к Gemini. Смена промпта
+(версия в gemini_service) или модели дает новые ключи. Таблица ограничена
+LLM_CACHE_MAX_ENTRIES записями: лишние вытесняются по давности использования.
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from shared.database.database import AsyncSessionLocal
+from shared.models.llm_cache import LlmCacheEntry
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# Попадания и промахи с запуска процесса; попадания по записи — LlmCacheEntry.hits
+llm_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def make_cache_key(kind: str, model: str, prompt_version: int, vacancy_title: str, *texts: str) -> str:
+    """Ключ записи; тексты (резюме, письмо) входят в ключ своими хешами"""
+    parts = [kind, model, prompt_version, vacancy_title or "", *(_sha256(text) for text in texts)]
+    return _sha256(json.dumps(parts, ensure_ascii=False))
+
+
+async def get_or_generate(kind: str, model: str, prompt_version: int, vacancy_title: str, texts,
+                          generate: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+    """
+    Возвращает ответ из кеша или вызывает generate() и сохраняет результат
+
+    Пустой результат (ошибка генерации) не кешируется.
+    """
+    key = make_cache_key(kind, model, prompt_version, vacancy_title, *texts)
+
+    async with AsyncSessionLocal() as session:
+        result = await session.scalar(select(LlmCacheEntry.result).where(LlmCacheEntry.key == key))
+        if result is not None:
+            await session.execute(
+                update(LlmCacheEntry)
+                .where(LlmCacheEntry.key == key)
+                .values(hits=LlmCacheEntry.hits + 1, last_used_at=datetime.now())
+            )
+            await session.commit()
+            llm_cache_stats["hits"] += 1
+            logger.info(
+                f"LLM cache hit: {kind} "
+                f"(hits={llm_cache_stats['hits']}, misses={llm_cache_stats['misses']})"
+            )
+            return result
+
+    llm_cache_stats["misses"] += 1
+    result = await generate()
+    if not result:
+        return result
+
+    async with AsyncSessionLocal() as session:
+        now = datetime.now()
+        await session.execute(
+            insert(LlmCacheEntry)
+            .values(key=key, kind=kind, model=model, prompt_version=prompt_version,
+                    result=result, created_at=now, last_used_at=now)
+            .on_conflict_do_update(
+                index_elements=[LlmCacheEntry.key],
+                set_={"result": result, "last_used_at": now},
+            )
+        )
+        # Вытесняем давно не использованные записи сверх лимита
+        stale = (
+            select(LlmCacheEntry.key)
+            .order_by(LlmCacheEntry.last_used_at.desc())
+            .offset(LLM_CACHE_MAX_ENTRIES)
+        )
+        await session.execute(delete(LlmCacheEntry).where(LlmCacheEntry.key.in_(stale)))
+        await session.commit()
+    return result
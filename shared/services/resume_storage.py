@@ -0,0 +1,269 @@
+"""
+Хранилище файлов резюме по содержимому
+
+Каждый файл хранится один раз под своим SHA-256: downloads/blobs/ab/abcd...ef.pdf.
+Отклики ссылаются на файл через Application.file_sha256, а таблица resume_blobs
+считает ссылки: файл удаляется с диска, когда на него не ссылается ни один отклик.
+Запись идет потоково — хеш считается на лету, весь файл в памяти не держится.
+
+Файлы, присланные кандидатом в боте, до подтверждения отклика лежат в
+downloads/blobs/uploads/ и попадают в хранилище только вместе со ссылкой из БД.
+"""
+import hashlib
+import logging
+import os
+import time
+import uuid
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.sqlite import insert
+
+from shared.database.database import AsyncSessionLocal
+from shared.models.resume_blob import ResumeBlob
+from shared.models.resume_text import ResumeText
+
+logger = logging.getLogger(__name__)
+
+RESUME_BLOB_DIR = os.getenv("RESUME_BLOB_DIR", "downloads/blobs")
+# Сколько часов хранить загрузку кандидата, отклик с которой так и не подтвердили
+RESUME_UPLOAD_TTL_HOURS = int(os.getenv("RESUME_UPLOAD_TTL_HOURS", "24"))
+
+UPLOAD_SUBDIR = "uploads"
+
+
+class StoredBlob(NamedTuple):
+    sha256: str
+    path: str
+    size: int
+
+
+class StagedUpload(NamedTuple):
+    """Загруженный, но еще не подтвержденный файл во временной папке"""
+    sha256: str
+    path: str
+    size: int
+    extension: str
+
+
+def blob_path(blob_dir: str, sha256: str, extension: str) -> str:
+    """Путь файла в хранилище по его хешу"""
+    return os.path.join(blob_dir, sha256[:2], f"{sha256}{extension}")
+
+
+class BlobWriter:
+    """
+    Файлоподобный объект для записи в хранилище
+
+    Пишет во временный файл и одновременно считает SHA-256. finalize() переносит
+    файл на место по хешу, stage() оставляет его во временной папке tmp_dir.
+    Подходит как destination для Bot.download_file (с seek=False).
+    """
+
+    def __init__(self, extension="", blob_dir=RESUME_BLOB_DIR, tmp_dir=None):
+        tmp_dir = tmp_dir or blob_dir
+        os.makedirs(tmp_dir, exist_ok=True)
+        self.blob_dir = blob_dir
+        self.extension = extension.lower()
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._tmp_path = os.path.join(tmp_dir, f".tmp-{uuid.uuid4().hex}")
+        self._file = open(self._tmp_path, "wb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+
+    def write(self, data):
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def finalize(self) -> StoredBlob:
+        """Закрывает файл и переносит его в хранилище под именем по хешу"""
+        self._file.close()
+        sha256 = self._hash.hexdigest()
+        path = blob_path(self.blob_dir, sha256, self.extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Содержимое по этому пути всегда одинаковое, поэтому перезапись безопасна
+        os.replace(self._tmp_path, path)
+        return StoredBlob(sha256, path, self.size)
+
+    def stage(self) -> StagedUpload:
+        """Закрывает файл, оставляя его во временной папке до acquire_upload()"""
+        self._file.close()
+        return StagedUpload(self._hash.hexdigest(), self._tmp_path, self.size, self.extension)
+
+    def abort(self):
+        """Удаляет недописанный временный файл"""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class ResumeStorage:
+    """Сохранение файлов резюме с дедупликацией и подсчетом ссылок"""
+
+    def __init__(self, blob_dir: str = RESUME_BLOB_DIR):
+        self.blob_dir = blob_dir
+
+    def open_writer(self, filename: str) -> BlobWriter:
+        """Новый BlobWriter; расширение берется из исходного имени файла"""
+        return BlobWriter(os.path.splitext(filename or "")[1], self.blob_dir)
+
+    @property
+    def upload_dir(self) -> str:
+        return os.path.join(self.blob_dir, UPLOAD_SUBDIR)
+
+    def open_upload(self, filename: str) -> BlobWriter:
+        """BlobWriter для файла кандидата: до подтверждения файл остается в upload_dir"""
+        return BlobWriter(os.path.splitext(filename or "")[1], self.blob_dir, tmp_dir=self.upload_dir)
+
+    def discard_upload(self, path: Optional[str]):
+        """Удаляет неподтвержденную загрузку (отмена, пропуск, повторная загрузка)"""
+        if not path or os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.upload_dir):
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error removing resume upload {path}: {e}")
+
+    def cleanup_uploads(self, max_age_hours: int = RESUME_UPLOAD_TTL_HOURS) -> int:
+        """
+        Удаляет брошенные загрузки старше max_age_hours (например, после перезапуска бота)
+
+        Returns:
+            Количество удаленных файлов
+        """
+        if not os.path.isdir(self.upload_dir):
+            return 0
+
+        deadline = time.time() - max_age_hours * 3600
+        removed = 0
+        for entry in os.scandir(self.upload_dir):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < deadline:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError as e:
+                logger.error(f"Error removing resume upload {entry.path}: {e}")
+        return removed
+
+    async def acquire(self, session, blob: StoredBlob) -> str:
+        """
+        Добавляет ссылку на файл в текущей транзакции
+
+        Returns:
+            Путь к файлу в хранилище для Application.file_path
+        """
+        stmt = insert(ResumeBlob).values(
+            sha256=blob.sha256, path=blob.path, size=blob.size, ref_count=1
+        ).on_conflict_do_update(
+            index_elements=[ResumeBlob.sha256],
+            set_={"ref_count": ResumeBlob.ref_count + 1},
+        )
+        await session.execute(stmt)
+
+        path = await session.scalar(select(ResumeBlob.path).where(ResumeBlob.sha256 == blob.sha256))
+        if path != blob.path:
+            if os.path.exists(path):
+                # Тот же файл уже лежит под другим расширением — копия не нужна
+                if os.path.exists(blob.path):
+                    os.remove(blob.path)
+            else:
+                # Старый файл пропал с диска — используем только что записанный
+                await session.execute(
+                    update(ResumeBlob).where(ResumeBlob.sha256 == blob.sha256).values(path=blob.path)
+                )
+                path = blob.path
+
+        # Параллельный release() + purge() мог удалить файл до нашей ссылки —
+        # не даем записать ResumeBlob на отсутствующий файл
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Resume blob {path} was removed before it was referenced")
+        return path
+
+    async def acquire_upload(self, session, upload: StagedUpload) -> str:
+        """
+        Переносит подтвержденную загрузку в хранилище и добавляет ссылку в текущей транзакции
+
+        Файл появляется в хранилище только после того, как строка resume_blobs
+        уже обновлена в этой транзакции.
+
+        Returns:
+            Путь к файлу в хранилище для Application.file_path
+        """
+        target = blob_path(self.blob_dir, upload.sha256, upload.extension)
+        stmt = insert(ResumeBlob).values(
+            sha256=upload.sha256, path=target, size=upload.size, ref_count=1
+        ).on_conflict_do_update(
+            index_elements=[ResumeBlob.sha256],
+            set_={"ref_count": ResumeBlob.ref_count + 1},
+        )
+        await session.execute(stmt)
+
+        path = await session.scalar(select(ResumeBlob.path).where(ResumeBlob.sha256 == upload.sha256))
+        if os.path.exists(path):
+            # Такой файл уже есть в хранилище — загрузка не нужна
+            self.discard_upload(upload.path)
+            return path
+
+        if path != target:
+            # Старый файл пропал с диска — используем только что загруженный
+            await session.execute(
+                update(ResumeBlob).where(ResumeBlob.sha256 == upload.sha256).values(path=target)
+            )
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(upload.path, target)
+        return target
+
+    async def release(self, session, sha256: Optional[str]) -> Optional[str]:
+        """
+        Убирает ссылку на файл в текущей транзакции
+
+        Returns:
+            Путь к файлу, если ссылок не осталось — удалить его после commit через purge()
+        """
+        if not sha256:
+            return None
+
+        await session.execute(
+            update(ResumeBlob)
+            .where(ResumeBlob.sha256 == sha256)
+            .values(ref_count=ResumeBlob.ref_count - 1)
+        )
+        row = (await session.execute(
+            select(ResumeBlob.ref_count, ResumeBlob.path).where(ResumeBlob.sha256 == sha256)
+        )).one_or_none()
+        if row is None or row.ref_count > 0:
+            return None
+
+        await session.execute(delete(ResumeBlob).where(ResumeBlob.sha256 == sha256))
+        await session.execute(delete(ResumeText).where(ResumeText.sha256 == sha256))
+        return row.path
+
+    async def purge(self, path: Optional[str]):
+        """Удаляет файл, если на него так и не появилось ссылок"""
+        if not path:
+            return
+
+        async with AsyncSessionLocal() as session:
+            referenced = await session.scalar(select(ResumeBlob.sha256).where(ResumeBlob.path == path))
+        if referenced or not os.path.exists(path):
+            return
+
+        try:
+            os.remove(path)
+            logger.info(f"Removed unreferenced resume blob {path}")
+        except OSError as e:
+            logger.error(f"Error removing resume blob {path}: {e}")
@@ -1,7 +1,9 @@
 import logging
 from typing import Optional
 from shared.services.document_extractor import DocumentTextExtractor
-from shared.services.gemini_service import GeminiService
+from shared.services.gemini_service import GeminiService, GEMINI_MODEL, SUMMARY_PROMPT_VERSION
+from shared.services import llm_cache
+from shared.services.resume_texts import get_resume_text
 from shared.models.vacancy import Application, Vacancy
 
 logger = logging.getLogger(__name__)
@@ -38,7 +40,8 @@ class ResumeSummaryService:
         # Extract text from resume file
         resume_text = None
         if application.file_path:
-            resume_text = self.document_extractor.extract_text_from_file(application.file_path)
+            # Parsed once per file content, see resume_texts
+            resume_text = await get_resume_text(application.file_path, application.file_sha256)
 
         if not resume_text:
             logger.error(f"Failed to extract text from resume file for application {application.id}")
@@ -48,12 +51,15 @@ class ResumeSummaryService:
         cover_letter_text = application.applicant_message or ""
         vacancy_title = vacancy.title if vacancy else ""
 
-        # Generate summary using Gemini API
+        # Generate summary using Gemini API, unless the same inputs were already summarized
         try:
-            summary = self.gemini_service.generate_resume_summary(
-                resume_text=resume_text,
-                cover_letter_text=cover_letter_text,
-                vacancy_title=vacancy_title
+            summary = await llm_cache.get_or_generate(
+                "summary", GEMINI_MODEL, SUMMARY_PROMPT_VERSION, vacancy_title, (resume_text, cover_letter_text),
+                generate=lambda: self.gemini_service.generate_resume_summary(
+                    resume_text=resume_text,
+                    cover_letter_text=cover_letter_text,
+                    vacancy_title=vacancy_title
+                )
             )
 
             if summary:
@@ -0,0 +1,104 @@
+"""
+Извлеченный текст резюме в таблице resume_texts
+
+PDF и DOCX разбираются один раз на файл: текст сохраняется под SHA-256 содержимого
+(тот же ключ, что у resume_blobs), поэтому одинаковые резюме из разных откликов
+разбираются один раз. Текст извлекается фоновой задачей сразу после сохранения
+отклика в пуле процессов с лимитами времени и памяти (см. ExtractionPool).
+Запись со старой DocumentTextExtractor.VERSION считается устаревшей: при чтении
+текст извлекается заново, а при старте бота такие файлы ставятся в очередь
+(см. find_stale_blobs).
+"""
+import logging
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, or_
+from sqlalchemy.dialects.sqlite import insert
+
+from shared.database.database import AsyncSessionLocal
+from shared.models.resume_blob import ResumeBlob
+from shared.models.resume_text import ResumeText
+from shared.services.document_extractor import DocumentTextExtractor, ExtractionError, extraction_pool
+
+logger = logging.getLogger(__name__)
+
+
+async def extract_and_store(sha256: str, file_path: str) -> Optional[str]:
+    """
+    Извлекает текст файла и сохраняет его в resume_texts
+
+    Если файла нет на диске, ничего не сохраняет: это не свойство содержимого.
+    Сбой воркера, не связанный с файлом, тоже не сохраняется — ExtractionError
+    пробрасывается, и фоновая задача повторяет извлечение.
+    """
+    if not file_path or not os.path.exists(file_path):
+        logger.error(f"Resume file not found: {file_path}")
+        return None
+
+    # Разбор PDF/DOCX идет в пуле процессов с лимитами времени и памяти
+    try:
+        text = await extraction_pool.extract(file_path)
+    except ExtractionError as e:
+        if not e.permanent:
+            # Воркер упал не обязательно из-за этого файла — задача повторит попытку
+            raise
+        # Файл, превысивший лимиты, сохраняется без текста и не разбирается повторно
+        logger.error(f"Resume text extraction aborted: {e}")
+        text = None
+
+    now = datetime.now()
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            insert(ResumeText)
+            .values(sha256=sha256, extractor_version=DocumentTextExtractor.VERSION, text=text, extracted_at=now)
+            .on_conflict_do_update(
+                index_elements=[ResumeText.sha256],
+                set_={"extractor_version": DocumentTextExtractor.VERSION, "text": text, "extracted_at": now},
+            )
+        )
+        await session.commit()
+    return text
+
+
+async def get_resume_text(file_path: Optional[str], file_sha256: Optional[str] = None) -> Optional[str]:
+    """
+    Текст резюме: из resume_texts, а если его там нет — извлекает и сохраняет
+
+    Файлы, сохраненные до хранилища по хешу (без file_sha256), разбираются каждый раз.
+    """
+    if not file_sha256:
+        if not file_path:
+            return None
+        try:
+            return await extraction_pool.extract(file_path)
+        except ExtractionError as e:
+            logger.error(f"Resume text extraction aborted: {e}")
+            return None
+
+    async with AsyncSessionLocal() as session:
+        row = (await session.execute(
+            select(ResumeText.text).where(
+                ResumeText.sha256 == file_sha256,
+                ResumeText.extractor_version == DocumentTextExtractor.VERSION,
+            )
+        )).one_or_none()
+    if row is not None:
+        return row.text
+
+    return await extract_and_store(file_sha256, file_path)
+
+
+async def find_stale_blobs() -> List[Tuple[str, str]]:
+    """Файлы хранилища без текста или с текстом от старой версии извлечения: [(sha256, path)]"""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(ResumeBlob.sha256, ResumeBlob.path)
+            .outerjoin(ResumeText, ResumeText.sha256 == ResumeBlob.sha256)
+            .where(or_(
+                ResumeText.sha256.is_(None),
+                ResumeText.extractor_version != DocumentTextExtractor.VERSION,
+            ))
+        )
+        return [(row.sha256, row.path) for row in result]
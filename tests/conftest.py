@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Тесты запускаются из корня репозитория: python -m pytest
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def migrated_db(tmp_path):
+    """Путь к файловой SQLite, собранной всеми миграциями alembic"""
+    from alembic import command
+    from alembic.config import Config
+
+    path = tmp_path / "hrbot.db"
+    config = Config()
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{path}")
+    command.upgrade(config, "head")
+    return path
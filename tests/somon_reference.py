@@ -0,0 +1,127 @@
+"""
+Прежний разбор писем SomonTj на BeautifulSoup — эталон для bot/somon_extractor.py
+
+Логика перенесена из GmailParser.extract_somon_contact_info и поиска вложений
+в process_message до перехода на однопроходный разбор, без изменений.
+Используется тестом паритета и бенчмарком benchmarks/somon_extractor.py.
+"""
+import re
+
+from bs4 import BeautifulSoup
+
+
+def _find_attachment(soup):
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        link_text = link.get_text().strip()
+
+        if ('mail.google.com' in href and 'attid=' in href and 'view=att' in href) \
+                or 'mail-attachment.googleusercontent.com' in href:
+            filename = None
+            if link_text and not link_text.startswith('http') and len(link_text) > 3:
+                filename = link_text
+            return href, filename
+    return None, None
+
+
+def extract_reference(html_body):
+    """Результат в формате bot.somon_extractor.extract_somon_email"""
+    soup = BeautifulSoup(html_body, 'html.parser')
+    text = soup.get_text()
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    applicant_message = None
+    message_match = re.search(r'Текст сообщения:\s*(.*?)(?:Имя:|Email|$)', text)
+    if message_match:
+        applicant_message = message_match.group(1).strip()
+        if 'не предоставил сопроводительного письма' in applicant_message:
+            applicant_message = None
+
+    name = None
+    for p in soup.find_all('p'):
+        p_text = p.get_text().strip()
+        if p_text.startswith('Имя:'):
+            name = p_text.replace('Имя:', '').strip()
+            break
+
+    if not name:
+        name_patterns = [
+            r'Имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+            r'Имя\s*[-:]\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+            r'Name:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+            r'ФИО:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+            r'Полное имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+            r'Текст сообщения:.*?Имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+            r'не предоставил сопроводительного письма.*?Имя:\s*(.+?)(?:\s+Email|\s+Телефон|$)',
+        ]
+        for pattern in name_patterns:
+            name_match = re.search(pattern, text, re.MULTILINE | re.DOTALL)
+            if name_match:
+                candidate_name = name_match.group(1).strip()
+                if len(candidate_name) < 100 and re.search(r'[А-Яа-яA-Za-z]', candidate_name):
+                    name = candidate_name
+                    break
+
+    email = None
+    email_links = soup.find_all('a', href=re.compile(r'^mailto:'))
+    if email_links:
+        email = email_links[0]['href'].replace('mailto:', '')
+    else:
+        email_patterns = [
+            r'Email для контакта\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
+            r'Email\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
+            r'E-mail\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
+            r'Почта\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
+            r'электронная почта\s*[-:]\s*(.+?)(?:\n|Телефон|$)',
+            r'не предоставил сопроводительного письма.*?([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+            r'Текст сообщения:.*?([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+            r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
+        ]
+        for pattern in email_patterns:
+            email_match = re.search(pattern, text, re.MULTILINE | re.DOTALL)
+            if email_match:
+                candidate_email = email_match.group(1).strip()
+                if '@' in candidate_email and '.' in candidate_email.split('@')[-1]:
+                    email = candidate_email
+                    break
+
+    phone = None
+    for p in soup.find_all('p'):
+        p_text = p.get_text().strip()
+        if p_text.startswith('Телефон для контакта'):
+            phone = p_text.replace('Телефон для контакта -', '').replace('Телефон для контакта:', '').strip()
+            break
+
+    if not phone:
+        phone_patterns = [
+            r'Телефон для контакта\s*[-:]\s*(.+?)(?:\n|$)',
+            r'Телефон\s*[-:]\s*(.+?)(?:\n|$)',
+            r'Phone\s*[-:]\s*(.+?)(?:\n|$)',
+            r'Моб\.\s*тел\.\s*[-:]\s*(.+?)(?:\n|$)',
+            r'Мобильный\s*[-:]\s*(.+?)(?:\n|$)',
+            r'Номер\s*[-:]\s*(.+?)(?:\n|$)',
+            r'не предоставил сопроводительного письма.*?(\+?992[0-9]{9})',
+            r'не предоставил сопроводительного письма.*?(\+?[0-9]{9,15})',
+            r'Текст сообщения:.*?(\+?992[0-9]{9})',
+            r'Текст сообщения:.*?(\+?[0-9]{9,15})',
+            r'(\+?992[0-9]{9})',
+            r'(\+?[0-9]{9,15})'
+        ]
+        for pattern in phone_patterns:
+            phone_match = re.search(pattern, text, re.MULTILINE | re.DOTALL)
+            if phone_match:
+                candidate_phone = phone_match.group(1).strip()
+                if re.search(r'[0-9+]', candidate_phone) and \
+                        len(candidate_phone.replace(' ', '').replace('-', '').replace('+', '')) >= 9:
+                    phone = candidate_phone
+                    break
+
+    attachment_url, attachment_filename = _find_attachment(soup)
+    return {
+        'name': name,
+        'email': email,
+        'phone': phone,
+        'message': applicant_message,
+        'attachment_url': attachment_url,
+        'attachment_filename': attachment_filename,
+    }
@@ -0,0 +1,82 @@
+"""Извлечение текста резюме (shared/services/document_extractor.py)"""
+import asyncio
+import os
+
+import PyPDF2
+import pytest
+from docx import Document
+
+from shared.services.document_extractor import DocumentTextExtractor, ExtractionError, ExtractionPool
+from tests.pdf_fixtures import write_text_pdf
+
+
+def _docx(path, text):
+    document = Document()
+    document.add_paragraph(text)
+    document.save(path)
+    return str(path)
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="нужен именованный канал")
+def test_timeout_counts_only_parse_time(tmp_path):
+    # Чтение из FIFO без писателя блокируется навсегда — файл "зависает" в воркере
+    hanging = tmp_path / "hanging.pdf"
+    os.mkfifo(hanging)
+    valid = [_docx(tmp_path / f"cv{i}.docx", f"Резюме {i}") for i in range(4)]
+
+    async def run():
+        pool = ExtractionPool(processes=1, timeout=5)
+        try:
+            return await asyncio.gather(
+                pool.extract(str(hanging)), *(pool.extract(path) for path in valid), return_exceptions=True
+            )
+        finally:
+            pool.shutdown()
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[0], ExtractionError)
+    assert results[0].permanent
+    # Файлы, ждавшие свободного воркера, не попадают под таймаут зависшего
+    assert results[1:] == [f"Резюме {i}" for i in range(4)]
+
+
+def test_join_stops_pulling_chunks_at_max_chars():
+    pulled = []
+
+    def chunks():
+        for i in range(100):
+            pulled.append(i)
+            yield "x" * 10
+
+    text = DocumentTextExtractor._join_chunks(chunks(), max_chars=25)
+
+    assert text == "x" * 25
+    assert pulled == [0, 1, 2]
+
+
+def test_max_chars_stops_reading_pdf_pages_early(tmp_path, monkeypatch):
+    path = write_text_pdf(tmp_path / "cv.pdf", pages=20)
+    page_chars = len(DocumentTextExtractor.extract_text_from_file(path, max_pages=1)) + 1
+
+    calls = []
+    extract_text = PyPDF2.PageObject.extract_text
+
+    def counting_extract_text(page, *args, **kwargs):
+        calls.append(page)
+        return extract_text(page, *args, **kwargs)
+
+    monkeypatch.setattr(PyPDF2.PageObject, "extract_text", counting_extract_text)
+
+    # Бюджет в полторы страницы: читаются две первые страницы из двадцати
+    max_chars = page_chars * 3 // 2
+    text = DocumentTextExtractor.extract_text_from_file(path, max_chars=max_chars)
+
+    assert len(calls) == 2
+    assert "Page 1 line 0" in text and "Page 2" not in text
+    assert len(text) <= max_chars
+
+    calls.clear()
+    full = DocumentTextExtractor.extract_text_from_file(path)
+    assert len(calls) == 20
+    assert full.startswith(text)
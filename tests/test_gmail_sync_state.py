@@ -0,0 +1,103 @@
+"""Чекпоинт синхронизации Gmail: last_synced_at и окно после устаревшего historyId (bot/gmail_parser.py)"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from bot import gmail_parser
+from bot.gmail_client import GmailApiError
+from bot.gmail_parser import GmailParser
+from shared.models.gmail_account import GmailAccount
+
+
+# В пределах GMAIL_FALLBACK_MAX_DAYS, чтобы окно строилось от него, а не от предела
+LAST_SYNCED_AT = (datetime.now() - timedelta(hours=6)).replace(microsecond=0)
+
+
+class FakeParser(GmailParser):
+    """GmailParser без авторизации; ответы Gmail задает тест"""
+
+    def __init__(self, history=None, processed=True, backfill_finished=True):
+        self.account_id = "main"
+        self.history = history
+        self.processed = processed
+        self.backfill_finished = backfill_finished
+        self.backfill_queries = []
+
+    async def _list_history_message_ids(self, history_id):
+        if isinstance(self.history, Exception):
+            raise self.history
+        return ["m1", "m2"], self.history
+
+    async def _process_message_ids(self, message_ids, summary):
+        return self.processed
+
+    async def _get_current_history_id(self):
+        return "900"
+
+    async def _drain_backfill(self, query, page_token, summary):
+        self.backfill_queries.append(query)
+        return (None, True) if self.backfill_finished else ("page-2", False)
+
+
+@pytest.fixture
+def sync(migrated_db, monkeypatch):
+    """Один цикл parse_new_emails для аккаунта с historyId 100; возвращает сохраненное состояние"""
+
+    def runner(parser):
+        async def main():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{migrated_db}")
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+            monkeypatch.setattr(gmail_parser, "AsyncSessionLocal", session_factory)
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text(
+                        "INSERT INTO gmail_accounts (account_id, name, credentials_path, token_path, enabled, "
+                        "last_history_id, last_synced_at) VALUES ('main', 'main', 'c.json', 't.json', 1, '100', :at)"
+                    ),
+                    {"at": LAST_SYNCED_AT},
+                )
+            try:
+                await parser.parse_new_emails()
+                async with session_factory() as session:
+                    row = (await session.execute(
+                        select(GmailAccount.last_history_id, GmailAccount.last_synced_at, GmailAccount.backfill_query)
+                    )).one()
+                return row
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return runner
+
+
+def test_processed_history_advances_checkpoint_and_time(sync):
+    started = datetime.now()
+    history_id, synced_at, backfill_query = sync(FakeParser(history="200"))
+
+    assert history_id == "200"
+    assert backfill_query is None
+    assert started <= synced_at.replace(tzinfo=None) <= datetime.now()
+
+
+def test_held_back_history_keeps_last_synced_at(sync):
+    history_id, synced_at, _ = sync(FakeParser(history="200", processed=False))
+
+    assert history_id == "100"
+    assert synced_at.replace(tzinfo=None) == LAST_SYNCED_AT
+
+
+def test_window_fallback_keeps_last_synced_at_until_caught_up(sync):
+    parser = FakeParser(history=GmailApiError(404, "historyId too old"), backfill_finished=False)
+    history_id, synced_at, backfill_query = sync(parser)
+
+    # Окно строится от прежнего времени синхронизации с перекрытием
+    since = LAST_SYNCED_AT - gmail_parser.GMAIL_FALLBACK_OVERLAP
+    assert parser.backfill_queries == [f"{gmail_parser.SOMON_QUERY} after:{int(since.timestamp())}"]
+    assert history_id == "900"
+    assert backfill_query == parser.backfill_queries[0]
+    # Листинг окна не закончен — повторный 404 должен построить то же окно
+    assert synced_at.replace(tzinfo=None) == LAST_SYNCED_AT
@@ -0,0 +1,188 @@
+"""Очередь фоновых задач на таблице jobs (bot/jobs.py)"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from bot import jobs
+from bot.jobs import JobWorkerPool, enqueue, job_handler, PRIORITY_HIGH, PRIORITY_LOW
+from shared.models.job import Job
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def run(migrated_db, monkeypatch):
+    """Выполняет корутину test(session_factory) на мигрированной БД вместо рабочей"""
+
+    def runner(test):
+        async def main():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{migrated_db}")
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+            monkeypatch.setattr(jobs, "AsyncSessionLocal", session_factory)
+            try:
+                return await test(session_factory)
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return runner
+
+
+async def _job(session_factory, job_id):
+    async with session_factory() as session:
+        return await session.get(Job, job_id)
+
+
+def test_enqueue_is_idempotent_while_job_is_active(run):
+    async def test(session_factory):
+        first = await enqueue("summary", {"application_id": 1}, idempotency_key="summary:1")
+        again = await enqueue("summary", {"application_id": 1}, idempotency_key="summary:1")
+        other = await enqueue("summary", {"application_id": 2}, idempotency_key="summary:2")
+
+        async with session_factory() as session:
+            await session.execute(update(Job).where(Job.id == first[0]).values(status="running"))
+            await session.commit()
+        while_running = await enqueue("summary", {"application_id": 1}, idempotency_key="summary:1")
+
+        async with session_factory() as session:
+            await session.execute(update(Job).where(Job.id == first[0]).values(status="done"))
+            await session.commit()
+        after_done = await enqueue("summary", {"application_id": 1}, idempotency_key="summary:1")
+
+        return first, again, other, while_running, after_done
+
+    first, again, other, while_running, after_done = run(test)
+
+    assert first[1] is True
+    assert again == (first[0], False)
+    assert other[1] is True and other[0] != first[0]
+    assert while_running == (first[0], False)
+    # Завершенная задача ключ не занимает
+    assert after_done[1] is True and after_done[0] not in (first[0], other[0])
+
+
+def test_claim_order_and_visibility_timeout(run, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_VISIBILITY_TIMEOUT", 300)
+
+    async def test(session_factory):
+        low, _ = await enqueue("export", {}, priority=PRIORITY_LOW)
+        high, _ = await enqueue("export", {}, priority=PRIORITY_HIGH)
+        delayed, _ = await enqueue("export", {}, priority=PRIORITY_HIGH)
+        async with session_factory() as session:
+            await session.execute(
+                update(Job).where(Job.id == delayed).values(run_at=datetime.now() + timedelta(hours=1))
+            )
+            await session.commit()
+
+        pool = JobWorkerPool(FakeBot(), workers=1)
+        before = datetime.now()
+        claimed = [await pool._claim(), await pool._claim(), await pool._claim()]
+        return low, high, claimed, before
+
+    low, high, claimed, before = run(test)
+
+    # Сначала по приоритету; задача с run_at в будущем не выдается
+    assert [job.id for job in claimed[:2]] == [high, low]
+    assert claimed[2] is None
+    for job in claimed[:2]:
+        assert job.status == "running"
+        assert job.attempts == 1
+        assert before + timedelta(seconds=299) <= job.locked_until <= datetime.now() + timedelta(seconds=300)
+
+
+def test_expired_lock_is_reclaimed_until_attempts_run_out(run):
+    async def test(session_factory):
+        job_id, _ = await enqueue("export", {}, max_attempts=2)
+        pool = JobWorkerPool(FakeBot(), workers=1)
+
+        async def expire_lock():
+            async with session_factory() as session:
+                await session.execute(
+                    update(Job).where(Job.id == job_id).values(locked_until=datetime.now() - timedelta(seconds=1))
+                )
+                await session.commit()
+
+        first = await pool._claim()
+        # Воркер еще держит задачу — другой ее не получит
+        not_yet = await pool._claim()
+        await expire_lock()
+        second = await pool._claim()
+        await expire_lock()
+        exhausted = await pool._claim()
+        return first, not_yet, second, exhausted, await _job(session_factory, job_id)
+
+    first, not_yet, second, exhausted, job = run(test)
+
+    assert first.attempts == 1
+    assert not_yet is None
+    assert second.id == first.id and second.attempts == 2
+    assert exhausted is None
+    assert job.status == "failed"
+    assert job.last_error == "Превышен таймаут выполнения"
+
+
+def test_failed_attempts_back_off_exponentially(run, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_BACKOFF_BASE", 5)
+    monkeypatch.setattr(jobs, "JOB_BACKOFF_MAX", 600)
+    monkeypatch.setattr(jobs, "_handlers", {})
+
+    @job_handler("test_always_fails", failure_text="❌ Не вышло")
+    async def always_fails(bot, payload):
+        raise RuntimeError("boom")
+
+    bot = FakeBot()
+
+    async def test(session_factory):
+        job_id, _ = await enqueue("test_always_fails", {"chat_id": 42}, max_attempts=3)
+        pool = JobWorkerPool(bot, workers=1)
+        delays = []
+        for _ in range(3):
+            job = await pool._claim()
+            assert job is not None
+            started = datetime.now()
+            await pool._run(job)
+            job = await _job(session_factory, job_id)
+            if job.status == "pending":
+                delays.append((job.run_at - started).total_seconds())
+                # Не ждем задержку — делаем задачу доступной сразу
+                async with session_factory() as session:
+                    await session.execute(update(Job).where(Job.id == job_id).values(run_at=datetime.now()))
+                    await session.commit()
+        return delays, job
+
+    delays, job = run(test)
+
+    assert [round(delay) for delay in delays] == [5, 10]
+    assert job.status == "failed"
+    assert job.attempts == 3
+    assert job.last_error == "boom"
+    assert bot.sent == [(42, "❌ Не вышло: boom")]
+
+
+def test_successful_job_is_done(run, monkeypatch):
+    monkeypatch.setattr(jobs, "_handlers", {})
+    seen = []
+
+    @job_handler("test_succeeds")
+    async def succeeds(bot, payload):
+        seen.append(payload)
+
+    async def test(session_factory):
+        job_id, _ = await enqueue("test_succeeds", {"value": "тест"})
+        pool = JobWorkerPool(FakeBot(), workers=1)
+        await pool._run(await pool._claim())
+        async with session_factory() as session:
+            return await session.scalar(select(Job.status).where(Job.id == job_id))
+
+    assert run(test) == "done"
+    assert seen == [{"value": "тест"}]
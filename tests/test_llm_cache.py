@@ -0,0 +1,91 @@
+"""Кеш ответов LLM с вытеснением по давности использования (shared/services/llm_cache.py)"""
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from shared.models.llm_cache import LlmCacheEntry
+from shared.services import llm_cache
+from shared.services.llm_cache import get_or_generate
+
+
+@pytest.fixture
+def run(migrated_db, monkeypatch):
+    """Выполняет корутину test(session_factory) на мигрированной БД вместо рабочей"""
+    monkeypatch.setattr(llm_cache, "llm_cache_stats", {"hits": 0, "misses": 0})
+
+    def runner(test):
+        async def main():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{migrated_db}")
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+            monkeypatch.setattr(llm_cache, "AsyncSessionLocal", session_factory)
+            try:
+                return await test(session_factory)
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return runner
+
+
+class Generator:
+    """Фальшивый вызов Gemini, считающий обращения"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, result):
+        async def generate():
+            self.calls.append(result)
+            return result
+        return generate
+
+
+def _summary(resume, generate):
+    return get_or_generate("summary", "gemini-test", 1, "Бухгалтер", [resume, ""], generate)
+
+
+def test_hit_skips_generation_and_failures_are_not_cached(run):
+    generator = Generator()
+
+    async def test(session_factory):
+        first = await _summary("резюме", generator("анализ"))
+        second = await _summary("резюме", generator("не должен вызываться"))
+        failed = await _summary("другое резюме", generator(None))
+        retried = await _summary("другое резюме", generator("анализ 2"))
+        async with session_factory() as session:
+            hits = await session.scalar(select(LlmCacheEntry.hits).where(LlmCacheEntry.result == "анализ"))
+        return first, second, failed, retried, hits
+
+    first, second, failed, retried, hits = run(test)
+
+    assert (first, second) == ("анализ", "анализ")
+    assert failed is None and retried == "анализ 2"
+    assert generator.calls == ["анализ", None, "анализ 2"]
+    assert hits == 1
+    assert llm_cache.llm_cache_stats == {"hits": 1, "misses": 3}
+
+
+def test_least_recently_used_entries_are_evicted(run, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_MAX_ENTRIES", 3)
+    generator = Generator()
+
+    async def test(session_factory):
+        for name in ("a", "b", "c"):
+            await _summary(name, generator(f"анализ {name}"))
+        # Попадание освежает "a" — вытеснена должна быть "b"
+        await _summary("a", generator("не должен вызываться"))
+        await _summary("d", generator("анализ d"))
+
+        async with session_factory() as session:
+            stored = set((await session.execute(select(LlmCacheEntry.result))).scalars())
+
+        await _summary("b", generator("анализ b заново"))
+        return stored
+
+    stored = run(test)
+
+    assert stored == {"анализ a", "анализ c", "анализ d"}
+    assert generator.calls == ["анализ a", "анализ b", "анализ c", "анализ d", "анализ b заново"]
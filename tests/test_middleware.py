@@ -0,0 +1,64 @@
+"""Сводка SQL запросов на апдейт (bot/middleware.py)"""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from bot import middleware
+from bot.middleware import DbSessionMiddleware, UpdateQueryStats
+
+
+def test_stats_aggregate_per_update_type():
+    stats = UpdateQueryStats()
+    stats.record("message", 2)
+    stats.record("message", 4)
+    stats.record("callback_query", 9)
+
+    assert stats.as_dict() == {
+        "updates": 3,
+        "queries": 15,
+        "avg_queries": 5.0,
+        "max_queries": 9,
+        "by_type": {"message": 3.0, "callback_query": 9.0},
+    }
+    assert stats.format_metrics() == (
+        "апдейтов 3, запросов 15, на апдейт сред 5.0 / макс 9 (callback_query 9.0, message 3.0)"
+    )
+
+
+def test_flush_due_waits_for_interval_and_resets():
+    stats = UpdateQueryStats()
+    stats.record("message", 3)
+
+    assert stats.flush_due(600) is None
+    assert stats.flush_due(0) is None
+
+    stats.started -= 600
+    line = stats.flush_due(600)
+
+    assert line.startswith("за 600с апдейтов 1, запросов 3")
+    assert stats.updates == 0 and stats.by_type == {}
+    assert stats.flush_due(600) is None
+
+
+def test_middleware_logs_summary_once_interval_passed(monkeypatch, caplog):
+    stats = UpdateQueryStats()
+    monkeypatch.setattr(middleware, "update_query_stats", stats)
+    monkeypatch.setattr(middleware, "DB_QUERY_STATS_INTERVAL", 60)
+
+    async def handler(event, data):
+        return "ok"
+
+    async def run():
+        mw = DbSessionMiddleware()
+        event = SimpleNamespace(event_type="message", update_id=1)
+        assert await mw(handler, event, {}) == "ok"
+        stats.started -= 60
+        assert await mw(handler, event, {}) == "ok"
+
+    with caplog.at_level(logging.INFO, logger="bot.middleware"):
+        asyncio.run(run())
+
+    summaries = [r.getMessage() for r in caplog.records if r.getMessage().startswith("📊")]
+    assert len(summaries) == 1
+    assert "апдейтов 2" in summaries[0]
+    assert stats.updates == 0
@@ -0,0 +1,89 @@
+"""Keyset-пагинация списков (bot/utils/pagination.py) на SQLite в памяти"""
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from shared.database.database import Base
+import shared.models  # noqa: F401 — регистрирует все таблицы в Base.metadata
+from shared.models.vacancy import Vacancy
+from bot.utils.pagination import PageCallback, fetch_page, page_buttons
+
+
+PAGE_SIZE = 20
+
+
+def _walk(rows_setup, page_size=PAGE_SIZE):
+    """Создает вакансии через rows_setup(conn) и листает список вперед до конца и обратно"""
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await rows_setup(conn)
+
+        forward, backward = [], []
+        async with AsyncSession(engine) as session:
+            stmt = Vacancy.__table__.select().with_only_columns(Vacancy.id, Vacancy.created_at)
+            cursor = None
+            pages = []
+            for _ in range(20):  # Защита от бесконечного листания
+                page = await fetch_page(session, stmt, Vacancy.created_at, Vacancy.id, cursor, page_size)
+                pages.append(page)
+                forward.extend(row.id for row in page.rows)
+                buttons = {button.text: button for button in page_buttons(page, "vacancies", page_size=page_size)}
+                if "➡️" not in buttons:
+                    break
+                cursor = PageCallback.unpack(buttons["➡️"].callback_data)
+
+            # Обратно с последней страницы до первой
+            page = pages[-1]
+            backward.append([row.id for row in page.rows])
+            while True:
+                buttons = {button.text: button for button in page_buttons(page, "vacancies", page_size=page_size)}
+                if "⬅️" not in buttons:
+                    break
+                page = await fetch_page(
+                    session, stmt, Vacancy.created_at, Vacancy.id,
+                    PageCallback.unpack(buttons["⬅️"].callback_data), page_size,
+                )
+                backward.append([row.id for row in page.rows])
+
+        await engine.dispose()
+        return forward, [[row.id for row in p.rows] for p in pages], backward
+
+    return asyncio.run(run())
+
+
+def test_pages_of_rows_sharing_server_default_timestamp():
+    # CURRENT_TIMESTAMP хранится без микросекунд: все строки в одной секунде
+    async def setup(conn):
+        await conn.execute(insert(Vacancy), [{"title": f"v{i}"} for i in range(1, 46)])
+
+    forward, pages, backward = _walk(setup)
+
+    assert forward == list(range(45, 0, -1))
+    assert [len(page) for page in pages] == [20, 20, 5]
+    assert backward == list(reversed(pages))
+
+
+def test_pages_of_mixed_timestamp_formats():
+    # Часть строк из server default, часть записана из Python с микросекундами, секунда одна
+    async def setup(conn):
+        await conn.execute(text(
+            "INSERT INTO vacancies (id, title, created_at) VALUES (:id, :title, :created_at)"
+        ), [
+            {"id": i, "title": f"v{i}", "created_at": "2026-01-01 10:00:00" if i % 2 else f"2026-01-01 10:00:00.{i:06d}"}
+            for i in range(1, 31)
+        ])
+        await conn.execute(insert(Vacancy), [
+            {"id": i, "title": f"v{i}", "created_at": datetime(2026, 1, 1, 10, 0, 0, i)} for i in range(31, 41)
+        ])
+
+    forward, pages, backward = _walk(setup, page_size=7)
+
+    assert sorted(forward) == list(range(1, 41))
+    assert len(forward) == len(set(forward))
+    assert backward == list(reversed(pages))
@@ -0,0 +1,199 @@
+"""Планы запросов bot/handlers.py на схеме из миграций (EXPLAIN QUERY PLAN)"""
+import asyncio
+import os
+import re
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from bot import handlers
+from bot.utils.pagination import PageCallback
+from shared.models.user import TelegramUser, RoleEnum
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODERATOR = TelegramUser(id=1, telegram_id=100, role=RoleEnum.MODERATOR)
+ADMIN = TelegramUser(id=2, telegram_id=200, role=RoleEnum.ADMIN)
+
+# Полный проход по большим таблицам без индекса
+FULL_SCAN = re.compile(r"^SCAN (applications|vacancies)$")
+
+
+async def _seed(conn):
+    """5 аккаунтов (2 у модератора), 200 вакансий по 30 откликов"""
+    await conn.execute(text(
+        "INSERT INTO telegram_users (id, telegram_id, role) VALUES (1, 100, 'MODERATOR'), (2, 200, 'ADMIN')"
+    ))
+    for account_id in range(1, 6):
+        await conn.execute(text(
+            "INSERT INTO gmail_accounts (id, account_id, name, credentials_path, token_path, enabled, user_id) "
+            "VALUES (:id, :name, :name, 'credentials.json', 'token.json', 1, :user_id)"
+        ), {"id": account_id, "name": f"account{account_id}", "user_id": 1 if account_id <= 2 else 2})
+    for vacancy_id in range(1, 201):
+        await conn.execute(text(
+            "INSERT INTO vacancies (id, title, gmail_account_id, created_at) "
+            "VALUES (:id, :title, :account_id, datetime('now', :offset))"
+        ), {"id": vacancy_id, "title": f"Вакансия {vacancy_id}", "account_id": vacancy_id % 5 + 1,
+            "offset": f"-{vacancy_id} hours"})
+    await conn.execute(text(
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 30) "
+        "INSERT INTO applications (name, vacancy_id, is_processed, created_at, source) "
+        "SELECT 'Кандидат', vacancies.id, (vacancies.id + n.i) % 3 = 0, "
+        "datetime('now', '-' || (vacancies.id * 60 + n.i) || ' minutes'), 'gmail' "
+        "FROM vacancies, n"
+    ))
+    await conn.execute(text("ANALYZE"))
+
+
+@pytest.fixture(scope="module")
+def database_url(tmp_path_factory):
+    """Файловая SQLite со всеми миграциями alembic и тестовыми данными"""
+    path = tmp_path_factory.mktemp("plans") / "hrbot.db"
+    config = Config()
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{path}")
+    command.upgrade(config, "head")
+
+    url = f"sqlite+aiosqlite:///{path}"
+
+    async def seed():
+        engine = create_async_engine(url)
+        async with engine.begin() as conn:
+            await _seed(conn)
+        await engine.dispose()
+
+    asyncio.run(seed())
+    return url
+
+
+def _next_cursor(keyboard):
+    """Курсор кнопки "➡️" или None, если страница последняя"""
+    for row in keyboard.inline_keyboard if keyboard else []:
+        for button in row:
+            if button.text == "➡️":
+                return PageCallback.unpack(button.callback_data)
+    return None
+
+
+def _plans(database_url, run):
+    """Выполняет run(session) и возвращает [(sql, [строки плана])] всех его запросов"""
+
+    async def main():
+        engine = create_async_engine(database_url)
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            captured.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        async with AsyncSession(engine) as session:
+            await run(session)
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        plans = []
+        async with engine.connect() as conn:
+            for statement, parameters in captured:
+                result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                plans.append((statement, [row[3] for row in result]))
+        await engine.dispose()
+        return plans
+
+    return asyncio.run(main())
+
+
+def _first_and_next_page(render):
+    """Первая страница списка и следующая за ней (с условием keyset-курсора)"""
+
+    async def run(session):
+        _, keyboard = await render(session, None)
+        cursor = _next_cursor(keyboard)
+        assert cursor is not None, "в тестовых данных список должен занимать больше страницы"
+        await render(session, cursor)
+
+    return run
+
+
+# (имя, запросы обработчика, индексы, которые обязаны попасть в план, можно ли сортировать во временном B-tree)
+CASES = [
+    (
+        "vacancies_admin",
+        _first_and_next_page(lambda session, cursor: handlers._render_vacancies_page(session, ADMIN, cursor)),
+        {"ix_vacancies_active_created"},
+        False,
+    ),
+    (
+        # Вакансии нескольких аккаунтов сливаются из разных диапазонов индекса —
+        # сортировка остается, но только по вакансиям модератора
+        "vacancies_moderator",
+        _first_and_next_page(lambda session, cursor: handlers._render_vacancies_page(session, MODERATOR, cursor)),
+        {"ix_gmail_accounts_user_enabled", "ix_vacancies_gmail_account_deleted_created"},
+        True,
+    ),
+    (
+        "vacancy_applications",
+        _first_and_next_page(lambda session, cursor: handlers._render_vacancy_applications_page(session, 7, cursor)),
+        {"ix_applications_active_vacancy_created"},
+        False,
+    ),
+    (
+        "unprocessed_admin",
+        _first_and_next_page(lambda session, cursor: handlers._render_unprocessed_page(session, ADMIN, cursor)),
+        {"ix_applications_active_processed_created"},
+        False,
+    ),
+    (
+        "unprocessed_moderator",
+        _first_and_next_page(lambda session, cursor: handlers._render_unprocessed_page(session, MODERATOR, cursor)),
+        {"ix_applications_active_processed_created", "ix_gmail_accounts_user_enabled"},
+        False,
+    ),
+    (
+        "stats_admin",
+        lambda session: session.execute(handlers._build_stats_stmt(ADMIN)),
+        {"ix_vacancies_gmail_account_deleted_created"},
+        False,
+    ),
+    (
+        "stats_moderator",
+        lambda session: session.execute(handlers._build_stats_stmt(MODERATOR)),
+        {"ix_gmail_accounts_user_enabled", "ix_vacancies_gmail_account_deleted_created"},
+        False,
+    ),
+    (
+        # count(DISTINCT) по вакансиям периода всегда строит временный B-tree
+        "stats_window_moderator",
+        lambda session: session.execute(handlers._build_stats_stmt(MODERATOR, window_days=30)),
+        {"ix_vacancies_gmail_account_deleted_created", "ix_applications_active_vacancy_created"},
+        True,
+    ),
+    (
+        "application_card",
+        lambda session: handlers._load_application_card(session, 5),
+        set(),
+        False,
+    ),
+]
+
+
+@pytest.mark.parametrize("run, indexes, allow_temp_sort", [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_handler_queries_use_indexes(database_url, run, indexes, allow_temp_sort):
+    plans = _plans(database_url, run)
+    assert plans
+
+    used = " ".join(line for _, lines in plans for line in lines)
+    for index in indexes:
+        assert index in used, f"{index} не используется:\n" + _format(plans)
+
+    for statement, lines in plans:
+        for line in lines:
+            assert not FULL_SCAN.match(line), f"полный проход таблицы:\n{statement}\n{line}"
+            if not allow_temp_sort:
+                assert "TEMP B-TREE" not in line, f"сортировка без индекса:\n{statement}\n{line}"
+
+
+def _format(plans):
+    return "\n\n".join(statement + "\n" + "\n".join(f"  {line}" for line in lines) for statement, lines in plans)
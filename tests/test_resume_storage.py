@@ -0,0 +1,130 @@
+"""Хранилище резюме: загрузки кандидатов до подтверждения и ссылки resume_blobs"""
+import asyncio
+import os
+import time
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from shared.database.database import Base
+import shared.models  # noqa: F401 — регистрирует все таблицы в Base.metadata
+from shared.models.resume_blob import ResumeBlob
+from shared.services.resume_storage import ResumeStorage, StoredBlob
+
+
+def _stage(storage, content, filename="cv.pdf"):
+    with storage.open_upload(filename) as writer:
+        writer.write(content)
+        return writer.stage()
+
+
+def _with_session(run):
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            result = await run(session)
+        await engine.dispose()
+        return result
+
+    return asyncio.run(main())
+
+
+def _blob_files(storage):
+    """Файлы хранилища без временной папки загрузок"""
+    return sorted(
+        os.path.join(root, name)
+        for root, dirs, files in os.walk(storage.blob_dir)
+        if os.path.abspath(root) != os.path.abspath(storage.upload_dir)
+        for name in files
+    )
+
+
+def test_upload_stays_out_of_store_until_acquired(tmp_path):
+    storage = ResumeStorage(str(tmp_path))
+    upload = _stage(storage, b"resume")
+
+    assert os.path.dirname(upload.path) == storage.upload_dir
+    assert _blob_files(storage) == []
+
+    async def run(session):
+        path = await storage.acquire_upload(session, upload)
+        await session.commit()
+        return path, await session.scalar(select(ResumeBlob.ref_count))
+
+    path, ref_count = _with_session(run)
+
+    assert _blob_files(storage) == [path]
+    assert open(path, "rb").read() == b"resume"
+    assert ref_count == 1
+    assert os.listdir(storage.upload_dir) == []
+
+
+def test_discarded_upload_leaves_nothing(tmp_path):
+    storage = ResumeStorage(str(tmp_path))
+    first = _stage(storage, b"first")
+    second = _stage(storage, b"second")
+
+    # Повторная загрузка и отмена удаляют файл, в хранилище ничего не остается
+    storage.discard_upload(first.path)
+    storage.discard_upload(second.path)
+
+    assert os.listdir(storage.upload_dir) == []
+    assert _blob_files(storage) == []
+
+
+def test_discard_ignores_files_outside_upload_dir(tmp_path):
+    storage = ResumeStorage(str(tmp_path))
+    with storage.open_writer("cv.pdf") as writer:
+        writer.write(b"stored")
+        blob = writer.finalize()
+
+    storage.discard_upload(blob.path)
+
+    assert os.path.exists(blob.path)
+
+
+def test_duplicate_upload_reuses_stored_file(tmp_path):
+    storage = ResumeStorage(str(tmp_path))
+
+    async def run(session):
+        first = await storage.acquire_upload(session, _stage(storage, b"same"))
+        second = await storage.acquire_upload(session, _stage(storage, b"same"))
+        await session.commit()
+        return first, second, await session.scalar(select(ResumeBlob.ref_count))
+
+    first, second, ref_count = _with_session(run)
+
+    assert first == second
+    assert ref_count == 2
+    assert os.listdir(storage.upload_dir) == []
+
+
+def test_acquire_refuses_blob_removed_by_concurrent_purge(tmp_path):
+    storage = ResumeStorage(str(tmp_path))
+    with storage.open_writer("cv.pdf") as writer:
+        writer.write(b"resume")
+        blob = writer.finalize()
+    # Параллельный purge() успел удалить файл между записью и ссылкой
+    os.remove(blob.path)
+
+    async def run(session):
+        with pytest.raises(FileNotFoundError):
+            await storage.acquire(session, StoredBlob(blob.sha256, blob.path, blob.size))
+
+    _with_session(run)
+
+
+def test_cleanup_removes_only_stale_uploads(tmp_path):
+    storage = ResumeStorage(str(tmp_path))
+    stale = _stage(storage, b"stale")
+    fresh = _stage(storage, b"fresh")
+    old = time.time() - 48 * 3600
+    os.utime(stale.path, (old, old))
+
+    assert storage.cleanup_uploads(max_age_hours=24) == 1
+    assert not os.path.exists(stale.path)
+    assert os.path.exists(fresh.path)
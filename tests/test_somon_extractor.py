@@ -0,0 +1,102 @@
+"""Разбор писем SomonTj (bot/somon_extractor.py) против прежней реализации на BeautifulSoup"""
+import json
+import os
+import random
+
+import pytest
+
+from bot.somon_extractor import extract_somon_email, extract_somon_emails
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "somon")
+
+# Эталон снят прежней реализацией (tests/somon_reference.py) на bs4 из requirements.txt.
+# Начиная с 4.13 BeautifulSoup иначе декодирует &#0; и суррогаты и иначе закрывает
+# теги после </br>, поэтому живое сравнение имеет смысл только на этой версии.
+PINNED_BS4 = "4.12.2"
+
+
+def _fixture_names():
+    return sorted(name for name in os.listdir(FIXTURES) if name.endswith(".html"))
+
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def _reference():
+    bs4 = pytest.importorskip("bs4")
+    if bs4.__version__ != PINNED_BS4:
+        pytest.skip(f"эталон снят на bs4 {PINNED_BS4}, установлена {bs4.__version__}")
+    from tests.somon_reference import extract_reference
+    return extract_reference
+
+
+with open(os.path.join(FIXTURES, "expected.json"), encoding="utf-8") as f:
+    EXPECTED = json.load(f)
+
+
+@pytest.mark.parametrize("name", _fixture_names())
+def test_fixture_matches_recorded_output(name):
+    assert extract_somon_email(_read(name)) == EXPECTED[name]
+
+
+@pytest.mark.parametrize("name", _fixture_names())
+def test_fixture_matches_reference(name):
+    extract_reference = _reference()
+    assert extract_somon_email(_read(name)) == extract_reference(_read(name))
+
+
+# Входы, на которых расходились однопроходный разбор и BeautifulSoup
+EDGE_CASES = [
+    ("<p>Имя: A&#0;B</p>", {"name": "A\x00B"}),
+    ("<p>Имя: &#xD800;x &#x110000;y</p>", {"name": "\ud800x �y"}),
+    ("<p>Имя: &#x80;&#157;</p>", {"name": "€\x9d"}),
+    ("<br><br/><a href=mailto:z@q.tj></br ><![cdata[x]]>", {"email": "z@q.tj"}),
+    (
+        '<br><br/><a href="https://mail.google.com/?attid=1&view=att"></br ><![CDATA[file.pdf]]></a>',
+        {"attachment_url": "https://mail.google.com/?attid=1&view=att"},
+    ),
+    (
+        "<p>Имя: Али<br/></br>Телефон для контакта: 992900000000</p>",
+        {"name": "АлиТелефон для контакта: 992900000000", "phone": "992900000000"},
+    ),
+]
+
+
+@pytest.mark.parametrize("html, fields", EDGE_CASES)
+def test_edge_cases(html, fields):
+    expected = dict.fromkeys(EXPECTED[_fixture_names()[0]], None)
+    expected.update(fields)
+    assert extract_somon_email(html) == expected
+
+
+TOKENS = [
+    "<p>", "</p>", "<P>", "</p >", "<p/>", "<a href=\"mailto:x@y.tj\">", "<a href=mailto:z@q.tj>",
+    "<a href=\"https://mail.google.com/?attid=1&view=att\">", "<a href>", "<a/>", "</a>",
+    "<br>", "<br/>", "</br>", "</BR>", "</br >", "<![CDATA[cd]]>", "<![cdata[x]]>", "<![CDATA[x",
+    "<!-- c -->", "<!---->", "<!DOCTYPE html>", "<?pi x?>", "<![if x]>", "<script>", "</script>",
+    "<style>", "</style>", "<textarea>", "</textarea>", "<pre>", "</pre>", "<table>", "<td>", "</td>",
+    "&amp;", "&amp", "&#0;", "&#x80;", "&#157;", "&#xD800;", "&#x110000;", "&nbsp;", "&notin;",
+    "&notit;", "&foo;", "&#", "&", "<", ">", "\r\n", " ", "\n", " ", "\x00",
+    "Имя: Иван", "Телефон для контакта - +992900000000", "Текст сообщения: привет", "Email: a@b.tj", "text",
+]
+
+
+def test_random_markup_matches_reference():
+    extract_reference = _reference()
+    rng = random.Random(9)
+    for _ in range(2000):
+        html = "".join(rng.choice(TOKENS) for _ in range(rng.randint(1, 14)))
+        assert extract_somon_email(html) == extract_reference(html), repr(html)
+
+
+def test_batch_keeps_order_and_survives_bad_body():
+    bodies = [_read("cover_letter.html"), None, _read("no_cover_letter.html")]
+
+    results = extract_somon_emails(bodies)
+
+    assert results[0] == EXPECTED["cover_letter.html"]
+    assert set(results[1].values()) == {None}
+    assert results[2] == EXPECTED["no_cover_letter.html"]
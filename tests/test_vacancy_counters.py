@@ -0,0 +1,100 @@
+"""Счетчики откликов на вакансиях, которые ведут триггеры SQLite (shared/models/vacancy.py)"""
+import random
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from shared.database.database import Base
+import shared.models  # noqa: F401 — регистрирует все таблицы в Base.metadata
+
+
+RECOUNT = text("""
+    SELECT vacancies.id, vacancies.applications_count, vacancies.unprocessed_count, vacancies.deleted_count,
+           count(applications.id) FILTER (WHERE applications.deleted_at IS NULL),
+           count(applications.id) FILTER (WHERE applications.deleted_at IS NULL AND NOT applications.is_processed),
+           count(applications.id) FILTER (WHERE applications.deleted_at IS NOT NULL)
+    FROM vacancies LEFT JOIN applications ON applications.vacancy_id = vacancies.id
+    GROUP BY vacancies.id
+    ORDER BY vacancies.id
+""")
+
+
+@pytest.fixture(params=["migrations", "create_all"])
+def engine(request, tmp_path):
+    """Схема из миграций alembic и из Base.metadata.create_all — триггеры должны быть в обеих"""
+    if request.param == "migrations":
+        engine = create_engine(f"sqlite:///{request.getfixturevalue('migrated_db')}")
+    else:
+        engine = create_engine(f"sqlite:///{tmp_path / 'create_all.db'}")
+        Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _counters(conn):
+    return {row[0]: row[1:4] for row in conn.execute(RECOUNT)}
+
+
+def _assert_match_recount(conn):
+    for row in conn.execute(RECOUNT):
+        assert row[1:4] == row[4:7], f"вакансия {row[0]}: счетчики {row[1:4]}, пересчет {row[4:7]}"
+
+
+def test_counters_follow_single_row_changes(engine):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO vacancies (id, title) VALUES (1, 'Бухгалтер'), (2, 'Кассир')"))
+        conn.execute(text(
+            "INSERT INTO applications (id, name, vacancy_id, is_processed, source) VALUES "
+            "(1, 'А', 1, 0, 'gmail'), (2, 'Б', 1, 0, 'gmail'), (3, 'В', 1, 1, 'gmail')"
+        ))
+        assert _counters(conn) == {1: (3, 2, 0), 2: (0, 0, 0)}
+
+        conn.execute(text("UPDATE applications SET is_processed = 1 WHERE id = 1"))
+        assert _counters(conn)[1] == (3, 1, 0)
+
+        conn.execute(text("UPDATE applications SET deleted_at = datetime('now') WHERE id = 2"))
+        assert _counters(conn)[1] == (2, 0, 1)
+
+        conn.execute(text("UPDATE applications SET vacancy_id = 2 WHERE id = 3"))
+        assert _counters(conn) == {1: (1, 0, 1), 2: (1, 0, 0)}
+
+        conn.execute(text("DELETE FROM applications WHERE id = 2"))
+        assert _counters(conn)[1] == (1, 0, 0)
+
+        # Отклик без вакансии счетчики не трогает
+        conn.execute(text("INSERT INTO applications (name, vacancy_id, source) VALUES ('Г', NULL, 'telegram')"))
+        assert _counters(conn) == {1: (1, 0, 0), 2: (1, 0, 0)}
+
+
+def test_counters_survive_bulk_updates(engine):
+    rng = random.Random(15)
+    with engine.begin() as conn:
+        for vacancy_id in range(1, 6):
+            conn.execute(text("INSERT INTO vacancies (id, title) VALUES (:id, :title)"),
+                         {"id": vacancy_id, "title": f"Вакансия {vacancy_id}"})
+        for application_id in range(1, 201):
+            conn.execute(
+                text("INSERT INTO applications (id, name, vacancy_id, is_processed, source) "
+                     "VALUES (:id, 'Кандидат', :vacancy_id, :processed, 'gmail')"),
+                {"id": application_id, "vacancy_id": rng.randint(1, 5), "processed": rng.random() < 0.3},
+            )
+        _assert_match_recount(conn)
+
+        # Массовые операции бота: обработать все, удалить вакансию мягко, восстановить, перенести
+        conn.execute(text("UPDATE applications SET is_processed = 1 WHERE vacancy_id = 1"))
+        conn.execute(text("UPDATE applications SET deleted_at = datetime('now') WHERE vacancy_id = 2"))
+        conn.execute(text("UPDATE applications SET deleted_at = NULL WHERE vacancy_id = 2 AND id % 2 = 0"))
+        conn.execute(text("UPDATE applications SET vacancy_id = 4 WHERE vacancy_id = 3"))
+        _assert_match_recount(conn)
+
+        for _ in range(300):
+            application_id = rng.randint(1, 200)
+            statement = rng.choice([
+                "UPDATE applications SET is_processed = NOT is_processed WHERE id = :id",
+                "UPDATE applications SET deleted_at = CASE WHEN deleted_at IS NULL "
+                "THEN datetime('now') END WHERE id = :id",
+                f"UPDATE applications SET vacancy_id = {rng.randint(1, 5)} WHERE id = :id",
+                "DELETE FROM applications WHERE id = :id",
+            ])
+            conn.execute(text(statement), {"id": application_id})
+        _assert_match_recount(conn)